@@ -0,0 +1,225 @@
+# %%
+# Running Imports #
+
+import numpy as np
+import pandas as pd
+
+from balance_series import BalanceSeries, build_max_sparse_table
+
+# %%
+# Vars #
+
+RULE_TYPES = ["min_balance", "emergency_fund", "drop_over_days"]
+ALERT_RULE_COLUMNS = [
+    "Rule_Name",
+    "Account_Name",
+    "Rule_Type",
+    "Threshold",
+    "Window_Days",
+]
+
+
+# %%
+# Functions: Balances #
+
+
+def get_change_days(balance_series, start_date) -> np.ndarray:
+    """Horizon day of each balance change, days before the start are negative"""
+    start_date = np.datetime64(pd.to_datetime(start_date).normalize(), "D")
+    return (balance_series.dates - start_date).astype(np.int64)
+
+
+def get_horizon_days(days, horizon_days) -> np.ndarray:
+    """Sorted unique days within the horizon, always including its first day"""
+    days = np.unique(np.append(days, 0))
+    return days[(days >= 0) & (days < horizon_days)]
+
+
+def find_first_at_or_above(sparse_table, start_idx, thresholds) -> np.ndarray:
+    """First index at or after start_idx where values >= threshold, per query
+
+    Binary lifting over the sparse table, O(log n) per query and vectorized
+    across queries. Returns len(values) when there is no such index.
+    """
+    num_values = len(sparse_table[0])
+    pos = np.asarray(start_idx, dtype=np.int64).copy()
+    thresholds = np.asarray(thresholds, dtype=float)
+
+    for level in range(len(sparse_table) - 1, -1, -1):
+        width = 1 << level
+        level_values = sparse_table[level]
+        can_jump = pos + width <= num_values
+        block_max = np.full(len(pos), np.inf)
+        block_max[can_jump] = level_values[pos[can_jump]]
+        # skip whole blocks that stay below the threshold
+        pos = np.where(can_jump & (block_max < thresholds), pos + width, pos)
+
+    return pos
+
+
+# %%
+# Functions: Rules #
+
+
+def evaluate_below_threshold_rules(balances, thresholds):
+    """First day below each threshold and how many days it stays below"""
+    num_days = len(balances)
+    thresholds = np.asarray(thresholds, dtype=float)
+
+    # running minimum is non-increasing so first crossings are a searchsorted
+    running_min = np.minimum.accumulate(balances)
+    first_idx = np.searchsorted(-running_min, -thresholds, side="right")
+
+    crossed = first_idx < num_days
+    recovery_idx = np.full(len(thresholds), num_days)
+    if crossed.any():
+        sparse_table = build_max_sparse_table(balances)
+        recovery_idx[crossed] = find_first_at_or_above(
+            sparse_table, first_idx[crossed], thresholds[crossed]
+        )
+
+    return first_idx, recovery_idx
+
+
+def evaluate_drop_rule(
+    balance_series, threshold, window_days, start_date, horizon_days
+):
+    """First day the balance is threshold below its peak of the last N days
+
+    Whether the balance is down can only change on a day it changes or the day
+    an older balance leaves the lookback, so only those days are checked.
+    """
+    window = int(max(window_days, 1)) + 1
+    change_days = get_change_days(balance_series, start_date)
+    days = get_horizon_days(
+        np.concatenate([change_days, change_days + window - 1]), horizon_days
+    )
+
+    start_date = np.datetime64(pd.to_datetime(start_date).normalize(), "D")
+    window_starts = start_date + np.maximum(days - window + 1, 0)
+    dates = start_date + days
+    window_max = balance_series.range_max(window_starts, dates)
+
+    dropped = balance_series.value_at(dates) - window_max <= -threshold
+    if not dropped.any():
+        return horizon_days, horizon_days
+
+    first_pos = int(np.argmax(dropped))
+    recovered = ~dropped[first_pos:]
+    recovery_idx = (
+        days[first_pos + int(np.argmax(recovered))] if recovered.any() else horizon_days
+    )
+    return int(days[first_pos]), int(recovery_idx)
+
+
+def evaluate_alert_rules(
+    df_alert_rules, df_daily_balances, start_date, end_date=None
+) -> pd.DataFrame:
+    """Evaluate named alert rules against each account's end-of-day balances
+
+    df_daily_balances holds Date, Account_Name and Balance for the days with
+    activity, balances are carried forward across the days in between and
+    the first balance back to the start. Rules are checked on the days the
+    balance changes, never on every day of the horizon.
+    """
+    start_date = pd.to_datetime(start_date).normalize()
+    if end_date is None:
+        end_date = max(pd.to_datetime(df_daily_balances["Date"]).max(), start_date)
+    end_date = pd.to_datetime(end_date).normalize()
+    horizon_days = (end_date - start_date).days + 1
+
+    df_alert_rules = df_alert_rules.reset_index(drop=True)
+    unknown_types = set(df_alert_rules["Rule_Type"]) - set(RULE_TYPES)
+    if unknown_types:
+        raise ValueError(
+            f"Unknown alert rule types {sorted(unknown_types)}, expected {RULE_TYPES}"
+        )
+
+    first_idx = np.full(len(df_alert_rules), horizon_days)
+    recovery_idx = np.full(len(df_alert_rules), horizon_days)
+
+    df_daily_balances = df_daily_balances.sort_values(by=["Date"], kind="stable")
+    for account_name, df_account_rules in df_alert_rules.groupby("Account_Name"):
+        df_account = df_daily_balances[
+            df_daily_balances["Account_Name"] == account_name
+        ]
+        if df_account.empty:
+            continue
+
+        balance_series = BalanceSeries.from_balances(
+            df_account,
+            value_column="Balance",
+            initial_value=df_account["Balance"].iloc[0],
+        )
+
+        below_rules = df_account_rules[
+            df_account_rules["Rule_Type"] != "drop_over_days"
+        ]
+        if len(below_rules) > 0:
+            days = get_horizon_days(
+                get_change_days(balance_series, start_date),
+                horizon_days,
+            )
+            rule_first, rule_recovery = evaluate_below_threshold_rules(
+                balance_series.value_at(np.datetime64(start_date, "D") + days),
+                below_rules["Threshold"].to_numpy(dtype=float),
+            )
+            # positions among the change days back to days of the horizon
+            days = np.append(days, horizon_days)
+            first_idx[below_rules.index] = days[rule_first]
+            recovery_idx[below_rules.index] = days[rule_recovery]
+
+        drop_rules = df_account_rules[df_account_rules["Rule_Type"] == "drop_over_days"]
+        for rule_idx, rule in drop_rules.iterrows():
+            first_idx[rule_idx], recovery_idx[rule_idx] = evaluate_drop_rule(
+                balance_series,
+                rule["Threshold"],
+                rule["Window_Days"],
+                start_date,
+                horizon_days,
+            )
+
+    crossed = first_idx < horizon_days
+    recovered = recovery_idx < horizon_days
+
+    df_alerts = df_alert_rules[ALERT_RULE_COLUMNS].copy()
+    df_alerts["First_Crossing_Date"] = (
+        start_date + pd.to_timedelta(first_idx, unit="D")
+    ).where(crossed)
+    df_alerts["Days_Until_Crossing"] = np.where(crossed, first_idx, np.nan)
+    df_alerts["Duration_Days"] = np.where(crossed, recovery_idx - first_idx, np.nan)
+    df_alerts["Recovery_Date"] = (
+        start_date + pd.to_timedelta(recovery_idx, unit="D")
+    ).where(crossed & recovered)
+
+    return df_alerts
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    df_example_balances = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2030-01-01", "2030-01-10", "2030-01-20"]),
+            "Account_Name": "Checking",
+            "Balance": [5000.0, 800.0, 3000.0],
+        }
+    )
+    df_example_rules = pd.DataFrame(
+        {
+            "Rule_Name": ["Low", "Overdraft", "Big_Drop"],
+            "Account_Name": "Checking",
+            "Rule_Type": ["min_balance", "min_balance", "drop_over_days"],
+            "Threshold": [1000.0, 0.0, 2000.0],
+            "Window_Days": [0, 0, 30],
+        }
+    )
+    print(
+        evaluate_alert_rules(
+            df_example_rules, df_example_balances, start_date="2030-01-01"
+        )
+    )
+
+
+# %%
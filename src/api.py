@@ -0,0 +1,357 @@
+# %%
+# Running Imports #
+
+import asyncio
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from cash_flow_conversions import format_date_columns, format_money_columns
+
+# %%
+# Vars #
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_REFRESH_SECONDS = 15 * 60
+# money and date columns of each served table and the column it is sliced on
+DICT_TABLE_SPECS = {
+    "forecast": {
+        "money_columns": ["Amount", "Amount_Paid", "Running_Balance"],
+        "date_columns": ["Date"],
+        "range_column": "Date",
+    },
+    "daily_balance": {
+        "money_columns": [
+            "Running_Balance",
+            "Label_Amount",
+            "Emergency_Fund_Amount",
+            "Alert_Threshold",
+        ],
+        "date_columns": ["Date"],
+        "range_column": "Date",
+    },
+    "alerts": {
+        "money_columns": ["Threshold"],
+        "date_columns": ["First_Crossing_Date", "Recovery_Date"],
+        "range_column": None,
+    },
+    "account_balances": {
+        "money_columns": ["Balance"],
+        "date_columns": ["Date"],
+        "range_column": "Date",
+    },
+    "planned_budgets": {
+        "money_columns": [
+            "Amount",
+            "AverageMonthlyCost",
+            "Balance",
+            "Limit",
+            "Available Credit",
+            "Monthly Interest Incurred",
+        ],
+        "date_columns": ["Maturity Date"],
+        "range_column": None,
+    },
+}
+
+
+# %%
+# Functions: Snapshot #
+
+
+def compute_snapshot(our_cash_data) -> dict:
+    """Refresh the source sheets and compute every served table"""
+    asyncio.run(our_cash_data.sheets_storage.refresh_from_sheets_async())
+    df_future_cast = our_cash_data.update_transactions()
+    dict_reports = our_cash_data.build_forecast_reports(df_future_cast)
+
+    dict_frames = {
+        "forecast": df_future_cast,
+        "daily_balance": dict_reports["daily_balance"],
+        "alerts": our_cash_data.evaluate_alert_rules(
+            df_future_cast, df_end_of_day=dict_reports["end_of_day"]
+        ),
+        "account_balances": our_cash_data.get_account_balances_with_details_filled(),
+        "planned_budgets": our_cash_data.sheets_storage.get_income_expense_df(),
+    }
+
+    return dict_frames
+
+
+# %%
+# Class: Query Table #
+
+
+class QueryTable:
+    """A served table sliced per query
+
+    Rows are sorted on the range column so a date range is two searchsorted
+    calls into a datetime64 array. Only the returned window is formatted to
+    sheet style amounts and dates, so paging through a long forecast never
+    formats the whole table.
+    """
+
+    def __init__(self, df, money_columns, date_columns, range_column=None):
+        if range_column is not None:
+            df = df.sort_values(by=[range_column], kind="stable")
+        df = df.reset_index(drop=True)
+
+        self.range_column = range_column
+        self.dates = (
+            df[range_column].to_numpy(dtype="datetime64[ns]")
+            if range_column is not None
+            else None
+        )
+        self.accounts = (
+            df["Account_Name"].to_numpy() if "Account_Name" in df.columns else None
+        )
+        self.df = df
+        self.money_columns = money_columns
+        self.date_columns = date_columns
+
+    def __len__(self):
+        return len(self.df)
+
+    def query(self, start=None, end=None, account=None, offset=0, limit=None):
+        """Total matching rows and the requested window of them"""
+        lo, hi = 0, len(self.df)
+        if self.dates is not None:
+            if start is not None:
+                lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start)))
+            if end is not None:
+                hi = np.searchsorted(
+                    self.dates, np.datetime64(pd.Timestamp(end)), side="right"
+                )
+        df = self.df.iloc[lo:hi]
+
+        if account is not None:
+            if self.accounts is None:
+                raise ValueError("This table has no Account_Name column")
+            df = df[self.accounts[lo:hi] == account]
+
+        total = len(df)
+        stop = None if limit is None else offset + limit
+        df_window = format_date_columns(
+            format_money_columns(df.iloc[offset:stop], self.money_columns),
+            self.date_columns,
+        )
+        return total, df_window
+
+
+# %%
+# Class: Forecast Store #
+
+
+class ForecastStore:
+    """Latest computed tables held in memory and refreshed in the background
+
+    Readers always see one complete snapshot, a refresh builds the new tables
+    and swaps them in with the version bumped.
+    """
+
+    def __init__(
+        self,
+        compute_func,
+        refresh_seconds=DEFAULT_REFRESH_SECONDS,
+        dict_table_specs=DICT_TABLE_SPECS,
+    ):
+        self.compute_func = compute_func
+        self.refresh_seconds = refresh_seconds
+        self.dict_table_specs = dict_table_specs
+        self.version = 0
+        self.computed_at = None
+        self.last_error = None
+        self._snapshot = (0, {})
+        self._refresh_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """Recompute every table and swap the new snapshot in"""
+        dict_frames = self.compute_func()
+        dict_tables = {
+            name: QueryTable(dict_frames[name], **spec)
+            for name, spec in self.dict_table_specs.items()
+            if name in dict_frames
+        }
+        # one assignment, a reader holds either the old or the new snapshot
+        self._snapshot = (self.version + 1, dict_tables)
+        self.computed_at = pd.Timestamp("now")
+        self.version = self._snapshot[0]
+
+    def _refresh_loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as error:
+                # keep serving the previous snapshot
+                print(f"Forecast refresh failed: {error!r}")
+                self.last_error = repr(error)
+            self._refresh_requested.wait(timeout=self.refresh_seconds)
+            self._refresh_requested.clear()
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._refresh_loop, name="forecast_refresh", daemon=True
+        )
+        self._thread.start()
+
+    def request_refresh(self):
+        self._refresh_requested.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._refresh_requested.set()
+
+    def table_names(self) -> list:
+        return list(self._snapshot[1])
+
+    def query(self, name, **kwargs):
+        """Version, total matching rows and the window of the table name"""
+        version, dict_tables = self._snapshot
+        if name not in dict_tables:
+            raise KeyError(name)
+        total, df = dict_tables[name].query(**kwargs)
+        return version, total, df
+
+
+# %%
+# Functions: HTTP #
+
+
+def parse_query_params(query_string) -> dict:
+    dict_params = {key: values[-1] for key, values in parse_qs(query_string).items()}
+    dict_query = {
+        "start": dict_params.get("start"),
+        "end": dict_params.get("end"),
+        "account": dict_params.get("account"),
+        "offset": int(dict_params.get("offset", 0)),
+        "limit": int(dict_params["limit"]) if "limit" in dict_params else None,
+    }
+    if dict_query["offset"] < 0 or (dict_query["limit"] or 0) < 0:
+        raise ValueError("offset and limit must not be negative")
+    return dict_query
+
+
+def get_etag(version, path, query_string) -> str:
+    """Responses only change with the snapshot, so the etag needs no body"""
+    normalized_query = "&".join(sorted(query_string.split("&")))
+    digest = hashlib.sha1(f"{path}?{normalized_query}".encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def make_request_handler(forecast_store):
+    class ForecastRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, body, etag=None):
+            encoded = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            if etag is not None:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def _send_error_json(self, status, message):
+            self._send_json(status, json.dumps({"error": message}))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            name = url.path.strip("/")
+
+            if name == "health":
+                self._send_json(
+                    200,
+                    json.dumps(
+                        {
+                            "version": forecast_store.version,
+                            "computed_at": str(forecast_store.computed_at),
+                            "tables": forecast_store.table_names(),
+                            "last_error": forecast_store.last_error,
+                        }
+                    ),
+                )
+                return
+
+            if forecast_store.version == 0:
+                self._send_error_json(503, "No forecast has been computed yet")
+                return
+            if name not in forecast_store.table_names():
+                self._send_error_json(404, f"Unknown table: {name}")
+                return
+
+            etag = get_etag(forecast_store.version, url.path, url.query)
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            try:
+                version, total, df = forecast_store.query(
+                    name, **parse_query_params(url.query)
+                )
+            except ValueError as error:
+                self._send_error_json(400, str(error))
+                return
+
+            # the snapshot may have moved on between the etag and the query
+            etag = get_etag(version, url.path, url.query)
+            body = (
+                f'{{"version": {version}, "total": {total}, '
+                f'"rows": {df.to_json(orient="records")}}}'
+            )
+            self._send_json(200, body, etag=etag)
+
+        def do_POST(self):
+            if urlparse(self.path).path.strip("/") != "refresh":
+                self._send_error_json(404, "Unknown endpoint")
+                return
+            forecast_store.request_refresh()
+            self._send_json(202, json.dumps({"version": forecast_store.version}))
+
+        def log_message(self, format, *args):
+            pass
+
+    return ForecastRequestHandler
+
+
+def make_server(forecast_store, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    return ThreadingHTTPServer((host, port), make_request_handler(forecast_store))
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    import os
+
+    from cash_flow_commander import OurCashData, SheetsStorage
+    from frame_cache import enable_copy_on_write
+
+    enable_copy_on_write()
+
+    our_cash_data = OurCashData(
+        SheetsStorage(), num_days=int(os.getenv("FORECAST_NUM_DAYS", 365 * 2))
+    )
+    forecast_store = ForecastStore(lambda: compute_snapshot(our_cash_data))
+    forecast_store.start()
+
+    server = make_server(forecast_store, port=int(os.getenv("API_PORT", DEFAULT_PORT)))
+    print(f"Serving forecasts on http://{DEFAULT_HOST}:{server.server_port}")
+    try:
+        server.serve_forever()
+    finally:
+        forecast_store.stop()
+        server.server_close()
+
+
+# %%
@@ -0,0 +1,253 @@
+# %%
+# Running Imports #
+
+import asyncio
+import functools
+import random
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from quota_budget import QuotaBudget
+from readable_utils.display_tools import print_logger
+from readable_utils.google_drive_tools import (
+    download_and_get_drive_file_path,
+    get_file_list_from_folder_id_file_path,
+)
+from readable_utils.google_tools import (
+    WriteToSheets,
+    clear_range_of_sheet_obj,
+    get_book_sheet,
+    get_book_sheet_df,
+    write_df_to_range_of_sheet_obj,
+)
+
+# %%
+# Vars #
+
+# the google clients share one pooled http session, keep at most this many
+# requests in flight on it
+MAX_CONCURRENT_REQUESTS = 8
+MAX_RETRIES = 5
+BASE_DELAY_SECONDS = 1.0
+# sheets quotas are per minute, waiting a second or two just burns retries
+QUOTA_BASE_DELAY_SECONDS = 15.0
+MAX_DELAY_SECONDS = 120.0
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+# %%
+# Functions: Backoff #
+
+
+def get_error_status(error) -> Optional[int]:
+    """Http status of a gspread or googleapiclient error if it carries one"""
+    response = getattr(error, "response", None) or getattr(error, "resp", None)
+    status = getattr(response, "status_code", None) or getattr(response, "status", None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_quota_error(error) -> bool:
+    message = str(error).lower()
+    return (
+        get_error_status(error) == 429
+        or "quota" in message
+        or "rate limit" in message
+        or "ratelimit" in message
+    )
+
+
+def is_retryable_error(error) -> bool:
+    return (
+        is_quota_error(error)
+        or get_error_status(error) in RETRYABLE_STATUS_CODES
+        or isinstance(error, (ConnectionError, TimeoutError))
+    )
+
+
+def get_retry_after_seconds(error) -> Optional[float]:
+    """Seconds the server asked us to wait in its Retry-After header"""
+    response = getattr(error, "response", None) or getattr(error, "resp", None)
+    headers = getattr(response, "headers", None) or {}
+    if not hasattr(headers, "get"):
+        return None
+    retry_after = headers.get("Retry-After") or headers.get("retry-after")
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_backoff_delay(error, attempt) -> float:
+    """Exponential backoff with jitter, quota errors start from a longer base"""
+    retry_after = get_retry_after_seconds(error)
+    if retry_after is not None:
+        return min(retry_after, MAX_DELAY_SECONDS)
+
+    base_delay = (
+        QUOTA_BASE_DELAY_SECONDS if is_quota_error(error) else BASE_DELAY_SECONDS
+    )
+    delay = min(base_delay * 2**attempt, MAX_DELAY_SECONDS)
+    # equal jitter so concurrent retries do not hit the quota window together
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def call_with_backoff(func, *args, retries=MAX_RETRIES, **kwargs):
+    """Call func, retrying quota and transient errors with exponential backoff"""
+    for attempt in range(retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as error:
+            if attempt == retries or not is_retryable_error(error):
+                raise
+            delay = get_backoff_delay(error, attempt)
+            print_logger(
+                f"{getattr(func, '__name__', func)} failed with {error!r}, "
+                f"retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+
+# %%
+# Class #
+
+
+class AsyncSheetsClient:
+    """Bounded, retrying asyncio front end over the Sheets and Drive calls
+
+    The readable_utils calls are blocking, so they run on a dedicated thread
+    pool sized to the request limit and reuse the pooled session of the
+    underlying google clients. A semaphore per event loop bounds how many
+    calls are in flight and every call is retried with backoff. With a quota
+    budget each attempt first draws its requests from it, clients sharing a
+    budget share the quota.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_requests=MAX_CONCURRENT_REQUESTS,
+        retries=MAX_RETRIES,
+        quota_budget: Optional[QuotaBudget] = None,
+    ):
+        self.max_concurrent_requests = max_concurrent_requests
+        self.retries = retries
+        self.quota_budget = quota_budget
+        self._executor = None
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrent_requests,
+                thread_name_prefix="sheets_client",
+            )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrent_requests)
+        return self._semaphores[loop]
+
+    def _call_within_budget(self, call, num_requests):
+        if self.quota_budget is not None:
+            self.quota_budget.acquire(num_requests)
+        return call()
+
+    async def run(self, func, *args, retries=None, num_requests=1, **kwargs):
+        """Run a blocking call on the pool, retrying it with backoff
+
+        num_requests is how many API requests the call makes, drawn from the
+        quota budget on every attempt.
+        """
+        if retries is None:
+            retries = self.retries
+        loop = asyncio.get_running_loop()
+        call = functools.partial(
+            self._call_within_budget,
+            functools.partial(func, *args, **kwargs),
+            num_requests,
+        )
+
+        for attempt in range(retries + 1):
+            try:
+                async with self._get_semaphore():
+                    return await loop.run_in_executor(self._get_executor(), call)
+            except Exception as error:
+                if attempt == retries or not is_retryable_error(error):
+                    raise
+                delay = get_backoff_delay(error, attempt)
+                print_logger(
+                    f"{getattr(func, '__name__', func)} failed with {error!r}, "
+                    f"retrying in {delay:.1f}s"
+                )
+                # the slot is released while we wait so other calls keep going
+                await asyncio.sleep(delay)
+
+    async def get_book_sheet_df(self, book_name, sheet_name):
+        return await self.run(get_book_sheet_df, book_name, sheet_name)
+
+    async def get_book_sheet_dfs(self, book_name, ls_sheet_names) -> dict:
+        """Fetch several tabs of a book concurrently keyed by sheet name"""
+        ls_dfs = await asyncio.gather(
+            *[
+                self.get_book_sheet_df(book_name, sheet_name)
+                for sheet_name in ls_sheet_names
+            ]
+        )
+        return dict(zip(ls_sheet_names, ls_dfs))
+
+    async def get_book_sheet(self, book_name, sheet_name):
+        return await self.run(get_book_sheet, book_name, sheet_name)
+
+    async def write_to_sheets(self, book_name, sheet_name, df, **kwargs):
+        return await self.run(WriteToSheets, book_name, sheet_name, df, **kwargs)
+
+    async def clear_range_of_sheet_obj(self, sheet_obj, start, end):
+        return await self.run(
+            clear_range_of_sheet_obj, sheet_obj=sheet_obj, start=start, end=end
+        )
+
+    async def write_df_to_range_of_sheet_obj(self, sheet_obj, df, start, **kwargs):
+        return await self.run(
+            write_df_to_range_of_sheet_obj,
+            sheet_obj=sheet_obj,
+            df=df,
+            start=start,
+            **kwargs,
+        )
+
+    async def get_file_list_from_folder_id_file_path(self, folder_id, ls_file_path):
+        return await self.run(
+            get_file_list_from_folder_id_file_path, folder_id, ls_file_path
+        )
+
+    async def download_and_get_drive_file_path(self, **kwargs):
+        return await self.run(download_and_get_drive_file_path, **kwargs)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    sheets_client = AsyncSheetsClient()
+    dict_dfs = asyncio.run(
+        sheets_client.get_book_sheet_dfs(
+            "Our_Cash", ["Income_Expense", "Account_Date_Balances"]
+        )
+    )
+    for sheet_name, df in dict_dfs.items():
+        print(sheet_name, df.shape)
+    sheets_client.close()
+
+
+# %%
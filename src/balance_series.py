@@ -0,0 +1,142 @@
+# %%
+# Running Imports #
+
+import numpy as np
+import pandas as pd
+
+# %%
+# Functions #
+
+
+def build_max_sparse_table(values) -> list:
+    """Sparse table of range maxima, level k holds max(values[i:i + 2**k])"""
+    ls_levels = [values]
+    width = 1
+    while width * 2 <= len(values):
+        previous = ls_levels[-1]
+        ls_levels.append(np.maximum(previous[:-width], previous[width:]))
+        width *= 2
+    return ls_levels
+
+
+# %%
+# Class #
+
+
+class BalanceSeries:
+    """A balance that only changes on the days with transactions
+
+    Holds the sorted change dates and the balance from each one on, so its
+    size follows the number of transaction days rather than the length of
+    the horizon. The balance before the first change is initial_value.
+    Lookups are a searchsorted, range minima and maxima use sparse tables
+    built on first use, and the balance is only expanded onto every day by
+    to_dense.
+    """
+
+    def __init__(self, dates, values, initial_value=np.nan):
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        values = np.asarray(values, dtype=float)
+        if len(dates) != len(values):
+            raise ValueError("dates and values must have the same length")
+        if len(dates) > 1 and not (np.diff(dates).astype(np.int64) > 0).all():
+            raise ValueError("dates must be sorted and unique")
+
+        self.dates = dates
+        self.values = values
+        self.initial_value = float(initial_value)
+        self._max_sparse_table = None
+        self._min_sparse_table = None
+
+    @classmethod
+    def from_balances(
+        cls, df, date_column="Date", value_column="Running_Balance", **kwargs
+    ):
+        """Series of the last balance of each day of a balance frame"""
+        dates = pd.to_datetime(df[date_column]).dt.normalize().to_numpy()
+        values = df[value_column].to_numpy(dtype=float)
+        order = np.argsort(dates, kind="stable")
+        dates = dates[order].astype("datetime64[D]")
+
+        is_last_of_day = np.append(dates[1:] != dates[:-1], True)
+        return cls(dates[is_last_of_day], values[order][is_last_of_day], **kwargs)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + self.values.nbytes
+
+    def _get_positions(self, dates) -> np.ndarray:
+        """Index of the last change on or before each date, -1 if none"""
+        dates = np.asarray(pd.to_datetime(dates), dtype="datetime64[D]")
+        return np.searchsorted(self.dates, dates, side="right") - 1
+
+    def value_at(self, dates) -> np.ndarray:
+        """Balance at the end of each date"""
+        positions = self._get_positions(np.atleast_1d(dates))
+        return np.where(
+            positions >= 0, self.values[np.maximum(positions, 0)], self.initial_value
+        )
+
+    def _range_reduce(self, start_dates, end_dates, sparse_table, reduce_func):
+        start_dates = np.atleast_1d(pd.to_datetime(start_dates))
+        end_dates = np.atleast_1d(pd.to_datetime(end_dates))
+        # the balance carried into the range, then the changes inside it
+        result = self.value_at(start_dates)
+        lo = self._get_positions(start_dates) + 1
+        hi = self._get_positions(end_dates) + 1
+
+        non_empty = lo < hi
+        levels = np.zeros(len(lo), dtype=np.int64)
+        levels[non_empty] = np.floor(np.log2(hi[non_empty] - lo[non_empty]))
+        for level in np.unique(levels[non_empty]):
+            mask = non_empty & (levels == level)
+            level_values = sparse_table[level]
+            block = reduce_func(
+                level_values[lo[mask]], level_values[hi[mask] - (1 << level)]
+            )
+            # NaN only comes from an unknown initial value, skip it
+            result[mask] = np.where(
+                np.isnan(result[mask]), block, reduce_func(result[mask], block)
+            )
+        return result
+
+    def range_max(self, start_dates, end_dates) -> np.ndarray:
+        """Highest end of day balance from each start date to its end date"""
+        if self._max_sparse_table is None:
+            self._max_sparse_table = build_max_sparse_table(self.values)
+        return self._range_reduce(
+            start_dates, end_dates, self._max_sparse_table, np.maximum
+        )
+
+    def range_min(self, start_dates, end_dates) -> np.ndarray:
+        """Lowest end of day balance from each start date to its end date"""
+        if self._min_sparse_table is None:
+            self._min_sparse_table = [
+                -level_values for level_values in build_max_sparse_table(-self.values)
+            ]
+        return self._range_reduce(
+            start_dates, end_dates, self._min_sparse_table, np.minimum
+        )
+
+    def resample(self, freq, start_date=None, end_date=None) -> pd.Series:
+        """Balance at the end of each period of freq, D, W, M or Y"""
+        start_date = self.dates[0] if start_date is None else start_date
+        end_date = self.dates[-1] if end_date is None else end_date
+        periods = pd.period_range(start_date, end_date, freq=freq)
+        period_ends = periods.end_time.normalize()
+        return pd.Series(self.value_at(period_ends), index=period_ends, name="Balance")
+
+    def to_dense(self, start_date, end_date) -> pd.Series:
+        """Balance on every day from start_date to end_date"""
+        dates = pd.date_range(
+            pd.to_datetime(start_date).normalize(),
+            pd.to_datetime(end_date).normalize(),
+            freq="D",
+        )
+        return pd.Series(self.value_at(dates), index=dates, name="Balance")
+
+
+# %%
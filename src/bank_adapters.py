@@ -0,0 +1,213 @@
+# %%
+# Running Imports #
+
+import csv
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from date_parsing import DICT_DATE_FORMATS, parse_dates
+
+# %%
+# Vars #
+
+# the one schema every statement is normalized into, amounts are negative
+# for money leaving the account and positive for money coming in
+DICT_TRANSACTION_DTYPES = {
+    "bank": "category",
+    "account_type": "category",
+    "file_name": "category",
+    "transaction_date": "datetime64[ns]",
+    "post_date": "datetime64[ns]",
+    "description": "string",
+    "category": "category",
+    "type": "category",
+    "amount": "float64",
+}
+LS_TRANSACTION_COLUMNS = list(DICT_TRANSACTION_DTYPES)
+
+# statement formats by name, a file is read with the first format whose
+# header holds all of its columns, so more specific formats go first
+DICT_BANK_FORMATS = {
+    "chase_checking": {
+        "bank": "chase",
+        "account_type": "checking",
+        "dict_columns": {
+            "Posting Date": "post_date",
+            "Description": "description",
+            "Type": "type",
+            "Amount": "amount",
+        },
+    },
+    "chase_credit_card": {
+        "bank": "chase",
+        "account_type": "credit_card",
+        "dict_columns": {
+            "Transaction Date": "transaction_date",
+            "Post Date": "post_date",
+            "Description": "description",
+            "Category": "category",
+            "Type": "type",
+            "Amount": "amount",
+        },
+    },
+    "capital_one_credit_card": {
+        "bank": "capital_one",
+        "account_type": "credit_card",
+        "dict_columns": {
+            "Transaction Date": "transaction_date",
+            "Posted Date": "post_date",
+            "Description": "description",
+            "Category": "category",
+            "Debit": None,
+            "Credit": None,
+        },
+        # charges are in Debit and payments in Credit, both positive
+        "date_format": "%Y-%m-%d",
+        "amount_columns": ("Credit", "Debit"),
+    },
+    "discover_credit_card": {
+        "bank": "discover",
+        "account_type": "credit_card",
+        "dict_columns": {
+            "Trans. Date": "transaction_date",
+            "Post Date": "post_date",
+            "Description": "description",
+            "Category": "category",
+            "Amount": "amount",
+        },
+        # charges are positive
+        "amount_sign": -1,
+    },
+}
+# source columns read as categories, the rest of the text stays strings
+LS_CATEGORY_TARGETS = ["category", "type"]
+
+
+# %%
+# Functions: Sniffing #
+
+
+def read_header(file_path) -> list:
+    """Column names on the first line of a statement"""
+    with open(file_path, newline="", encoding="utf-8-sig") as file:
+        header = next(csv.reader(file), [])
+    return header
+
+
+def sniff_bank_format(ls_header, dict_bank_formats=DICT_BANK_FORMATS) -> str:
+    """Name of the first statement format whose columns are all in the header"""
+    set_header = set(ls_header)
+    for format_name, dict_format in dict_bank_formats.items():
+        if set(dict_format["dict_columns"]) <= set_header:
+            return format_name
+    raise ValueError(f"No statement format matches the columns {ls_header}")
+
+
+# %%
+# Functions: Reading #
+
+
+def get_read_dtypes(dict_format) -> dict:
+    """Explicit dtypes of the source columns a format reads"""
+    dict_dtypes = {}
+    for source_column, target_column in dict_format["dict_columns"].items():
+        if target_column == "amount" or source_column in dict_format.get(
+            "amount_columns", ()
+        ):
+            dict_dtypes[source_column] = "float64"
+        elif target_column in LS_CATEGORY_TARGETS:
+            dict_dtypes[source_column] = "category"
+        else:
+            dict_dtypes[source_column] = "string"
+    return dict_dtypes
+
+
+def normalize_statement(df, dict_format, file_name="") -> pd.DataFrame:
+    """Typed frame in the shared transaction schema from a raw statement"""
+    dict_sources = {
+        target_column: source_column
+        for source_column, target_column in dict_format["dict_columns"].items()
+        if target_column is not None
+    }
+    df_statement = pd.DataFrame(
+        {
+            target_column: df[source_column]
+            for target_column, source_column in dict_sources.items()
+        },
+        index=df.index,
+    )
+
+    if "amount_columns" in dict_format:
+        credit_column, debit_column = dict_format["amount_columns"]
+        df_statement["amount"] = df[credit_column].fillna(0) - df[debit_column].fillna(
+            0
+        )
+    df_statement["amount"] = df_statement["amount"] * dict_format.get("amount_sign", 1)
+
+    for date_column in ["transaction_date", "post_date"]:
+        if date_column in dict_sources:
+            df_statement[date_column] = parse_dates(
+                df_statement[date_column].astype(object),
+                format=dict_format.get(
+                    "date_format", DICT_DATE_FORMATS.get(dict_sources[date_column])
+                ),
+            )
+
+    df_statement["bank"] = dict_format["bank"]
+    df_statement["account_type"] = dict_format["account_type"]
+    df_statement["file_name"] = file_name
+    for column, dtype in DICT_TRANSACTION_DTYPES.items():
+        if column not in df_statement.columns:
+            # from object so empty categories are text like the others
+            df_statement[column] = pd.Series(None, index=df.index, dtype=object).astype(
+                dtype
+            )
+    return df_statement[LS_TRANSACTION_COLUMNS].astype(DICT_TRANSACTION_DTYPES)
+
+
+def read_statement(
+    file_path, file_name="", dict_bank_formats=DICT_BANK_FORMATS
+) -> pd.DataFrame:
+    """Read a bank statement CSV of any known format into the shared schema
+
+    The format is picked from the header and only its columns are read, with
+    explicit dtypes, so the columns a statement carries but the schema does
+    not are never loaded.
+    """
+    dict_format = dict_bank_formats[
+        sniff_bank_format(read_header(file_path), dict_bank_formats)
+    ]
+    dict_dtypes = get_read_dtypes(dict_format)
+    # index_col=False keeps the first column as data when trailing commas
+    # leave more fields than headers
+    df = pd.read_csv(
+        file_path,
+        usecols=list(dict_dtypes),
+        dtype=dict_dtypes,
+        index_col=False,
+        encoding="utf-8-sig",
+    )
+    return normalize_statement(df, dict_format, file_name)
+
+
+def combine_statements(ls_dfs) -> pd.DataFrame:
+    """One frame of normalized statements, categories merged across files"""
+    if not ls_dfs:
+        return pd.DataFrame(columns=LS_TRANSACTION_COLUMNS).astype(
+            DICT_TRANSACTION_DTYPES
+        )
+    dict_columns = {}
+    for column, dtype in DICT_TRANSACTION_DTYPES.items():
+        ls_columns = [df[column] for df in ls_dfs]
+        if dtype == "category":
+            # concat would fall back to object when the files' categories differ
+            dict_columns[column] = pd.Series(
+                union_categoricals(ls_columns, ignore_order=True)
+            )
+        else:
+            dict_columns[column] = pd.concat(ls_columns, ignore_index=True)
+    return pd.DataFrame(dict_columns)
+
+
+# %%
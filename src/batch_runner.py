@@ -0,0 +1,270 @@
+# %%
+# Running Imports #
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from config import data_dir
+
+# %%
+# Vars #
+
+# list of households, each a dict with household_id, book_name and optionally
+# sheet_id, num_days and num_scenarios
+HOUSEHOLDS_CONFIG_PATH = os.path.join(data_dir, "households.json")
+BATCH_RUNS_DIR = os.path.join(data_dir, "batch_runs")
+DEFAULT_NUM_DAYS = 365 * 2
+# households fetched, computed or written at once, bounds the frames held
+MAX_HOUSEHOLDS_IN_FLIGHT = 16
+LS_STATUS_COLUMNS = [
+    "household_id",
+    "book_name",
+    "status",
+    "error",
+    "fetch_seconds",
+    "compute_seconds",
+    "write_seconds",
+    "total_seconds",
+    "num_writes",
+]
+
+
+# %%
+# Functions: Households #
+
+
+def read_households_config(file_path=HOUSEHOLDS_CONFIG_PATH) -> list:
+    """Households of a batch run, book_name defaults to the household id"""
+    with open(file_path) as file:
+        ls_households = json.load(file)
+
+    ls_household_ids = [
+        dict_household["household_id"] for dict_household in ls_households
+    ]
+    if len(set(ls_household_ids)) != len(ls_household_ids):
+        raise ValueError("Household ids must be unique")
+    return [
+        {"book_name": dict_household["household_id"], **dict_household}
+        for dict_household in ls_households
+    ]
+
+
+def get_household_storage(dict_household, sheets_client=None):
+    """Storage of a household's workbook on the shared sheets client"""
+    from cash_flow_commander import SheetsStorage
+
+    return SheetsStorage(
+        sheets_client=sheets_client,
+        book_name=dict_household["book_name"],
+        sheet_id=dict_household.get("sheet_id"),
+        household_id=dict_household["household_id"],
+    )
+
+
+# %%
+# Functions: Compute #
+
+
+class WriteCollector:
+    """Report sink that keeps the submitted writes instead of making them
+
+    Lets the outputs of a household be computed in a worker process and
+    written afterwards by the parent, a newer write to a tab replaces an
+    older one like on the ReportSink.
+    """
+
+    def __init__(self):
+        self._dict_writes = {}
+
+    def submit(self, key, writer, **kwargs):
+        self._dict_writes.pop(key, None)
+        self._dict_writes[key] = {"key": key, "writer": writer, "kwargs": kwargs}
+
+    def num_pending(self) -> int:
+        return len(self._dict_writes)
+
+    def get_writes(self) -> list:
+        return list(self._dict_writes.values())
+
+    def flush(self, timeout=None) -> bool:
+        return True
+
+    def close(self, timeout=None):
+        pass
+
+
+def compute_household_writes(dict_household, dict_source_dfs) -> list:
+    """Forecast a household from its fetched tabs and return the report writes
+
+    Runs in a worker process and never touches the network, the storage is
+    seeded with the fetched tabs so the forecast does not refetch them. The
+    forecast history of each household is kept in its own directory.
+    """
+    from cash_flow_commander import (
+        OurCashData,
+        write_account_balances_outputs,
+        write_debt_payoff_outputs,
+        write_forecast_outputs,
+    )
+    from forecast_history import FORECAST_HISTORY_DIR, ForecastHistory
+    from monte_carlo import DEFAULT_NUM_SCENARIOS
+
+    sheets_storage = get_household_storage(dict_household)
+    sheets_storage.set_source_dfs(dict_source_dfs)
+    write_collector = WriteCollector()
+    sheets_storage.report_sink = write_collector
+    our_cash_data = OurCashData(
+        sheets_storage,
+        num_days=dict_household.get("num_days", DEFAULT_NUM_DAYS),
+        forecast_history=ForecastHistory(
+            os.path.join(FORECAST_HISTORY_DIR, dict_household["household_id"])
+        ),
+        num_scenarios=dict_household.get("num_scenarios", DEFAULT_NUM_SCENARIOS),
+        # already a pool worker, the scenarios run in this process
+        scenario_max_workers=1,
+    )
+
+    write_forecast_outputs(sheets_storage, our_cash_data)
+    write_account_balances_outputs(sheets_storage, our_cash_data)
+    write_debt_payoff_outputs(sheets_storage, our_cash_data)
+
+    return write_collector.get_writes()
+
+
+# %%
+# Class #
+
+
+class BatchRunner:
+    """Fetch, forecast and write many households' workbooks in one run
+
+    Fetches and writes of every household go through one sheets client, so
+    they share its bounded pool and its quota budget. The forecast of each
+    household runs on a process pool while others are still fetching or
+    writing. A household that fails is reported and the rest carry on.
+    """
+
+    def __init__(
+        self,
+        ls_households,
+        sheets_client,
+        executor,
+        max_households_in_flight=MAX_HOUSEHOLDS_IN_FLIGHT,
+        storage_factory=get_household_storage,
+        compute_func=compute_household_writes,
+    ):
+        self.ls_households = ls_households
+        self.sheets_client = sheets_client
+        self.executor = executor
+        self.max_households_in_flight = max_households_in_flight
+        self.storage_factory = storage_factory
+        self.compute_func = compute_func
+
+    async def run_household(self, dict_household, semaphore) -> dict:
+        dict_status = {
+            "household_id": dict_household["household_id"],
+            "book_name": dict_household["book_name"],
+            "status": "failed",
+            "error": "",
+            "fetch_seconds": 0.0,
+            "compute_seconds": 0.0,
+            "write_seconds": 0.0,
+            "num_writes": 0,
+        }
+        start_time = time.perf_counter()
+        async with semaphore:
+            try:
+                sheets_storage = self.storage_factory(
+                    dict_household, self.sheets_client
+                )
+
+                stage_time = time.perf_counter()
+                await sheets_storage.refresh_from_sheets_async()
+                dict_status["fetch_seconds"] = time.perf_counter() - stage_time
+
+                stage_time = time.perf_counter()
+                ls_writes = await asyncio.get_running_loop().run_in_executor(
+                    self.executor,
+                    self.compute_func,
+                    dict_household,
+                    sheets_storage.get_source_dfs(),
+                )
+                dict_status["compute_seconds"] = time.perf_counter() - stage_time
+
+                stage_time = time.perf_counter()
+                dict_writers = sheets_storage.get_report_writers()
+                for write in ls_writes:
+                    await sheets_storage.write_async(
+                        dict_writers[write["writer"]],
+                        num_requests=sheets_storage.DICT_WRITER_REQUESTS[
+                            write["writer"]
+                        ],
+                        **write["kwargs"],
+                    )
+                    dict_status["num_writes"] += 1
+                dict_status["write_seconds"] = time.perf_counter() - stage_time
+                dict_status["status"] = "ok"
+            except Exception as error:
+                print(f"{dict_household['household_id']} failed: {error!r}")
+                dict_status["error"] = repr(error)
+
+        dict_status["total_seconds"] = time.perf_counter() - start_time
+        return dict_status
+
+    async def run_async(self) -> pd.DataFrame:
+        """Status and stage timings of every household"""
+        semaphore = asyncio.Semaphore(self.max_households_in_flight)
+        ls_statuses = await asyncio.gather(
+            *[
+                self.run_household(dict_household, semaphore)
+                for dict_household in self.ls_households
+            ]
+        )
+        return pd.DataFrame(ls_statuses, columns=LS_STATUS_COLUMNS)
+
+    def run(self) -> pd.DataFrame:
+        return asyncio.run(self.run_async())
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    from async_sheets import AsyncSheetsClient
+    from frame_cache import enable_copy_on_write
+    from quota_budget import REQUESTS_PER_MINUTE, QuotaBudget
+
+    enable_copy_on_write()
+
+    ls_households = read_households_config(
+        os.getenv("HOUSEHOLDS_CONFIG_PATH", HOUSEHOLDS_CONFIG_PATH)
+    )
+    sheets_client = AsyncSheetsClient(
+        quota_budget=QuotaBudget(
+            int(os.getenv("SHEETS_REQUESTS_PER_MINUTE", REQUESTS_PER_MINUTE))
+        )
+    )
+    batch_start_time = time.perf_counter()
+    try:
+        # spawned workers start without the option, they turn it on themselves
+        with ProcessPoolExecutor(initializer=enable_copy_on_write) as executor:
+            df_statuses = BatchRunner(ls_households, sheets_client, executor).run()
+    finally:
+        sheets_client.close()
+
+    os.makedirs(BATCH_RUNS_DIR, exist_ok=True)
+    status_file_path = os.path.join(
+        BATCH_RUNS_DIR, f"{pd.Timestamp('now'):%Y-%m-%d_%H%M%S}.csv"
+    )
+    df_statuses.to_csv(status_file_path, index=False)
+    print(df_statuses.to_string(index=False))
+    print(
+        f"{(df_statuses['status'] == 'ok').sum()} of {len(df_statuses)} households "
+        f"done in {time.perf_counter() - batch_start_time:.1f}s, "
+        f"status written to {status_file_path}"
+    )
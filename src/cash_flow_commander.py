@@ -1,23 +1,64 @@
 # %%
 # Running Imports #
 
+import asyncio
 import os
 import warnings
 from typing import Optional
 
 import pandas as pd
 from dotenv import load_dotenv
-from tqdm import tqdm
 
+from alerts import evaluate_alert_rules
+from async_sheets import AsyncSheetsClient, call_with_backoff
+from balance_series import BalanceSeries
+from cash_flow_conversions import (
+    CENTS_PER_UNIT,
+    format_date_columns,
+    format_money_columns,
+    to_as_of_date,
+    to_cents,
+    to_dates,
+)
 from config import parent_dir
+from debt_payoff import generate_debt_payoff_df, get_debt_accounts
+from excel_storage import get_rows_from_df, read_excel_sheet, write_excel_sheet
+from forecast_history import ForecastHistory
+from forecast_reports import (
+    DAILY_BALANCE_DAYS_BACK,
+    build_forecast_reports,
+    get_alert_dates_df,
+    get_daily_balance_df,
+    get_end_of_day_df,
+    get_forecast_arrays,
+    get_label_dates_df,
+)
+from frame_cache import enable_copy_on_write, get_frame_view
+from memo_graph import MemoGraph
+from monte_carlo import DEFAULT_NUM_SCENARIOS, run_monte_carlo
+from report_sink import ReportSink, get_journal_dir
 from readable_utils.display_tools import pprint_df, print_logger  # noqa F401
 from readable_utils.google_tools import (
     WriteToSheets,
     clear_range_of_sheet_obj,
+    get_book,
     get_book_sheet,
-    get_book_sheet_df,
     write_df_to_range_of_sheet_obj,
 )
+from recurrence import (
+    BusinessCalendar,
+    generate_occurrences,
+    get_default_business_calendar,
+)
+from result_cache import ResultCache, hash_frame
+from rollups import DICT_ROLLUP_FREQS, compute_forecast_rollups, get_report_freq
+from sheet_ranges import fetch_projected_sheet, get_num_requests
+from spending_analytics import (
+    SPENDING_HISTORY_DIR,
+    SpendingHistory,
+    apply_suggested_amounts,
+    suggest_income_expense_amounts,
+)
 
 warnings.filterwarnings("ignore")
 
@@ -37,158 +78,340 @@ if os.path.exists(dotenv_path):
 class SheetsStorage:
     """Handles all Google Sheets data access and caching"""
 
-    def __init__(self):
+    # cache key and tab of every sheet the forecast reads
+    DICT_SOURCE_SHEETS = {
+        "income_expense_df": "Income_Expense",
+        "account_balances": "Account_Date_Balances",
+        "account_details": "Account_Details",
+        "transactions_report": "Transactions_Report",
+    }
+    # columns the getters use from each source tab, amounts and dates of the
+    # tabs that grow with history are fetched as typed values
+    DICT_SOURCE_SPECS = {
+        "income_expense_df": {
+            "ls_columns": [
+                "Category",
+                "Sub_Category",
+                "Type",
+                "When",
+                "Account_Name",
+                "Amount",
+                "Auto_Pay_Account",
+                "Auto_Pay_Amount",
+                "AfterDays",
+                "AverageMonthlyCost",
+                "Balance",
+                "Limit",
+                "Available Credit",
+                "Interest Rate",
+                "Monthly Interest Incurred",
+                "Payoff Order",
+                "Maturity Date",
+                "Priority",
+                "Business_Day_Roll",
+            ],
+        },
+        "account_balances": {
+            "ls_columns": ["Date", "Account_Name", "Balance"],
+            "ls_typed_columns": ["Date", "Balance"],
+            "ls_date_columns": ["Date"],
+            "min_date_column": "Date",
+        },
+        "account_details": {
+            "ls_columns": [
+                "Account_Name",
+                "Category",
+                "Sub_Category",
+                "Limit",
+                "Interest Rate",
+                "Maturity Date",
+                "Link",
+            ],
+        },
+        "transactions_report": {
+            "ls_columns": [
+                "Date",
+                "Category",
+                "Type",
+                "Account_Name",
+                "Auto_Pay_Account",
+                "Amount",
+                "Amount_Paid",
+                "Date_Paid",
+                "Running_Balance",
+                "Occurrence_ID",
+            ],
+            "ls_typed_columns": ["Date", "Amount", "Amount_Paid", "Running_Balance"],
+            "ls_date_columns": ["Date"],
+            "min_date_column": "Date",
+        },
+    }
+
+    # Sheets API requests each report writer makes, about, drawn from the
+    # quota budget of the sheets client
+    DICT_WRITER_REQUESTS = {"sheet": 3, "summary_page": 6}
+
+    def __init__(
+        self,
+        sheets_client: Optional[AsyncSheetsClient] = None,
+        write_behind=False,
+        journal_dir=None,
+        book_name="Our_Cash",
+        sheet_id=None,
+        household_id=None,
+    ):
         self._dict_sheets_dfs = {}
-        self._sheet_id = os.getenv("OUR_CASH_SHEET_ID")
+        # set when the source tabs were fetched elsewhere and handed in with
+        # set_source_dfs, the forecast then uses them as given
+        self.is_seeded = False
+        # called with the key of a cached tab whenever it is replaced
+        self._ls_refresh_listeners = []
+        self.book_name = book_name
+        self._sheet_id = sheet_id or os.getenv("OUR_CASH_SHEET_ID")
         self._sheet_link = (
             f"https://docs.google.com/spreadsheets/d/{self._sheet_id}/edit#gid=0"
         )
+        self.sheets_client = sheets_client or AsyncSheetsClient()
+        self._book = None
+        # in write-behind mode the write_ methods journal and return, the sink
+        # flushes them to Google in the background
+        self.report_sink = None
+        if write_behind:
+            # each book and household journals apart, so pending writes of
+            # one are never replayed into another
+            if journal_dir is None:
+                journal_dir = get_journal_dir(*self.get_journal_target(), household_id)
+            self.report_sink = ReportSink(
+                self.get_report_writers(), journal_dir=journal_dir
+            )
 
-    def _get_sheet_data(self, key, sheet_name, force_update=False) -> pd.DataFrame:
-        """Generic method to fetch and cache sheet data"""
-        if key in self._dict_sheets_dfs and not force_update:
-            return self._dict_sheets_dfs[key].copy()
-
-        df = get_book_sheet_df("Our_Cash", sheet_name)
-        self._dict_sheets_dfs[key] = df.copy()
-        return df.copy()
-
-    def get_income_expense_df(self, force_update=False):
-        """Get income/expense data with proper data type conversion"""
-        df_income_expense = self._get_sheet_data(
-            key="income_expense_df",
-            sheet_name="Income_Expense",
-            force_update=force_update,
+    def get_journal_target(self) -> tuple:
+        """Backend and book the queued writes go to, names the journal"""
+        return ("sheets", self.book_name)
+
+    def get_report_writers(self) -> dict:
+        """Writers the report sink hands queued writes to, keyed by name"""
+        return {
+            "sheet": self._write_sheet_now,
+            "summary_page": self._write_sheets_summary_page_now,
+        }
+
+    def _get_book(self):
+        if self._book is None:
+            self._book = call_with_backoff(get_book, self.book_name)
+        return self._book
+
+    def _values_batch_get(
+        self, ls_ranges, value_render_option, date_time_render_option
+    ) -> list:
+        """Values of each A1 range in one Sheets API request"""
+        book = self._get_book()
+        ls_value_ranges = book.client.sheet.values_batch_get(
+            book.id,
+            ls_ranges,
+            value_render_option=value_render_option,
+            date_time_render_option=date_time_render_option,
         )
-
-        df_income_expense["Amount"] = df_income_expense["Amount"].astype(float)
-        df_income_expense["Maturity Date"] = pd.to_datetime(
-            df_income_expense["Maturity Date"]
-        ).dt.date
-        df_income_expense["AfterDays"] = df_income_expense["AfterDays"].astype(int)
-        df_income_expense["Auto_Pay_Amount"] = df_income_expense[
-            "Auto_Pay_Amount"
-        ].astype(str)
-        df_income_expense["AverageMonthlyCost"] = df_income_expense[
-            "AverageMonthlyCost"
-        ].astype(float)
-        df_income_expense["Balance"] = (
-            df_income_expense["Balance"].replace("", 0).astype(float)
-        )
-        df_income_expense["Limit"] = (
-            df_income_expense["Limit"].replace("", 0).astype(float)
-        )
-        df_income_expense["Available Credit"] = (
-            df_income_expense["Available Credit"].replace("", 0).astype(float)
-        )
-        df_income_expense["Interest Rate"] = (
-            df_income_expense["Interest Rate"]
-            .str.replace("%", "")
-            .replace("", 0)
-            .astype(float)
-        ) / 100  # Convert percentage to decimal
-        df_income_expense["Monthly Interest Incurred"] = (
-            df_income_expense["Monthly Interest Incurred"].replace("", 0).astype(float)
-        )
-        df_income_expense["Payoff Order"] = (
-            df_income_expense["Payoff Order"].replace("", 0).astype(int)
-        )
-        df_income_expense["Priority"] = (
-            df_income_expense["Priority"].replace("", 0).astype(int)
-        )
-        df_income_expense["Account_Name"] = df_income_expense["Account_Name"].astype(
-            str
-        )
-        df_income_expense["Category"] = df_income_expense["Category"].astype(str)
-        df_income_expense["Sub_Category"] = df_income_expense["Sub_Category"].astype(
-            str
-        )
-        df_income_expense["Type"] = df_income_expense["Type"].astype(str)
-        df_income_expense["Auto_Pay_Account"] = df_income_expense[
-            "Auto_Pay_Account"
-        ].astype(str)
-
-        return df_income_expense
-
-    def get_oncely_transactions(self):
-        df_oncely_transactions = self.get_income_expense_df()
-
-        df_oncely_transactions = df_oncely_transactions[
-            (df_oncely_transactions["Type"] == "oncely")
-        ]
-
-        # convert from format 2/29/2024
-        df_oncely_transactions["Date"] = pd.to_datetime(
-            df_oncely_transactions["When"], format="%m/%d/%Y"
+        return [value_range.get("values", []) for value_range in ls_value_ranges]
+
+    def fetch_sheet_df(
+        self,
+        sheet_name,
+        ls_columns=None,
+        ls_typed_columns=(),
+        ls_date_columns=(),
+        min_date_column=None,
+        min_date=None,
+    ) -> pd.DataFrame:
+        """Fetch the given columns of a tab, from min_date on if given, uncached
+
+        Only the minimal A1 ranges covering the columns are requested. Typed
+        columns come back as numbers and dates instead of display strings.
+        """
+        return fetch_projected_sheet(
+            self._values_batch_get,
+            sheet_name,
+            ls_columns=ls_columns,
+            ls_typed_columns=ls_typed_columns,
+            ls_date_columns=ls_date_columns,
+            min_date_column=min_date_column,
+            min_date=min_date,
         )
-        df_oncely_transactions = df_oncely_transactions.drop(columns=["When"])
 
-        return df_oncely_transactions
-
-    def get_yearly_transactions(self):
-        df_yearly_transactions = self.get_income_expense_df()
-
-        df_yearly_transactions = df_yearly_transactions[
-            (df_yearly_transactions["Type"] == "yearly")
-        ]
-
-        # convert from format 13-Jul
-        df_yearly_transactions["Month_Number"] = pd.to_datetime(
-            df_yearly_transactions["When"], format="%d-%b"
-        ).dt.month
-        df_yearly_transactions["Day_Of_Month"] = pd.to_datetime(
-            df_yearly_transactions["When"], format="%d-%b"
-        ).dt.day
-        df_yearly_transactions = df_yearly_transactions.drop(columns=["When"])
+    def fetch_source_df(self, key, min_date=None) -> pd.DataFrame:
+        """Fetch a source tab projected to the columns its getter uses
+
+        The cached getters read every row. Transactions_Report is written
+        back in full from the rows read, and the balance pivot and current
+        balances need every Account_Date_Balances row, so a lower bound
+        would drop history. min_date is for callers that only read.
+        """
+        return self.fetch_sheet_df(
+            self.DICT_SOURCE_SHEETS[key],
+            min_date=min_date,
+            **self.DICT_SOURCE_SPECS[key],
+        )
 
-        return df_yearly_transactions
+    def get_fetch_requests(self, key) -> int:
+        """Sheets API requests a fetch of the source makes, opening the book too"""
+        num_requests = get_num_requests(**self.DICT_SOURCE_SPECS.get(key, {}))
+        return num_requests + (1 if self._book is None else 0)
 
-    def get_monthly_transactions(self):
-        df_monthly_transactions = self.get_income_expense_df()
+    def _fetch_sheet_data(self, key, sheet_name) -> pd.DataFrame:
+        if key in self.DICT_SOURCE_SPECS:
+            return self.fetch_source_df(key)
+        return self.fetch_sheet_df(sheet_name)
 
-        df_monthly_transactions = df_monthly_transactions[
-            (df_monthly_transactions["Type"] == "monthly")
-        ]
+    def add_refresh_listener(self, listener):
+        """Call listener with the key of each cached tab that is refreshed"""
+        self._ls_refresh_listeners.append(listener)
 
-        # convert from format 25
-        df_monthly_transactions["Day_Of_Month"] = df_monthly_transactions[
-            "When"
-        ].astype(int)
-        df_monthly_transactions = df_monthly_transactions.drop(columns=["When"])
+    def _set_sheet_df(self, key, df):
+        is_refresh = key in self._dict_sheets_dfs
+        self._dict_sheets_dfs[key] = df
+        # nothing can be derived from a tab that was never cached
+        if is_refresh:
+            for listener in self._ls_refresh_listeners:
+                listener(key)
 
-        return df_monthly_transactions
+    def _get_sheet_data(self, key, sheet_name, force_update=False) -> pd.DataFrame:
+        """Generic method to fetch and cache sheet data"""
+        if key in self._dict_sheets_dfs and not force_update:
+            return get_frame_view(self._dict_sheets_dfs[key])
 
-    def get_bi_weekly_transactions(self):
-        df_bi_weekly_transactions = self.get_income_expense_df()
+        df = call_with_backoff(self._fetch_sheet_data, key, sheet_name)
+        self._set_sheet_df(key, df)
+        return get_frame_view(df)
 
-        df_bi_weekly_transactions = df_bi_weekly_transactions[
-            (df_bi_weekly_transactions["Type"] == "biweekly")
-        ]
+    async def _get_sheet_data_async(
+        self, key, sheet_name, force_update=False
+    ) -> pd.DataFrame:
+        """Async variant of _get_sheet_data, the cache is shared"""
+        if key in self._dict_sheets_dfs and not force_update:
+            return get_frame_view(self._dict_sheets_dfs[key])
 
-        # convert from format 2/29/2024
-        df_bi_weekly_transactions["An_Occur_Date"] = pd.to_datetime(
-            df_bi_weekly_transactions["When"], format="%m/%d/%Y"
+        df = await self.sheets_client.run(
+            self._fetch_sheet_data,
+            key,
+            sheet_name,
+            num_requests=self.get_fetch_requests(key),
+        )
+        self._set_sheet_df(key, df)
+        return get_frame_view(df)
+
+    async def refresh_from_sheets_async(self, ls_keys=None):
+        """Fetch every source sheet, or the given keys, concurrently into the cache"""
+        if ls_keys is None:
+            ls_keys = list(self.DICT_SOURCE_SHEETS)
+        await asyncio.gather(
+            *[
+                self._get_sheet_data_async(
+                    key, self.DICT_SOURCE_SHEETS[key], force_update=True
+                )
+                for key in ls_keys
+            ]
         )
-        df_bi_weekly_transactions = df_bi_weekly_transactions.drop(columns=["When"])
-
-        return df_bi_weekly_transactions
-
-    def get_every_x_days_transactions(self):
-        df_every_x_days_transactions = self.get_income_expense_df()
 
-        df_every_x_days_transactions = df_every_x_days_transactions[
-            (df_every_x_days_transactions["Type"] == "everyXDays")
-        ]
+    def get_source_dfs(self) -> dict:
+        """Cached source sheets keyed like DICT_SOURCE_SHEETS"""
+        return {
+            key: get_frame_view(df)
+            for key, df in self._dict_sheets_dfs.items()
+            if key in self.DICT_SOURCE_SHEETS
+        }
+
+    def set_source_dfs(self, dict_source_dfs):
+        """Seed the cache with source sheets fetched elsewhere"""
+        for key, df in dict_source_dfs.items():
+            self._set_sheet_df(key, df)
+        self.is_seeded = True
+
+    def get_source_hashes(self) -> dict:
+        """Content hash of each cached source sheet, used to detect edits"""
+        dict_hashes = {}
+        for key in self.DICT_SOURCE_SHEETS:
+            if key not in self._dict_sheets_dfs:
+                continue
+            dict_hashes[key] = hash_frame(self._dict_sheets_dfs[key])
+        return dict_hashes
+
+    def get_book_modified_time(self):
+        """Last update time of the book from Drive metadata, None if unavailable"""
+        # pygsheets reads the time from Drive each time the property is accessed
+        return call_with_backoff(getattr, self._get_book(), "updated", None)
+
+    def write_sheet(self, sheet_name, df):
+        """Replace a tab of the book, queued on the report sink if write-behind"""
+        if self.report_sink is not None:
+            self.report_sink.submit(sheet_name, "sheet", sheet_name=sheet_name, df=df)
+            print_logger(f"{sheet_name} queued for writing.")
+            return
+
+        self._write_sheet_now(sheet_name, df)
+
+    def _write_sheet_now(self, sheet_name, df):
+        call_with_backoff(WriteToSheets, self.book_name, sheet_name, df)
+        print_logger(f"{sheet_name} updated successfully.")
+
+    def flush_writes(self, timeout=None) -> bool:
+        """Wait for queued report writes, always True without write-behind"""
+        if self.report_sink is None:
+            return True
+        return self.report_sink.flush(timeout=timeout)
+
+    def close(self):
+        """Flush queued report writes and release the sheets client"""
+        if self.report_sink is not None:
+            self.report_sink.close()
+        self.sheets_client.close()
+
+    async def write_async(self, write_method, *args, **kwargs):
+        """Run one of the write_ methods on the sheets client pool
+
+        The writes already retry with backoff, so the client does not retry
+        them again.
+        """
+        return await self.sheets_client.run(write_method, *args, retries=0, **kwargs)
 
-        # convert from format 2/29/2024
-        df_every_x_days_transactions["An_Occur_Date"] = pd.to_datetime(
-            df_every_x_days_transactions["When"], format="%m/%d/%Y"
-        )
-        df_every_x_days_transactions = df_every_x_days_transactions.drop(
-            columns=["When"]
+    def get_income_expense_df(self, force_update=False):
+        """Get income/expense data with proper data type conversion"""
+        df_income_expense = self._get_sheet_data(
+            key="income_expense_df",
+            sheet_name="Income_Expense",
+            force_update=force_update,
         )
 
-        return df_every_x_days_transactions
+        return df_income_expense.assign(
+            **{
+                "Amount": to_cents(df_income_expense["Amount"]),
+                "Maturity Date": to_dates(df_income_expense["Maturity Date"]),
+                "AfterDays": df_income_expense["AfterDays"].astype(int),
+                "Auto_Pay_Amount": df_income_expense["Auto_Pay_Amount"].astype(str),
+                "AverageMonthlyCost": to_cents(df_income_expense["AverageMonthlyCost"]),
+                "Balance": to_cents(df_income_expense["Balance"]),
+                "Limit": to_cents(df_income_expense["Limit"]),
+                "Available Credit": to_cents(df_income_expense["Available Credit"]),
+                "Interest Rate": (
+                    df_income_expense["Interest Rate"]
+                    .str.replace("%", "")
+                    .replace("", 0)
+                    .astype(float)
+                )
+                / 100,  # Convert percentage to decimal
+                "Monthly Interest Incurred": to_cents(
+                    df_income_expense["Monthly Interest Incurred"]
+                ),
+                "Payoff Order": (
+                    df_income_expense["Payoff Order"].replace("", 0).astype(int)
+                ),
+                "Priority": df_income_expense["Priority"].replace("", 0).astype(int),
+                "Account_Name": df_income_expense["Account_Name"].astype(str),
+                "Category": df_income_expense["Category"].astype(str),
+                "Sub_Category": df_income_expense["Sub_Category"].astype(str),
+                "Type": df_income_expense["Type"].astype(str),
+                "Auto_Pay_Account": df_income_expense["Auto_Pay_Account"].astype(str),
+            }
+        )
 
     def get_account_balances(self, force_update=False):
         """Get account balances data"""
@@ -198,15 +421,11 @@ class SheetsStorage:
             force_update=force_update,
         )
 
-        df_account_balances["Date"] = pd.to_datetime(
-            df_account_balances["Date"]
-        ).dt.date
-        df_account_balances["Balance"] = df_account_balances["Balance"].astype(float)
-        df_account_balances["Account_Name"] = df_account_balances[
-            "Account_Name"
-        ].astype(str)
-
-        return df_account_balances
+        return df_account_balances.assign(
+            Date=to_dates(df_account_balances["Date"]),
+            Balance=to_cents(df_account_balances["Balance"]),
+            Account_Name=df_account_balances["Account_Name"].astype(str),
+        )
 
     def get_account_details(self, force_update=False):
         """Get account details data"""
@@ -216,28 +435,25 @@ class SheetsStorage:
             force_update=force_update,
         )
 
-        df_account_details["Account_Name"] = df_account_details["Account_Name"].astype(
-            str
-        )
-        df_account_details["Category"] = df_account_details["Category"].astype(str)
-        df_account_details["Sub_Category"] = df_account_details["Sub_Category"].astype(
-            str
-        )
-        df_account_details["Limit"] = (
-            df_account_details["Limit"].replace("", 0).astype(float)
+        return df_account_details.assign(
+            **{
+                "Account_Name": df_account_details["Account_Name"].astype(str),
+                "Category": df_account_details["Category"].astype(str),
+                "Sub_Category": df_account_details["Sub_Category"].astype(str),
+                "Limit": to_cents(df_account_details["Limit"]),
+                "Interest Rate": (
+                    df_account_details["Interest Rate"]
+                    .str.replace("%", "")
+                    .replace("", 0)
+                    .astype(float)
+                )
+                / 100,  # Convert percentage to decimal
+                "Maturity Date": to_dates(
+                    df_account_details["Maturity Date"], errors="coerce"
+                ),
+                "Link": df_account_details["Link"].astype(str),
+            }
         )
-        df_account_details["Interest Rate"] = (
-            df_account_details["Interest Rate"]
-            .str.replace("%", "")
-            .replace("", 0)
-            .astype(float)
-        ) / 100  # Convert percentage to decimal
-        df_account_details["Maturity Date"] = pd.to_datetime(
-            df_account_details["Maturity Date"], errors="coerce"
-        ).dt.date
-        df_account_details["Link"] = df_account_details["Link"].astype(str)
-
-        return df_account_details
 
     def get_transactions_report(self, force_update=False):
         """Get transactions report data"""
@@ -247,30 +463,43 @@ class SheetsStorage:
             force_update=force_update,
         )
 
-        df_transactions_report["Date"] = pd.to_datetime(
-            df_transactions_report["Date"]
-        ).dt.date
-        df_transactions_report["Amount"] = df_transactions_report["Amount"].astype(
-            float
-        )
-        df_transactions_report["Amount_Paid"] = (
-            df_transactions_report["Amount_Paid"].replace("", 0).astype(float)
-        )
-        df_transactions_report["Running_Balance"] = (
-            df_transactions_report["Running_Balance"].replace("", 0).astype(float)
+        # reports written before occurrence ids have no column for them
+        if "Occurrence_ID" in df_transactions_report.columns:
+            occurrence_ids = (
+                df_transactions_report["Occurrence_ID"].fillna("").astype(str)
+            )
+        else:
+            occurrence_ids = ""
+
+        return df_transactions_report.assign(
+            Date=to_dates(df_transactions_report["Date"]),
+            Amount=to_cents(df_transactions_report["Amount"]),
+            Amount_Paid=to_cents(df_transactions_report["Amount_Paid"]),
+            Running_Balance=to_cents(df_transactions_report["Running_Balance"]),
+            Account_Name=df_transactions_report["Account_Name"].astype(str),
+            Category=df_transactions_report["Category"].astype(str),
+            Type=df_transactions_report["Type"].astype(str),
+            Auto_Pay_Account=df_transactions_report["Auto_Pay_Account"].astype(str),
+            Occurrence_ID=occurrence_ids,
         )
-        df_transactions_report["Account_Name"] = df_transactions_report[
-            "Account_Name"
-        ].astype(str)
-        df_transactions_report["Category"] = df_transactions_report["Category"].astype(
-            str
+
+    def get_alert_rules(self, force_update=False):
+        """Get named alert rules, emergency_fund rules may leave Threshold blank"""
+        df_alert_rules = self._get_sheet_data(
+            key="alert_rules",
+            sheet_name="Alert_Rules",
+            force_update=force_update,
         )
-        df_transactions_report["Type"] = df_transactions_report["Type"].astype(str)
-        df_transactions_report["Auto_Pay_Account"] = df_transactions_report[
-            "Auto_Pay_Account"
-        ].astype(str)
 
-        return df_transactions_report
+        return df_alert_rules.assign(
+            Rule_Name=df_alert_rules["Rule_Name"].astype(str),
+            Account_Name=df_alert_rules["Account_Name"].astype(str),
+            Rule_Type=df_alert_rules["Rule_Type"].astype(str),
+            Threshold=to_cents(df_alert_rules["Threshold"]).where(
+                df_alert_rules["Threshold"] != ""
+            ),
+            Window_Days=df_alert_rules["Window_Days"].replace("", 0).astype(int),
+        )
 
     def update_income_expense_from_sheets(self):
         df_income_expense = self.get_income_expense_df(force_update=True)
@@ -292,47 +521,169 @@ class SheetsStorage:
 
         return df_transactions_report
 
+    async def update_income_expense_from_sheets_async(self):
+        await self._get_sheet_data_async(
+            "income_expense_df", "Income_Expense", force_update=True
+        )
+
+        return self.get_income_expense_df()
+
+    async def update_account_balances_from_sheets_async(self):
+        await self._get_sheet_data_async(
+            "account_balances", "Account_Date_Balances", force_update=True
+        )
+
+        return self.get_account_balances()
+
+    async def update_account_details_from_sheets_async(self):
+        await self._get_sheet_data_async(
+            "account_details", "Account_Details", force_update=True
+        )
+
+        return self.get_account_details()
+
+    async def update_transactions_report_from_sheets_async(self):
+        await self._get_sheet_data_async(
+            "transactions_report", "Transactions_Report", force_update=True
+        )
+
+        return self.get_transactions_report()
+
+    async def update_alert_rules_from_sheets_async(self):
+        await self._get_sheet_data_async(
+            "alert_rules", "Alert_Rules", force_update=True
+        )
+
+        return self.get_alert_rules()
+
     def write_transaction_report(self, df_future_cast):
         """Write the transactions report to Google Sheets"""
-        WriteToSheets(
-            "Our_Cash",
-            "Transactions_Report",
-            df_future_cast,
+        df_future_cast = format_money_columns(
+            df_future_cast, ["Amount", "Amount_Paid", "Running_Balance"]
         )
-        print_logger("Transactions report updated successfully.")
+        df_future_cast = format_date_columns(df_future_cast, ["Date"])
+        # unpaid rows keep an empty Amount_Paid cell for the user to fill in
+        df_future_cast["Amount_Paid"] = df_future_cast["Amount_Paid"].where(
+            df_future_cast["Amount_Paid"] != 0, ""
+        )
+        self.write_sheet("Transactions_Report", df_future_cast)
 
     def write_daily_balance_report(self, df_daily_balance_report):
         """Write the daily balance report to Google Sheets"""
-        WriteToSheets(
-            "Our_Cash",
-            "Daily_Balance_Report",
+        df_daily_balance_report = format_money_columns(
             df_daily_balance_report,
+            [
+                "Running_Balance",
+                "Label_Amount",
+                "Emergency_Fund_Amount",
+                "Alert_Threshold",
+            ],
+        )
+        df_daily_balance_report = format_date_columns(df_daily_balance_report, ["Date"])
+        self.write_sheet("Daily_Balance_Report", df_daily_balance_report)
+
+    def write_balance_rollup_report(self, df_rollup, freq):
+        """Write a weekly, monthly or yearly balance rollup to Google Sheets"""
+        sheet_name = f"{DICT_ROLLUP_FREQS[freq]}_Balance_Report"
+        df_rollup = format_money_columns(
+            df_rollup, ["Inflows", "Outflows", "Net", "End_Balance", "Min_Balance"]
+        )
+        df_rollup = format_date_columns(df_rollup, ["Period_Start", "Period_End"])
+        self.write_sheet(sheet_name, df_rollup)
+
+    def write_scenario_report(self, df_scenario_bands):
+        """Write the monte carlo scenario bands to Google Sheets"""
+        df_scenario_bands = format_money_columns(
+            df_scenario_bands,
+            [column for column in df_scenario_bands.columns if column[0] == "P"],
+        )
+        df_scenario_bands = format_date_columns(df_scenario_bands, ["Date"])
+        self.write_sheet("Scenario_Report", df_scenario_bands)
+
+    def write_debt_payoff_report(self, df_debt_payoff):
+        """Write the debt payoff strategy comparison to Google Sheets"""
+        df_debt_payoff = format_money_columns(
+            df_debt_payoff, ["Starting_Balance", "Total_Interest", "Total_Paid"]
         )
-        print_logger("Daily balance report updated successfully.")
+        self.write_sheet("Debt_Payoff_Report", df_debt_payoff)
+
+    def write_spending_suggestions_report(self, df_suggestions):
+        """Write the rule amounts suggested by actual spend to Google Sheets"""
+        df_suggestions = format_money_columns(
+            df_suggestions,
+            [
+                "Amount",
+                "Suggested_Amount",
+                "AverageMonthlyCost",
+                "Suggested_AverageMonthlyCost",
+            ],
+        )
+        self.write_sheet("Spending_Suggestions_Report", df_suggestions)
+
+    def write_alert_rules_report(self, df_alerts):
+        """Write the evaluated alert rules to Google Sheets"""
+        df_alerts = format_money_columns(df_alerts, ["Threshold"])
+        df_alerts = format_date_columns(
+            df_alerts, ["First_Crossing_Date", "Recovery_Date"]
+        )
+        self.write_sheet("Alert_Rules_Report", df_alerts)
 
     def write_sheets_summary_page(
         self, df_future_cast_alert_dates, df_future_cast_label_dates
     ):
         """Write the summary page to Google Sheets"""
-        sheet_summary = get_book_sheet("Our_Cash", "Summary")
+        if self.report_sink is not None:
+            self.report_sink.submit(
+                "Summary",
+                "summary_page",
+                df_future_cast_alert_dates=df_future_cast_alert_dates,
+                df_future_cast_label_dates=df_future_cast_label_dates,
+            )
+            print_logger("Summary page queued for writing.")
+            return
+
+        self._write_sheets_summary_page_now(
+            df_future_cast_alert_dates, df_future_cast_label_dates
+        )
+
+    def _write_sheets_summary_page_now(
+        self, df_future_cast_alert_dates, df_future_cast_label_dates
+    ):
+        sheet_summary = call_with_backoff(get_book_sheet, self.book_name, "Summary")
 
         # Clear existing data
-        clear_range_of_sheet_obj(sheet_obj=sheet_summary, start="A11", end="B41")
-        clear_range_of_sheet_obj(sheet_obj=sheet_summary, start="A44", end="C74")
+        call_with_backoff(
+            clear_range_of_sheet_obj, sheet_obj=sheet_summary, start="A11", end="B41"
+        )
+        call_with_backoff(
+            clear_range_of_sheet_obj, sheet_obj=sheet_summary, start="A44", end="C74"
+        )
 
         # Write alert dates
-        write_df_to_range_of_sheet_obj(
+        call_with_backoff(
+            write_df_to_range_of_sheet_obj,
             sheet_obj=sheet_summary,
-            df=df_future_cast_alert_dates.head(30),
+            df=format_date_columns(
+                format_money_columns(
+                    df_future_cast_alert_dates.head(30), ["Running_Balance"]
+                ),
+                ["Date"],
+            ),
             start="A11",
             fit=False,
             copy_head=True,
         )
 
         # Write one-time transactions
-        write_df_to_range_of_sheet_obj(
+        call_with_backoff(
+            write_df_to_range_of_sheet_obj,
             sheet_obj=sheet_summary,
-            df=df_future_cast_label_dates.head(30),
+            df=format_date_columns(
+                format_money_columns(
+                    df_future_cast_label_dates.head(30), ["Label_Amount"]
+                ),
+                ["Date"],
+            ),
             start="A44",
             fit=False,
             copy_head=True,
@@ -344,15 +695,182 @@ class SheetsStorage:
 # %%
 
 
+class ExcelStorage(SheetsStorage):
+    """SheetsStorage over a local copy of the Our_Cash workbook
+
+    The getters, writers, caching and write-behind of SheetsStorage are
+    shared, only fetching and writing a tab go to the .xlsx file instead of
+    Google.
+    """
+
+    SUMMARY_SHEET_NAME = "Summary_Report"
+
+    def __init__(self, file_path, write_behind=False, **kwargs):
+        self.file_path = file_path
+        super().__init__(write_behind=write_behind, **kwargs)
+
+    def get_journal_target(self) -> tuple:
+        return ("excel", os.path.abspath(self.file_path))
+
+    def fetch_sheet_df(
+        self,
+        sheet_name,
+        ls_columns=None,
+        ls_typed_columns=(),
+        ls_date_columns=(),
+        min_date_column=None,
+        min_date=None,
+    ) -> pd.DataFrame:
+        """Read the given columns of a tab, from min_date on if given
+
+        Cells are read as display strings, the getters parse them the same
+        way as the formatted values of the Google tabs.
+        """
+        df = read_excel_sheet(self.file_path, sheet_name, ls_columns)
+        if min_date is not None:
+            dates = to_dates(df[min_date_column], errors="coerce")
+            df = df[dates >= pd.Timestamp(min_date)].reset_index(drop=True)
+        return df
+
+    def _get_sheet_data(self, key, sheet_name, force_update=False) -> pd.DataFrame:
+        if key in self._dict_sheets_dfs and not force_update:
+            return get_frame_view(self._dict_sheets_dfs[key])
+
+        df = self._fetch_sheet_data(key, sheet_name)
+        self._set_sheet_df(key, df)
+        return get_frame_view(df)
+
+    async def _get_sheet_data_async(
+        self, key, sheet_name, force_update=False
+    ) -> pd.DataFrame:
+        return await asyncio.to_thread(
+            self._get_sheet_data, key, sheet_name, force_update
+        )
+
+    def get_book_modified_time(self):
+        return os.path.getmtime(self.file_path)
+
+    def _write_sheet_now(self, sheet_name, df):
+        write_excel_sheet(self.file_path, sheet_name, get_rows_from_df(df))
+        print_logger(f"{sheet_name} updated successfully.")
+
+    def _write_sheets_summary_page_now(
+        self, df_future_cast_alert_dates, df_future_cast_label_dates
+    ):
+        """Alert and one-time dates stacked on their own tab
+
+        The Google Summary tab is a hand laid out page the tables are pasted
+        into, the workbook gets a plain tab instead.
+        """
+        ls_rows = (
+            [["Alert Dates"]]
+            + get_rows_from_df(
+                format_date_columns(
+                    format_money_columns(
+                        df_future_cast_alert_dates.head(30), ["Running_Balance"]
+                    ),
+                    ["Date"],
+                )
+            )
+            + [[], ["One Time Transactions"]]
+            + get_rows_from_df(
+                format_date_columns(
+                    format_money_columns(
+                        df_future_cast_label_dates.head(30), ["Label_Amount"]
+                    ),
+                    ["Date"],
+                )
+            )
+        )
+        write_excel_sheet(self.file_path, self.SUMMARY_SHEET_NAME, ls_rows)
+        print_logger("Summary page updated successfully.")
+
+
+# %%
+
+
 class OurCashData:
     """Handles cash flow analysis and business logic"""
 
-    def __init__(self, sheets_storage: Optional[SheetsStorage] = None):
+    def __init__(
+        self,
+        sheets_storage: Optional[SheetsStorage] = None,
+        num_days=365 * 2,
+        result_cache: Optional[ResultCache] = None,
+        business_calendar: Optional[BusinessCalendar] = None,
+        forecast_history: Optional[ForecastHistory] = None,
+        spending_history: Optional[SpendingHistory] = None,
+        auto_amounts=False,
+        num_scenarios=DEFAULT_NUM_SCENARIOS,
+        scenario_max_workers: Optional[int] = None,
+    ):
         self.sheets_storage = sheets_storage or SheetsStorage()
-        self.THRESHOLD_FOR_ALERT = 1000
-        self.NUM_DAYS = 365 * 2
+        # local history the forecast runs are recorded to, the default if None
+        self.forecast_history = forecast_history
+        # bank holidays and weekends the recurrence rules roll occurrences off
+        self.business_calendar = business_calendar
+        # results of the forecast APIs keyed by their typed inputs and as-of date
+        self.result_cache = result_cache
+        # actual monthly spend from bank statements, suggests rule amounts and
+        # when auto_amounts is set replaces them in the forecast
+        self.spending_history = spending_history
+        self.auto_amounts = auto_amounts
+        # perturbed forecasts behind the scenario report, 0 leaves it out
+        self.num_scenarios = num_scenarios
+        # processes the scenarios are split over, 1 keeps them in this process
+        self.scenario_max_workers = scenario_max_workers
+        # derived results kept until a tab they depend on is refreshed
+        self.memo_graph = MemoGraph()
+        self.register_memo_nodes()
+        self.sheets_storage.add_refresh_listener(self.memo_graph.invalidate)
+        if self.spending_history is not None:
+            self.spending_history.add_refresh_listener(self.memo_graph.invalidate)
+        # amounts are carried as int64 cents, the threshold is $1000
+        self.THRESHOLD_FOR_ALERT = 1000 * CENTS_PER_UNIT
+        self.NUM_DAYS = num_days
+
+    def register_memo_nodes(self):
+        """Derived results memoized until one of their source tabs refreshes"""
+        self.memo_graph.register(
+            "income_expense",
+            self._get_income_expense_df,
+            ls_sources=["income_expense_df", "spending_history"],
+        )
+        self.memo_graph.register(
+            "emergency_fund_amount",
+            self._get_emergency_fund_amount,
+            ls_nodes=["income_expense"],
+        )
+        self.memo_graph.register(
+            "current_balance",
+            self._get_current_balance,
+            ls_sources=["account_balances"],
+        )
+        self.memo_graph.register(
+            "balance_pivot",
+            self._get_balance_pivot,
+            ls_sources=["account_balances"],
+        )
+        self.memo_graph.register(
+            "account_balances_with_details_filled",
+            self._get_account_balances_with_details_filled,
+            ls_sources=["account_details"],
+            ls_nodes=["balance_pivot"],
+        )
+        self.memo_graph.register(
+            "account_balances_with_details_filled_grouped",
+            self._get_account_balances_with_details_filled_grouped,
+            ls_nodes=["account_balances_with_details_filled"],
+        )
+        self.memo_graph.register(
+            "account_balances_report",
+            self._get_account_balances_report,
+            ls_sources=["account_details"],
+            ls_nodes=["balance_pivot"],
+        )
 
-    def get_account_balances_with_details_filled(self):
+    def _get_balance_pivot(self) -> pd.DataFrame:
+        """Balance of each account by date, carried forward across dates"""
         df_pivot: pd.DataFrame = self.sheets_storage.get_account_balances()
 
         df_pivot = df_pivot.pivot(
@@ -361,7 +879,13 @@ class OurCashData:
         df_pivot = df_pivot.sort_index()
 
         # Forward fill missing values for each account
-        df_pivot = df_pivot.ffill()
+        return df_pivot.ffill()
+
+    def get_account_balances_with_details_filled(self):
+        return self.memo_graph.get("account_balances_with_details_filled")
+
+    def _get_account_balances_with_details_filled(self):
+        df_pivot = self.memo_graph.get("balance_pivot")
         df_pivot["Total"] = df_pivot.sum(axis=1)
 
         # Unpivot the DataFrame back to the original format
@@ -384,23 +908,34 @@ class OurCashData:
         return df_pivot
 
     def generate_account_balances_report(self):
-        df_pivot: pd.DataFrame = self.sheets_storage.get_account_balances()
+        return self.memo_graph.get("account_balances_report")
+
+    def _get_account_balances_report(self):
+        if self.result_cache is not None:
+            return self.result_cache.get_or_compute(
+                "account_balances_report",
+                {
+                    "account_balances": self.sheets_storage.get_account_balances(),
+                    "account_details": self.sheets_storage.get_account_details(),
+                },
+                self._generate_account_balances_report,
+            )
+        return self._generate_account_balances_report()
 
+    def _generate_account_balances_report(self):
         # Merge back with the original DataFrame to include the Sub_Category
         df_account_details: pd.DataFrame = self.sheets_storage.get_account_details()
         df_account_details = df_account_details[
             ["Account_Name", "Category", "Sub_Category"]
         ]
 
-        df_pivot = df_pivot.pivot(
-            index="Date", columns="Account_Name", values="Balance"
-        )
-        df_pivot = df_pivot.reset_index()
+        df_pivot = self.memo_graph.get("balance_pivot").reset_index()
 
-        # Forward fill missing values for each account
-        df_pivot = df_pivot.ffill()
         # fillna with 0
         df_pivot = df_pivot.fillna(0)
+        # the pivot introduces NaNs, back to dense int64 cents once filled
+        ls_account_cols = [col for col in df_pivot.columns if col != "Date"]
+        df_pivot[ls_account_cols] = df_pivot[ls_account_cols].astype("int64")
 
         # for each category, add a column with sum of columns that are in that category
         for category in df_account_details["Category"].unique():
@@ -433,14 +968,16 @@ class OurCashData:
 
     def write_account_balances_report(self, df_pivot):
         """Write the account balances report to Google Sheets"""
-        WriteToSheets(
-            "Our_Cash",
-            "Account_Balances_Report",
-            df_pivot,
+        df_pivot = format_money_columns(
+            df_pivot, [col for col in df_pivot.columns if col != "Date"]
         )
-        print_logger("Account balances report updated successfully.")
+        df_pivot = format_date_columns(df_pivot, ["Date"])
+        self.sheets_storage.write_sheet("Account_Balances_Report", df_pivot)
 
     def get_account_balances_with_details_filled_grouped(self) -> pd.DataFrame:
+        return self.memo_graph.get("account_balances_with_details_filled_grouped")
+
+    def _get_account_balances_with_details_filled_grouped(self) -> pd.DataFrame:
         df_pivot = self.get_account_balances_with_details_filled()
 
         df_grouped = (
@@ -452,6 +989,9 @@ class OurCashData:
         return df_grouped
 
     def get_current_balance(self, account_name):
+        return self.memo_graph.get("current_balance", account_name=account_name)
+
+    def _get_current_balance(self, account_name):
         df_current_balance = self.sheets_storage.get_account_balances()
 
         df_current_balance = df_current_balance[
@@ -464,94 +1004,45 @@ class OurCashData:
 
         return df_current_balance["Balance"].iloc[0]
 
-    def get_emergency_fund_amount(self):
-        df_income_expense_emergency_fund = self.sheets_storage.get_income_expense_df()
-
-        df_income_expense_emergency_fund = df_income_expense_emergency_fund[
-            (df_income_expense_emergency_fund["Priority"] == 1)
-        ]
-        return df_income_expense_emergency_fund["AverageMonthlyCost"].sum() * 6
-
-    def get_oncely_transactions_for_date(self, date):
-        df_oncely_transactions = self.sheets_storage.get_oncely_transactions()
-
-        df_oncely_transactions = df_oncely_transactions[
-            (df_oncely_transactions["Maturity Date"] > date)
-            & (df_oncely_transactions["Date"] == pd.to_datetime(date))
-        ]
-
-        return df_oncely_transactions
-
-    def get_yearly_transactions_for_date(self, date):
-        day_of_month = pd.to_datetime(date).day
-        month_of_year = pd.to_datetime(date).month
-        df_yearly_transactions = self.sheets_storage.get_yearly_transactions()
-
-        df_yearly_transactions = df_yearly_transactions[
-            (df_yearly_transactions["Maturity Date"] > date)
-            & (df_yearly_transactions["Month_Number"] == month_of_year)
-            & (df_yearly_transactions["Day_Of_Month"] == day_of_month)
-        ]
-
-        return df_yearly_transactions
+    def generate_spending_suggestions(self, as_of=None) -> pd.DataFrame:
+        """Rule amounts suggested by the actual spend in the spending history"""
+        return suggest_income_expense_amounts(
+            self.sheets_storage.get_income_expense_df(),
+            self.spending_history.get_monthly_spend(),
+            as_of,
+        )
 
-    def get_monthly_transactions_for_date(self, date):
-        day_of_month = pd.to_datetime(date).day
-        df_monthly_transactions = self.sheets_storage.get_monthly_transactions()
+    def get_income_expense_df(self, as_of=None) -> pd.DataFrame:
+        """Income_Expense the forecast runs on, with automatic amounts if set"""
+        return self.memo_graph.get("income_expense", as_of=to_as_of_date(as_of))
 
-        df_monthly_transactions = df_monthly_transactions[
-            (df_monthly_transactions["Maturity Date"] > date)
-            & (df_monthly_transactions["Day_Of_Month"] == day_of_month)
-        ]
-        return df_monthly_transactions
-
-    def get_bi_weekly_transactions_for_date(self, date):
-        df_bi_weekly_transactions = self.sheets_storage.get_bi_weekly_transactions()
-
-        df_bi_weekly_transactions = df_bi_weekly_transactions[
-            (df_bi_weekly_transactions["Maturity Date"] > date)
-            & (
-                (
-                    pd.to_datetime(date) - df_bi_weekly_transactions["An_Occur_Date"]
-                ).dt.days
-                % 14
-                == 0
-            )
-        ]
+    def _get_income_expense_df(self, as_of) -> pd.DataFrame:
+        df_income_expense = self.sheets_storage.get_income_expense_df()
+        if self.spending_history is None or not self.auto_amounts:
+            return df_income_expense
+        return apply_suggested_amounts(
+            df_income_expense, self.generate_spending_suggestions(as_of)
+        )
 
-        return df_bi_weekly_transactions
+    def get_emergency_fund_amount(self):
+        return self.memo_graph.get("emergency_fund_amount", as_of=to_as_of_date())
 
-    def get_every_x_days_transactions_for_date(self, date):
-        df_every_x_days_transactions = (
-            self.sheets_storage.get_every_x_days_transactions()
-        )
+    def _get_emergency_fund_amount(self, as_of):
+        df_income_expense_emergency_fund = self.get_income_expense_df(as_of)
 
-        df_every_x_days_transactions = df_every_x_days_transactions[
-            (df_every_x_days_transactions["Maturity Date"] > date)
-            & (
-                (
-                    pd.to_datetime(date) - df_every_x_days_transactions["An_Occur_Date"]
-                ).dt.days
-                % df_every_x_days_transactions["AfterDays"]
-                == 0
-            )
+        df_income_expense_emergency_fund = df_income_expense_emergency_fund[
+            (df_income_expense_emergency_fund["Priority"] == 1)
         ]
+        return df_income_expense_emergency_fund["AverageMonthlyCost"].sum() * 6
 
-        return df_every_x_days_transactions
+    def get_business_calendar(self) -> BusinessCalendar:
+        """Calendar the rules roll on, the bank holiday calendar if none given"""
+        return self.business_calendar or get_default_business_calendar()
 
-    def get_all_transactions_for_date(self, date):
-        df_all_transactions = pd.concat(
-            [
-                self.get_oncely_transactions_for_date(date),
-                self.get_yearly_transactions_for_date(date),
-                self.get_monthly_transactions_for_date(date),
-                self.get_bi_weekly_transactions_for_date(date),
-                self.get_every_x_days_transactions_for_date(date),
-            ]
-        )
-        return df_all_transactions
-
-    def get_expected_transactions_for_date_range(self, num_days_back, num_days_forward):
+    def get_expected_transactions_for_date_range(
+        self, num_days_back, num_days_forward, as_of=None
+    ):
+        """Every occurrence of the Income_Expense rules around the as-of date"""
         ls_columns = [
             "Date",
             "Category",
@@ -561,224 +1052,420 @@ class OurCashData:
             "Amount",
             "Amount_Paid",
             "Date_Paid",
+            "Occurrence_ID",
         ]
+        as_of = to_as_of_date(as_of)
 
-        df_recent_transactions = pd.DataFrame(columns=ls_columns)
+        df_recent_transactions = generate_occurrences(
+            self.get_income_expense_df(as_of),
+            start=as_of - pd.Timedelta(days=num_days_back),
+            end=as_of + pd.Timedelta(days=num_days_forward),
+            business_calendar=self.get_business_calendar(),
+        )
+        df_recent_transactions = df_recent_transactions[
+            df_recent_transactions["Maturity Date"] > df_recent_transactions["Date"]
+        ]
+        df_recent_transactions = df_recent_transactions.reindex(
+            columns=ls_columns
+        ).reset_index(drop=True)
 
-        iterator = tqdm(
-            range(0, num_days_back + 1 + num_days_forward),
-            desc="Fetching transactions for date range",
-            total=num_days_back + 1 + num_days_forward,
+        # expected transactions are unpaid, amounts stay dense int64 cents
+        df_recent_transactions["Amount"] = df_recent_transactions["Amount"].astype(
+            "int64"
         )
+        df_recent_transactions["Amount_Paid"] = (
+            df_recent_transactions["Amount_Paid"].fillna(0).astype("int64")
+        )
+        df_recent_transactions["Date_Paid"] = df_recent_transactions[
+            "Date_Paid"
+        ].fillna("")
 
-        for i in iterator:
-            # start num_days ago
-            date = (
-                pd.to_datetime("today") - pd.Timedelta(days=num_days_back - i)
-            ).date()
-            df_all_transactions_for_date = self.get_all_transactions_for_date(date)
-            df_all_transactions_for_date["Date"] = date
+        return df_recent_transactions
 
-            df_recent_transactions = pd.concat(
-                [df_recent_transactions, df_all_transactions_for_date],
-                ignore_index=True,
+    def update_transactions(self, num_days_forward=None, as_of=None):
+        """Forecast of transactions and running balance from the as-of date"""
+        if num_days_forward is None:
+            num_days_forward = self.NUM_DAYS
+        as_of = to_as_of_date(as_of)
+        # the transactions report is refreshed for the rows paid since, a
+        # seeded storage already holds the tabs its caller just fetched
+        force_update = not self.sheets_storage.is_seeded
+        if self.result_cache is None:
+            return self._update_transactions(
+                num_days_forward, as_of, force_update=force_update
             )
 
-            df_recent_transactions = df_recent_transactions[ls_columns]
+        # refreshed first so the key sees paid rows
+        df_transactions_report = self.sheets_storage.get_transactions_report(
+            force_update=force_update
+        )
+        return self.result_cache.get_or_compute(
+            "forecast",
+            {
+                "income_expense": self.get_income_expense_df(as_of),
+                "account_balances": self.sheets_storage.get_account_balances(),
+                "transactions_report": df_transactions_report,
+            },
+            lambda: self._update_transactions(
+                num_days_forward, as_of, force_update=False
+            ),
+            as_of=as_of,
+            num_days_forward=num_days_forward,
+            business_calendar=self.get_business_calendar().get_hash(),
+        )
 
-        return df_recent_transactions
+    def get_cached_forecast(self, as_of) -> Optional[pd.DataFrame]:
+        """Last forecast computed for a past as-of date, None if never cached"""
+        if self.result_cache is None:
+            return None
+        return self.result_cache.get_as_of("forecast", to_as_of_date(as_of))
 
-    def update_transactions(self):
+    def _update_transactions(self, num_days_forward, as_of, force_update=True):
         num_days_back = 5
-        num_days_forward = self.NUM_DAYS
 
         current_balance = self.get_current_balance("Chase Checking")
-        print(f"current_balance of Chase Checking: {current_balance}")
+        print(
+            f"current_balance of Chase Checking: {current_balance / CENTS_PER_UNIT:.2f}"
+        )
 
         df_existing_data_from_sheets = self.sheets_storage.get_transactions_report(
-            force_update=True
+            force_update=force_update
         ).fillna(0)
         df_existing_data_from_sheets["Running_Balance"] = 0
 
-        # keep only paid transactions or transactions before today
+        # keep only paid transactions or transactions before the as-of date
         df_existing_data_from_sheets = df_existing_data_from_sheets[
-            (
-                (df_existing_data_from_sheets["Amount_Paid"] != "")
-                & (df_existing_data_from_sheets["Amount_Paid"] != 0)
-                & (df_existing_data_from_sheets["Amount_Paid"] != "0")
-            )  # Paid transactions
+            (df_existing_data_from_sheets["Amount_Paid"] != 0)  # Paid transactions
             | (
-                (
-                    pd.to_datetime("today")
-                    - pd.to_datetime(df_existing_data_from_sheets["Date"])
-                ).dt.days
-                > 0
-            )  # Transactions before today
+                df_existing_data_from_sheets["Date"] < as_of
+            )  # Transactions before the as-of date
         ]
 
         # get transactions expected in the next num_days_forward days since num_days_back
         df_updated_transactions = self.get_expected_transactions_for_date_range(
-            num_days_back, num_days_forward
+            num_days_back, num_days_forward, as_of=as_of
         )
 
-        # add the transactions from the past, paid, and expected to a dataframe
-        df_updated_transactions = pd.concat(
-            [df_existing_data_from_sheets, df_updated_transactions], ignore_index=True
+        df_existing_data_from_sheets = self.assign_missing_occurrence_ids(
+            df_existing_data_from_sheets, df_updated_transactions
         )
 
-        # drop duplicates keeping the first occurrence which would be the existing data if not future
-        df_updated_transactions = df_updated_transactions.drop_duplicates(
-            subset=["Date", "Account_Name"],
-            keep="first",
+        # upsert on the occurrence id, rows kept from the sheet replace the
+        # regenerated occurrence they were edited from
+        is_kept = df_updated_transactions["Occurrence_ID"].isin(
+            df_existing_data_from_sheets["Occurrence_ID"]
+        )
+        df_updated_transactions = pd.concat(
+            [df_existing_data_from_sheets, df_updated_transactions[~is_kept]],
+            ignore_index=True,
         )
 
         # sort by date and amount so that expenses for a day come first in that day
         df_updated_transactions = df_updated_transactions.sort_values(
-            by=["Date", "Amount"], ascending=True
+            by=["Date", "Amount"], ascending=True, kind="stable"
         )
 
-        # for each row after today, add the previous row's Running_Balance to the current row's amount,
-        # only for days less than 10 days ago and only if the "Paid" column is ""
-        previous_balance = current_balance
-        for index, row in df_updated_transactions.iterrows():
-            # if not paid and after 10 days ago
-            if row["Date_Paid"] == "" or pd.isna(row["Date_Paid"]):
-                df_updated_transactions.at[index, "Running_Balance"] = (
-                    previous_balance + row["Amount"]
-                )
-                previous_balance = df_updated_transactions.at[index, "Running_Balance"]
-            else:
-                df_updated_transactions.at[index, "Running_Balance"] = previous_balance
+        # unpaid rows add their amount to the running balance, paid rows are already
+        # part of the current balance and carry the previous balance forward
+        unpaid = df_updated_transactions["Date_Paid"].fillna("") == ""
+        df_updated_transactions["Running_Balance"] = (
+            current_balance
+            + df_updated_transactions["Amount"].where(unpaid, 0).cumsum()
+        )
 
         return df_updated_transactions
 
-    def isolate_label_dates(self, df_future_cast):
-        df_future_cast_label_dates = df_future_cast.copy()
+    def assign_missing_occurrence_ids(self, df_existing, df_expected):
+        """Occurrence ids for report rows written before ids, by date and account
 
-        df_future_cast_label_dates = df_future_cast_label_dates[
-            df_future_cast_label_dates["Type"] == "oncely"
-        ]
-        df_future_cast_label_dates = df_future_cast_label_dates.rename(
-            columns={"Amount": "Label_Amount", "Account_Name": "Label_Item"}
+        Rows without a matching occurrence, added by hand, keep a blank id.
+        """
+        is_missing = df_existing["Occurrence_ID"] == ""
+        if not is_missing.any():
+            return df_existing
+
+        df_ids = df_expected[["Date", "Account_Name", "Occurrence_ID"]].drop_duplicates(
+            subset=["Date", "Account_Name"]
         )
-        df_future_cast_label_dates = df_future_cast_label_dates[
-            ["Date", "Label_Item", "Label_Amount"]
-        ]
+        df_missing = df_existing.loc[is_missing, ["Date", "Account_Name"]].merge(
+            df_ids, how="left", on=["Date", "Account_Name"]
+        )
+        df_existing = df_existing.copy()
+        df_existing.loc[is_missing, "Occurrence_ID"] = (
+            df_missing["Occurrence_ID"].fillna("").to_numpy()
+        )
+        return df_existing
+
+    def build_forecast_reports(self, df_future_cast, as_of=None) -> dict:
+        """End of day balances, label, alert and daily balance frames together
 
-        return df_future_cast_label_dates
+        One pass over the forecast shared by every report, use this over the
+        single report methods when more than one of them is needed.
+        """
+        return build_forecast_reports(
+            df_future_cast,
+            to_as_of_date(as_of),
+            self.THRESHOLD_FOR_ALERT,
+            self.get_emergency_fund_amount(),
+        )
+
+    def isolate_label_dates(self, df_future_cast):
+        return get_label_dates_df(get_forecast_arrays(df_future_cast))
 
     def isolate_ending_daily_balance(self, df_future_cast):
-        df_future_cast_end_of_each_day = df_future_cast.copy()
+        return get_end_of_day_df(get_forecast_arrays(df_future_cast))
 
-        df_future_cast_end_of_each_day = df_future_cast_end_of_each_day[
-            [
-                "Date",
-                "Running_Balance",
-            ]
-        ]
-        df_future_cast_end_of_each_day = df_future_cast_end_of_each_day.drop_duplicates(
-            subset=["Date"], keep="last"
+    def get_balance_series(self, df_future_cast) -> BalanceSeries:
+        """Forecast end of day balance as change points, expand with to_dense"""
+        return BalanceSeries.from_balances(df_future_cast)
+
+    def generate_future_cast_alert_dates_df(self, df_future_cast, as_of=None):
+        return get_alert_dates_df(
+            self.isolate_ending_daily_balance(df_future_cast),
+            to_as_of_date(as_of),
+            self.THRESHOLD_FOR_ALERT,
         )
 
-        return df_future_cast_end_of_each_day
+    def get_default_alert_rules(self, account_name="Chase Checking"):
+        """Alert rules used when no Alert_Rules tab is given"""
+        emergency_fund_amount = self.get_emergency_fund_amount()
 
-    def generate_future_cast_alert_dates_df(self, df_future_cast):
-        df_future_cast_alert_dates = self.isolate_ending_daily_balance(df_future_cast)
+        df_alert_rules = pd.DataFrame(
+            {
+                "Rule_Name": [
+                    "Below_Alert_Threshold",
+                    "Overdraft",
+                    "Below_Emergency_Fund",
+                    "Drop_Of_A_Month_Of_Costs_Over_30_Days",
+                ],
+                "Account_Name": account_name,
+                "Rule_Type": [
+                    "min_balance",
+                    "min_balance",
+                    "emergency_fund",
+                    "drop_over_days",
+                ],
+                "Threshold": [
+                    self.THRESHOLD_FOR_ALERT,
+                    0,
+                    emergency_fund_amount,
+                    emergency_fund_amount // 6,
+                ],
+                "Window_Days": [0, 0, 0, 30],
+            }
+        )
 
-        df_future_cast_alert_dates = df_future_cast_alert_dates[
-            df_future_cast_alert_dates["Running_Balance"] < self.THRESHOLD_FOR_ALERT
-        ]
+        return df_alert_rules
 
-        # date is after ten days ago
-        df_future_cast_alert_dates = df_future_cast_alert_dates[
-            (
-                pd.to_datetime("today")
-                - pd.to_datetime(df_future_cast_alert_dates["Date"])
-            ).dt.days
-            <= 1
-        ]
+    def evaluate_alert_rules(
+        self, df_future_cast, df_alert_rules=None, as_of=None, df_end_of_day=None
+    ):
+        """First crossing date and duration of each alert rule over the forecast
 
-        df_future_cast_alert_dates = df_future_cast_alert_dates[
-            ["Date", "Running_Balance"]
-        ]
+        df_end_of_day, the end of day balances from build_forecast_reports,
+        saves finding them again.
+        """
+        if df_alert_rules is None:
+            df_alert_rules = self.get_default_alert_rules()
+
+        # emergency fund rules without a threshold use the computed fund amount
+        missing_threshold = (df_alert_rules["Rule_Type"] == "emergency_fund") & (
+            df_alert_rules["Threshold"].isna()
+        )
+        if missing_threshold.any():
+            df_alert_rules = df_alert_rules.copy()
+            df_alert_rules.loc[missing_threshold, "Threshold"] = (
+                self.get_emergency_fund_amount()
+            )
 
-        return df_future_cast_alert_dates
+        # the forecast running balance is the balance of the checking account
+        if df_end_of_day is None:
+            df_end_of_day = self.isolate_ending_daily_balance(df_future_cast)
+        df_daily_balances = df_end_of_day.rename(columns={"Running_Balance": "Balance"})
+        df_daily_balances["Account_Name"] = "Chase Checking"
 
-    def generate_daily_balance_report(self, df_future_cast):
-        df_future_cast_end_of_each_day = self.isolate_ending_daily_balance(
-            df_future_cast
+        df_alerts = evaluate_alert_rules(
+            df_alert_rules,
+            df_daily_balances,
+            start_date=to_as_of_date(as_of),
         )
 
-        df_future_cast_label_dates = self.isolate_label_dates(df_future_cast)
+        return df_alerts
+
+    def generate_daily_balance_report(self, df_future_cast, as_of=None):
+        df_end_of_day = self.isolate_ending_daily_balance(df_future_cast)
+        df_label_dates = self.isolate_label_dates(df_future_cast)
 
-        df_future_cast_end_of_each_day = pd.merge(
-            df_future_cast_end_of_each_day,
-            df_future_cast_label_dates,
-            how="left",
-            on="Date",
+        return get_daily_balance_df(
+            df_end_of_day,
+            df_label_dates,
+            to_as_of_date(as_of),
+            self.THRESHOLD_FOR_ALERT,
+            self.get_emergency_fund_amount(),
         )
 
-        df_future_cast_end_of_each_day["Label_Item"] = df_future_cast_end_of_each_day[
-            "Label_Item"
-        ].fillna("")
+    def generate_scenario_report(
+        self, df_future_cast, num_scenarios=None, seed=None, **kwargs
+    ):
+        """Percentile bands of perturbed forecasts around the deterministic one"""
+        if num_scenarios is None:
+            num_scenarios = self.num_scenarios
+        kwargs.setdefault("max_workers", self.scenario_max_workers)
+        current_balance = self.get_current_balance("Chase Checking")
 
-        emergency_fund_amount = self.get_emergency_fund_amount()
-        df_future_cast_end_of_each_day["Emergency_Fund_Amount"] = (
-            emergency_fund_amount * -1
+        df_scenario_bands = run_monte_carlo(
+            df_future_cast,
+            starting_balance=current_balance,
+            threshold=self.THRESHOLD_FOR_ALERT,
+            num_days=self.NUM_DAYS + 1,
+            num_scenarios=num_scenarios,
+            seed=seed,
+            **kwargs,
         )
-        df_future_cast_end_of_each_day["Alert_Threshold"] = self.THRESHOLD_FOR_ALERT
-        df_future_cast_end_of_each_day["Zero"] = 0
 
-        df_future_cast_end_of_each_day["Date"] = pd.to_datetime(
-            df_future_cast_end_of_each_day["Date"]
+        return df_scenario_bands
+
+    def generate_debt_payoff_report(self, extra_monthly_payment=0, strategies=None):
+        """Payoff dates and total interest of every debt for each strategy"""
+        df_debts = get_debt_accounts(self.sheets_storage.get_income_expense_df())
+
+        df_debt_payoff = generate_debt_payoff_df(
+            df_debts,
+            extra_monthly_payment=extra_monthly_payment,
+            strategies=strategies,
         )
 
-        # date is after ten days ago
-        df_future_cast_end_of_each_day = df_future_cast_end_of_each_day[
-            (
-                pd.to_datetime("today")
-                - pd.to_datetime(df_future_cast_end_of_each_day["Date"])
-            ).dt.days
-            <= 10
-        ]
+        return df_debt_payoff
 
-        return df_future_cast_end_of_each_day
+    def get_report_start(self, as_of=None) -> pd.Timestamp:
+        """First day the balance reports cover, a few days before the as-of"""
+        return to_as_of_date(as_of) - pd.Timedelta(days=DAILY_BALANCE_DAYS_BACK)
 
+    def generate_forecast_rollups(self, df_future_cast, as_of=None):
+        """Weekly, monthly and yearly rollups of the forecast keyed by freq
 
-# %%
-# Run #
+        The rollups cover the same days as the daily balance report, the
+        Transactions_Report history before them is left out.
+        """
+        current_balance = self.get_current_balance("Chase Checking")
 
+        dict_rollups = compute_forecast_rollups(
+            df_future_cast,
+            starting_balance=current_balance,
+            min_date=self.get_report_start(as_of),
+        )
 
-if __name__ == "__main__":
-    # define instances of classes
-    sheets_storage = SheetsStorage()
-    our_cash_data = OurCashData(sheets_storage)
-
-    # update all data from sheets
-    sheets_storage.update_income_expense_from_sheets()
-    sheets_storage.update_account_balances_from_sheets()
-    sheets_storage.update_account_details_from_sheets()
-    sheets_storage.update_transactions_report_from_sheets()
-    df_pivot = our_cash_data.generate_account_balances_report()
+        return dict_rollups
+
+    def record_forecast_run(self, df_future_cast, forecast_history=None) -> int:
+        """Append the forecast to the local history so runs can be diffed"""
+        forecast_history = (
+            forecast_history or self.forecast_history or ForecastHistory()
+        )
+        run_id = forecast_history.append_run(
+            df_future_cast,
+            starting_balance=self.get_current_balance("Chase Checking"),
+        )
+
+        return run_id
+
+    def get_balance_report_freq(self, as_of=None):
+        """Resolution the balance report should be written at for this horizon
+
+        Only the report window counts, from the report start to NUM_DAYS
+        after the as-of date, however much history the forecast carries.
+        """
+        return get_report_freq(
+            self.get_report_start(as_of),
+            to_as_of_date(as_of) + pd.Timedelta(days=self.NUM_DAYS),
+        )
 
-    # run future forecast
+
+# %%
+# Functions: Outputs #
+
+
+def write_forecast_outputs(sheets_storage, our_cash_data):
+    """Run the forecast and write every report computed from it"""
     df_future_cast = our_cash_data.update_transactions()
+    our_cash_data.record_forecast_run(df_future_cast)
 
-    # write outputs
     sheets_storage.write_transaction_report(df_future_cast)
-    df_daily_balance_report = our_cash_data.generate_daily_balance_report(
-        df_future_cast
+    dict_reports = our_cash_data.build_forecast_reports(df_future_cast)
+    report_freq = our_cash_data.get_balance_report_freq()
+    if report_freq == "D":
+        sheets_storage.write_daily_balance_report(dict_reports["daily_balance"])
+    else:
+        # long horizons are written at a coarser resolution to bound the sheet
+        dict_rollups = our_cash_data.generate_forecast_rollups(df_future_cast)
+        sheets_storage.write_balance_rollup_report(
+            dict_rollups[report_freq], report_freq
+        )
+    if our_cash_data.num_scenarios > 0:
+        df_scenario_bands = our_cash_data.generate_scenario_report(df_future_cast)
+        sheets_storage.write_scenario_report(df_scenario_bands)
+    df_alerts = our_cash_data.evaluate_alert_rules(
+        df_future_cast, df_end_of_day=dict_reports["end_of_day"]
     )
-    sheets_storage.write_daily_balance_report(df_daily_balance_report)
-    df_future_cast_label_dates = our_cash_data.isolate_label_dates(df_future_cast)
-    df_future_cast_alert_dates = our_cash_data.generate_future_cast_alert_dates_df(
-        df_future_cast
+    sheets_storage.write_alert_rules_report(df_alerts)
+    sheets_storage.write_sheets_summary_page(
+        dict_reports["alert_dates"], dict_reports["label_dates"]
     )
+
+
+def write_account_balances_outputs(sheets_storage, our_cash_data):
+    df_pivot = our_cash_data.generate_account_balances_report()
     our_cash_data.write_account_balances_report(df_pivot)
-    sheets_storage.write_sheets_summary_page(
-        df_future_cast_alert_dates, df_future_cast_label_dates
+
+
+def write_debt_payoff_outputs(sheets_storage, our_cash_data):
+    df_debt_payoff = our_cash_data.generate_debt_payoff_report()
+    sheets_storage.write_debt_payoff_report(df_debt_payoff)
+
+
+def write_spending_outputs(sheets_storage, our_cash_data):
+    df_suggestions = our_cash_data.generate_spending_suggestions()
+    sheets_storage.write_spending_suggestions_report(df_suggestions)
+
+
+# %%
+# Run #
+
+
+if __name__ == "__main__":
+    enable_copy_on_write()
+    # define instances of classes, an offline workbook replaces Google if given
+    if os.getenv("OUR_CASH_XLSX_PATH"):
+        sheets_storage = ExcelStorage(
+            os.getenv("OUR_CASH_XLSX_PATH"), write_behind=True
+        )
+    else:
+        sheets_storage = SheetsStorage(write_behind=True)
+    our_cash_data = OurCashData(
+        sheets_storage,
+        num_days=int(os.getenv("FORECAST_NUM_DAYS", 365 * 2)),
+        result_cache=ResultCache(),
+        # statements are added to the history by running spending_analytics
+        spending_history=(
+            SpendingHistory() if os.path.exists(SPENDING_HISTORY_DIR) else None
+        ),
+        auto_amounts=os.getenv("AUTO_SPENDING_AMOUNTS") == "1",
+        num_scenarios=int(os.getenv("FORECAST_NUM_SCENARIOS", DEFAULT_NUM_SCENARIOS)),
     )
 
+    # update all data from sheets, the tabs are fetched concurrently
+    asyncio.run(sheets_storage.refresh_from_sheets_async())
+
+    # run future forecast and write outputs
+    write_forecast_outputs(sheets_storage, our_cash_data)
+    write_account_balances_outputs(sheets_storage, our_cash_data)
+    write_debt_payoff_outputs(sheets_storage, our_cash_data)
+    if our_cash_data.spending_history is not None:
+        write_spending_outputs(sheets_storage, our_cash_data)
+
+    # wait for the queued report writes to reach Google
+    sheets_storage.close()
+
     # log done message
     print_logger("Done")
 
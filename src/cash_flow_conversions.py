@@ -1,44 +1,138 @@
 # %%
 # Running Imports #
 
+import numpy as np
 import pandas as pd
 
-from data_storage import SheetsStorage
-from readable_utils.display_tools import pprint_df, print_logger  # noqa F401
+from date_parsing import parse_dates
+
+# %%
+# Vars #
+
+CENTS_PER_UNIT = 100
+SHEETS_DATE_FORMAT = "%Y-%m-%d"
+
+
+# %%
+# Functions: Money #
+
+
+def to_cents(values) -> pd.Series:
+    """Parse sheet amounts like "1,234.50", "$-12", "(12.00)" or "" into int64 cents
+
+    Blank cells are 0, anything else that is not a number raises a ValueError
+    rather than dropping out of the forecast.
+    """
+    if np.isscalar(values) or values is None:
+        return to_cents(pd.Series([values], dtype=object)).iloc[0]
+
+    series = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series):
+        numbers = series.astype(float)
+    else:
+        text = series.astype(object).where(series.notna(), "").astype(str).str.strip()
+        # accounting style negatives, (12.00) means -12.00
+        negative = text.str.startswith("(") & text.str.endswith(")")
+        text = text.str.replace(r"[$,()\s]", "", regex=True)
+        text = text.where(~negative, "-" + text)
+        is_blank = text == ""
+        numbers = pd.to_numeric(text.where(~is_blank, "0"), errors="coerce")
+        is_malformed = numbers.isna()
+        if is_malformed.any():
+            raise ValueError(
+                f"Amounts that are not numbers: {series[is_malformed].unique().tolist()}"
+            )
+
+    return (
+        (numbers.fillna(0) * CENTS_PER_UNIT)
+        .round()
+        .astype(np.int64)
+        .set_axis(series.index)
+    )
+
+
+def format_money_columns(df, ls_columns) -> pd.DataFrame:
+    """Copy of df with the given cents columns converted to decimal amounts"""
+    df = df.copy()
+    for column in ls_columns:
+        if column in df.columns:
+            df[column] = (df[column].astype(float) / CENTS_PER_UNIT).round(2)
+    return df
+
+
+# %%
+# Functions: Dates #
+
+
+def to_dates(values, format=None, errors="raise") -> pd.Series:
+    """Parse sheet dates into datetime64 normalized to midnight
+
+    Goes through the shared parser, so each distinct date is parsed once.
+    """
+    return parse_dates(values, format=format, errors=errors)
+
+
+def to_as_of_date(as_of=None) -> pd.Timestamp:
+    """The as-of date a forecast is computed for, today when not given"""
+    if as_of is None:
+        as_of = "today"
+    return pd.Timestamp(as_of).normalize()
+
+
+def format_date_columns(df, ls_columns) -> pd.DataFrame:
+    """Copy of df with the given datetime64 columns as sheet date strings"""
+    df = df.copy()
+    for column in ls_columns:
+        if column in df.columns:
+            df[column] = (
+                pd.to_datetime(df[column]).dt.strftime(SHEETS_DATE_FORMAT).fillna("")
+            )
+    return df
+
 
 # %%
 # Main #
 
 if __name__ == "__main__":
-    # Create instance of SheetsStorage
-    ss = SheetsStorage()
+    df_example = pd.DataFrame(
+        {
+            "Date": to_dates(["1/2/2030", "1/15/2030", ""], format="%m/%d/%Y"),
+            "Amount": to_cents(["1,234.50", "(12.00)", ""]),
+        }
+    )
+    print(df_example.dtypes)
+    print(format_money_columns(format_date_columns(df_example, ["Date"]), ["Amount"]))
+
+    # data_storage imports this module, so the getters it drives come in here
+    import data_storage
+    from readable_utils.display_tools import pprint_df, print_logger
 
     # Test individual getter methods
-    df_monthly = ss.get_monthly_budgets(force_update=False)
+    df_monthly = data_storage.get_monthly_budgets()
     print_logger("Monthly Budgets:")
     pprint_df(df_monthly.head())
 
-    df_yearly = ss.get_yearly_budgets(force_update=False)
+    df_yearly = data_storage.get_yearly_budgets()
     print_logger("Yearly Budgets:")
     pprint_df(df_yearly.head())
 
-    df_one_time = ss.get_one_time_budgets(force_update=False)
+    df_one_time = data_storage.get_one_time_budgets()
     print_logger("One Time Budgets:")
     pprint_df(df_one_time.head())
 
-    df_bi_weekly = ss.get_bi_weekly_budgets(force_update=False)
+    df_bi_weekly = data_storage.get_bi_weekly_budgets()
     print_logger("Bi-Weekly Budgets:")
     pprint_df(df_bi_weekly.head(50))
 
-    df_calendar = ss.get_full_calendar()
+    df_calendar = data_storage.get_full_calendar()
     print_logger("Full Calendar:")
     pprint_df(df_calendar.head())
 
     # Test the main planned budgets method
-    df_planned = ss.get_planned_budgets(force_update=False)
+    df_planned = data_storage.get_planned_budgets(force_update=False)
 
-    start_print_date = pd.to_datetime("2025-10-01").date()
-    end_print_date = pd.to_datetime("2025-10-31").date()
+    start_print_date = pd.Timestamp("2025-10-01")
+    end_print_date = pd.Timestamp("2025-10-31")
 
     print_logger("Planned Budgets for October 2025:")
     pprint_df(
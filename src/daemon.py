@@ -0,0 +1,181 @@
+# %%
+# Running Imports #
+
+import asyncio
+import os
+import signal
+import threading
+
+import pandas as pd
+
+# %%
+# Vars #
+
+DEFAULT_POLL_SECONDS = 60
+# source sheets each output is computed from
+DICT_OUTPUT_INPUTS = {
+    "forecast": ["income_expense_df", "account_balances", "transactions_report"],
+    "account_balances_report": ["account_balances", "account_details"],
+    "debt_payoff": ["income_expense_df"],
+}
+# outputs that also move with the calendar, they are stale once the day rolls over
+LS_DATED_OUTPUTS = ["forecast"]
+# source sheets an output writes back to, refetched after it runs
+DICT_OUTPUT_WRITES_SOURCES = {
+    "forecast": ["transactions_report"],
+}
+
+
+# %%
+# Class: Watch Daemon #
+
+
+class WatchDaemon:
+    """Keeps the storage warm and recomputes only outputs whose inputs changed
+
+    Each poll first asks for the modified time of the book, a single metadata
+    call. Only when it moved are the source tabs fetched and hashed, and only
+    outputs reading a tab whose hash changed are recomputed and written. When
+    nothing changed a poll costs one API call and no computation.
+    """
+
+    def __init__(
+        self,
+        sheets_storage,
+        dict_output_runners,
+        poll_seconds=DEFAULT_POLL_SECONDS,
+        dict_output_inputs=DICT_OUTPUT_INPUTS,
+        ls_dated_outputs=LS_DATED_OUTPUTS,
+        dict_output_writes_sources=DICT_OUTPUT_WRITES_SOURCES,
+    ):
+        self.sheets_storage = sheets_storage
+        self.dict_output_runners = dict_output_runners
+        self.poll_seconds = poll_seconds
+        self.dict_output_inputs = dict_output_inputs
+        self.ls_dated_outputs = ls_dated_outputs
+        self.dict_output_writes_sources = dict_output_writes_sources
+        self.modified_time = None
+        self.dict_source_hashes = {}
+        self.run_date = None
+        self.last_error = None
+        self._stopped = threading.Event()
+
+    def _refresh_sources(self, ls_keys=None):
+        asyncio.run(self.sheets_storage.refresh_from_sheets_async(ls_keys))
+
+    def poll_changed_sources(self) -> set:
+        """Source keys whose content changed since the last poll"""
+        modified_time = self.sheets_storage.get_book_modified_time()
+        if modified_time is not None and modified_time == self.modified_time:
+            return set()
+
+        self._refresh_sources()
+        dict_source_hashes = self.sheets_storage.get_source_hashes()
+        set_changed = {
+            key
+            for key, source_hash in dict_source_hashes.items()
+            if self.dict_source_hashes.get(key) != source_hash
+        }
+        self.dict_source_hashes = dict_source_hashes
+        self.modified_time = modified_time
+        return set_changed
+
+    def get_stale_outputs(self, set_changed_sources) -> list:
+        today = pd.Timestamp("today").normalize()
+        date_rolled = self.run_date is not None and today != self.run_date
+        return [
+            output_name
+            for output_name in self.dict_output_runners
+            if set_changed_sources & set(self.dict_output_inputs[output_name])
+            or (date_rolled and output_name in self.ls_dated_outputs)
+        ]
+
+    def run_once(self) -> list:
+        """Poll once and recompute the stale outputs, returning their names"""
+        ls_stale_outputs = self.get_stale_outputs(self.poll_changed_sources())
+        self.run_date = pd.Timestamp("today").normalize()
+        if not ls_stale_outputs:
+            return []
+
+        print(f"Recomputing outputs: {', '.join(ls_stale_outputs)}")
+        for output_name in ls_stale_outputs:
+            self.dict_output_runners[output_name]()
+        self.sheets_storage.flush_writes()
+
+        # take in our own writes so they are not seen as edits on the next poll,
+        # the modified time is left as is and the next poll re-baselines it
+        ls_written_sources = sorted(
+            {
+                key
+                for output_name in ls_stale_outputs
+                for key in self.dict_output_writes_sources.get(output_name, [])
+            }
+        )
+        if ls_written_sources:
+            self._refresh_sources(ls_written_sources)
+            dict_source_hashes = self.sheets_storage.get_source_hashes()
+            for key in ls_written_sources:
+                self.dict_source_hashes[key] = dict_source_hashes[key]
+
+        return ls_stale_outputs
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as error:
+                # keep the warm state and try again on the next poll
+                print(f"Watch poll failed: {error!r}")
+                self.last_error = repr(error)
+            self._stopped.wait(timeout=self.poll_seconds)
+
+    def stop(self):
+        self._stopped.set()
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    from cash_flow_commander import (
+        OurCashData,
+        SheetsStorage,
+        write_account_balances_outputs,
+        write_debt_payoff_outputs,
+        write_forecast_outputs,
+    )
+    from frame_cache import enable_copy_on_write
+    from monte_carlo import DEFAULT_NUM_SCENARIOS
+    from result_cache import ResultCache
+
+    enable_copy_on_write()
+    sheets_storage = SheetsStorage(write_behind=True)
+    our_cash_data = OurCashData(
+        sheets_storage,
+        num_days=int(os.getenv("FORECAST_NUM_DAYS", 365 * 2)),
+        result_cache=ResultCache(),
+        num_scenarios=int(os.getenv("FORECAST_NUM_SCENARIOS", DEFAULT_NUM_SCENARIOS)),
+        # the poll thread keeps running, no process pool is forked under it
+        scenario_max_workers=1,
+    )
+    watch_daemon = WatchDaemon(
+        sheets_storage,
+        {
+            "forecast": lambda: write_forecast_outputs(sheets_storage, our_cash_data),
+            "account_balances_report": lambda: write_account_balances_outputs(
+                sheets_storage, our_cash_data
+            ),
+            "debt_payoff": lambda: write_debt_payoff_outputs(
+                sheets_storage, our_cash_data
+            ),
+        },
+        poll_seconds=int(os.getenv("WATCH_POLL_SECONDS", DEFAULT_POLL_SECONDS)),
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: watch_daemon.stop())
+    try:
+        watch_daemon.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sheets_storage.close()
@@ -7,7 +7,10 @@ import warnings
 import pandas as pd
 from dotenv import load_dotenv
 
+from cash_flow_conversions import format_date_columns, to_dates
 from config import parent_dir
+from date_parsing import DICT_WHEN_FORMATS
+from frame_cache import get_frame_view
 from readable_utils.display_tools import pprint_df, print_logger  # noqa F401
 from readable_utils.google_tools import WriteToSheets, get_book_sheet_df
 
@@ -61,7 +64,7 @@ end_date_cal = "2100-12-31"
 def get_full_calendar():
     key = "full_calendar"
     if key in _dict_sheets_dfs.keys():
-        return _dict_sheets_dfs[key].copy()
+        return get_frame_view(_dict_sheets_dfs[key])
 
     # create a calendar that is mergable from 2000 to 2100
     df_calendar = pd.DataFrame(
@@ -74,9 +77,6 @@ def get_full_calendar():
     df_calendar["Day_of_Month"] = df_calendar["Date"].dt.day
     df_calendar["Day_of_Week"] = df_calendar["Date"].dt.dayofweek
 
-    # convert date to date not datetime
-    df_calendar["Date"] = df_calendar["Date"].dt.date
-
     df_calendar = df_calendar[
         ["Date", "Year", "Month_of_Year", "Day_of_Month", "Day_of_Week"]
     ]
@@ -91,11 +91,11 @@ def get_full_calendar():
 def _get_sheet_data(key, sheet_name, force_update=False) -> pd.DataFrame:
     """Generic method to fetch and cache sheet data"""
     if key in _dict_sheets_dfs and not force_update:
-        return _dict_sheets_dfs[key].copy()
+        return get_frame_view(_dict_sheets_dfs[key])
 
     df = get_book_sheet_df("Our_Cash", sheet_name)
-    _dict_sheets_dfs[key] = df.copy()
-    return df.copy()
+    _dict_sheets_dfs[key] = df
+    return get_frame_view(df)
 
 
 def get_income_expense_df(force_update=False):
@@ -113,49 +113,42 @@ def get_income_expense_df(force_update=False):
         }
     )
 
-    df_income_expense["Amount"] = df_income_expense["Amount"].astype(float)
-    df_income_expense["Start_Date"] = pd.to_datetime(
-        df_income_expense["Start_Date"]
-    ).dt.date
-    df_income_expense["Maturity_Date"] = pd.to_datetime(
-        df_income_expense["Maturity_Date"]
-    ).dt.date
-    df_income_expense["AfterDays"] = df_income_expense["AfterDays"].astype(int)
-    df_income_expense["Auto_Pay_Amount"] = df_income_expense["Auto_Pay_Amount"].astype(
-        str
-    )
-    df_income_expense["AverageMonthlyCost"] = df_income_expense[
-        "AverageMonthlyCost"
-    ].astype(float)
-    df_income_expense["Balance"] = (
-        df_income_expense["Balance"].replace("", 0).astype(float)
-    )
-    df_income_expense["Limit"] = df_income_expense["Limit"].replace("", 0).astype(float)
-    df_income_expense["Available Credit"] = (
-        df_income_expense["Available Credit"].replace("", 0).astype(float)
-    )
-    df_income_expense["Interest Rate"] = (
-        df_income_expense["Interest Rate"]
-        .str.replace("%", "")
-        .replace("", 0)
-        .astype(float)
-    ) / 100  # Convert percentage to decimal
-    df_income_expense["Monthly Interest Incurred"] = (
-        df_income_expense["Monthly Interest Incurred"].replace("", 0).astype(float)
-    )
-    df_income_expense["Payoff Order"] = (
-        df_income_expense["Payoff Order"].replace("", 0).astype(int)
-    )
-    df_income_expense["Priority"] = (
-        df_income_expense["Priority"].replace("", 0).astype(int)
+    df_income_expense = df_income_expense.assign(
+        **{
+            "Amount": df_income_expense["Amount"].astype(float),
+            "Start_Date": to_dates(df_income_expense["Start_Date"]),
+            "Maturity_Date": to_dates(df_income_expense["Maturity_Date"]),
+            "AfterDays": df_income_expense["AfterDays"].astype(int),
+            "Auto_Pay_Amount": df_income_expense["Auto_Pay_Amount"].astype(str),
+            "AverageMonthlyCost": df_income_expense["AverageMonthlyCost"].astype(float),
+            "Balance": df_income_expense["Balance"].replace("", 0).astype(float),
+            "Limit": df_income_expense["Limit"].replace("", 0).astype(float),
+            "Available Credit": (
+                df_income_expense["Available Credit"].replace("", 0).astype(float)
+            ),
+            "Interest Rate": (
+                df_income_expense["Interest Rate"]
+                .str.replace("%", "")
+                .replace("", 0)
+                .astype(float)
+            )
+            / 100,  # Convert percentage to decimal
+            "Monthly Interest Incurred": (
+                df_income_expense["Monthly Interest Incurred"]
+                .replace("", 0)
+                .astype(float)
+            ),
+            "Payoff Order": (
+                df_income_expense["Payoff Order"].replace("", 0).astype(int)
+            ),
+            "Priority": df_income_expense["Priority"].replace("", 0).astype(int),
+            "Account_Name": df_income_expense["Account_Name"].astype(str),
+            "Category": df_income_expense["Category"].astype(str),
+            "Sub_Category": df_income_expense["Sub_Category"].astype(str),
+            "Type": df_income_expense["Type"].astype(str),
+            "Auto_Pay_Account": df_income_expense["Auto_Pay_Account"].astype(str),
+        }
     )
-    df_income_expense["Account_Name"] = df_income_expense["Account_Name"].astype(str)
-    df_income_expense["Category"] = df_income_expense["Category"].astype(str)
-    df_income_expense["Sub_Category"] = df_income_expense["Sub_Category"].astype(str)
-    df_income_expense["Type"] = df_income_expense["Type"].astype(str)
-    df_income_expense["Auto_Pay_Account"] = df_income_expense[
-        "Auto_Pay_Account"
-    ].astype(str)
 
     # only useable columns
     df_income_expense = df_income_expense[useable_cols]
@@ -203,11 +196,10 @@ def get_yearly_budgets():
     df = df.rename(columns={"When": "Month_Day_Num"})
 
     # convert 31-Dec to datetime and extract month and day
-    df["Month_Day_Num"] = pd.to_datetime(
-        df["Month_Day_Num"], format="%d-%b"
-    ).dt.dayofyear
-    df["Month_of_Year"] = pd.to_datetime(df["Month_Day_Num"], format="%j").dt.month
-    df["Day_of_Month"] = pd.to_datetime(df["Month_Day_Num"], format="%j").dt.day
+    month_days = to_dates(df["Month_Day_Num"], format=DICT_WHEN_FORMATS["yearly"])
+    df["Month_Day_Num"] = month_days.dt.dayofyear
+    df["Month_of_Year"] = month_days.dt.month
+    df["Day_of_Month"] = month_days.dt.day
 
     # monthofyear to int
     df["Month_of_Year"] = df["Month_of_Year"].astype(int)
@@ -238,7 +230,7 @@ def get_one_time_budgets():
     df = df.rename(columns={"When": "Date"})
 
     # convert Date to datetime
-    df["Date"] = pd.to_datetime(df["Date"]).dt.date
+    df["Date"] = to_dates(df["Date"])
 
     df = df[
         [
@@ -264,7 +256,7 @@ def get_bi_weekly_budgets():
     df = df.rename(columns={"When": "Occur_Date"})
 
     # convert Occur_Date to datetime
-    df["Occur_Date"] = pd.to_datetime(df["Occur_Date"]).dt.date
+    df["Occur_Date"] = to_dates(df["Occur_Date"])
 
     df = df[
         [
@@ -284,27 +276,23 @@ def get_bi_weekly_budgets_occurances():
     df = get_bi_weekly_budgets()
 
     # populate date for range starting from start_date to end_date with bi-weekly frequency
-    list_rows = []
+    list_dfs = []
     for _, row in df.iterrows():
-        start_date = min(
-            pd.to_datetime(row["Occur_Date"]).date(),
-            pd.to_datetime(start_date_cal).date(),
-        )
-        current_date = start_date
-        while current_date <= pd.to_datetime(end_date_cal).date():
-            list_rows.append(
+        start_date = min(row["Occur_Date"], pd.Timestamp(start_date_cal))
+        list_dfs.append(
+            pd.DataFrame(
                 {
                     "Type": row["Type"],
                     "Account_Name": row["Account_Name"],
-                    "Date": current_date,
+                    "Date": pd.date_range(start_date, end_date_cal, freq="14D"),
                     "Start_Date": row["Start_Date"],
                     "Maturity_Date": row["Maturity_Date"],
                     "Amount": row["Amount"],
                 }
             )
-            current_date += pd.Timedelta(weeks=2)
+        )
 
-    df = pd.DataFrame(list_rows)
+    df = pd.concat(list_dfs, ignore_index=True)
 
     # sort by date
     df = df.sort_values(by=["Date"])
@@ -316,10 +304,20 @@ def get_bi_weekly_budgets_occurances():
 # Functions: All Budget Types #
 
 
-def get_planned_budgets(force_update=False):
+def get_planned_budgets(force_update=False, result_cache=None):
     if force_update:
         get_income_expense_df(force_update=True)
+    if result_cache is not None:
+        # the budgets only depend on the typed Income_Expense tab
+        return result_cache.get_or_compute(
+            "planned_budgets",
+            {"income_expense": get_income_expense_df()},
+            _get_planned_budgets,
+        )
+    return _get_planned_budgets()
 
+
+def _get_planned_budgets():
     df_monthly = get_monthly_budgets()
     print_logger("Monthly Budgets Retrieved")
 
@@ -335,19 +333,21 @@ def get_planned_budgets(force_update=False):
     df_calendar = get_full_calendar()
     print_logger("Full Calendar Retrieved")
 
+    # inner merges keep only the calendar days a budget falls on, a left merge
+    # would hold a row for every day of the calendar per budget type
     # merge monthly on dayofmonth
-    df_monthly = df_calendar.merge(df_monthly, how="left", on="Day_of_Month")
+    df_monthly = df_calendar.merge(df_monthly, how="inner", on="Day_of_Month")
 
     # merge yearly on monthofyear and dayofmonth
     df_yearly = df_calendar.merge(
-        df_yearly, how="left", on=["Month_of_Year", "Day_of_Month"]
+        df_yearly, how="inner", on=["Month_of_Year", "Day_of_Month"]
     )
 
     # merge one_time on date
-    df_one_time = df_calendar.merge(df_one_time, how="left", on="Date")
+    df_one_time = df_calendar.merge(df_one_time, how="inner", on="Date")
 
     # merge bi_weekly on date
-    df_bi_weekly = df_calendar.merge(df_bi_weekly, how="left", on="Date")
+    df_bi_weekly = df_calendar.merge(df_bi_weekly, how="inner", on="Date")
 
     df_calendar = pd.concat(
         [
@@ -364,13 +364,10 @@ def get_planned_budgets(force_update=False):
 
     # take out rows where date is not between start_date and Maturity_Date
     df_calendar = df_calendar[
-        (df_calendar["Date"] >= pd.to_datetime(df_calendar["Start_Date"]).dt.date)
+        (df_calendar["Date"] >= df_calendar["Start_Date"])
         & (
             (df_calendar["Maturity_Date"].isna())
-            | (
-                df_calendar["Date"]
-                <= pd.to_datetime(df_calendar["Maturity_Date"]).dt.date
-            )
+            | (df_calendar["Date"] <= df_calendar["Maturity_Date"])
         )
     ]
 
@@ -391,6 +388,13 @@ def load_tran_types_to_sheets(force_update=False):
     df_one_time = get_one_time_budgets()
     df_bi_weekly = get_bi_weekly_budgets()
 
+    # dates are written to sheets as plain date strings
+    ls_date_cols = ["Date", "Occur_Date", "Start_Date", "Maturity_Date"]
+    df_monthly = format_date_columns(df_monthly, ls_date_cols)
+    df_yearly = format_date_columns(df_yearly, ls_date_cols)
+    df_one_time = format_date_columns(df_one_time, ls_date_cols)
+    df_bi_weekly = format_date_columns(df_bi_weekly, ls_date_cols)
+
     # write to sheets
     WriteToSheets(
         "Our_Cash",
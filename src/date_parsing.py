@@ -0,0 +1,133 @@
+# %%
+# Running Imports #
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# %%
+# Vars #
+
+# parsed dates kept across refreshes, a few decades of days per format
+MAX_CACHED_DATES = 100_000
+# formats of the date columns whose layout is known, columns not listed
+# here are parsed with the format pandas infers from their first value
+DICT_DATE_FORMATS = {
+    # Chase CSV exports
+    "Transaction Date": "%m/%d/%Y",
+    "Post Date": "%m/%d/%Y",
+    "Posting Date": "%m/%d/%Y",
+    # Discover CSV exports
+    "Trans. Date": "%m/%d/%Y",
+}
+# formats of the Income_Expense When column by rule type
+DICT_WHEN_FORMATS = {
+    "oncely": "%m/%d/%Y",
+    "yearly": "%d-%b",
+    "biweekly": "%m/%d/%Y",
+    "everyXDays": "%m/%d/%Y",
+}
+
+
+# %%
+# Class #
+
+
+class DateParser:
+    """Parses each distinct date string once and remembers it
+
+    A column is factorized into its unique values, only the values not seen
+    before are handed to pd.to_datetime, and the parsed dates are broadcast
+    back through the codes. Parsed values stay in an LRU cache keyed by
+    format, so refreshing a tab only parses the dates that are new.
+    """
+
+    def __init__(self, max_size=MAX_CACHED_DATES):
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.num_parsed = 0
+
+    def _parse_uniques(self, uniques, format, errors) -> np.ndarray:
+        parsed = np.empty(len(uniques), dtype="datetime64[ns]")
+        ls_missing = []
+        with self._lock:
+            for idx, value in enumerate(uniques):
+                key = (format, value)
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    parsed[idx] = self._cache[key]
+                else:
+                    ls_missing.append(idx)
+        if not ls_missing:
+            return parsed
+
+        missing_values = uniques[ls_missing]
+        missing_dates = (
+            pd.to_datetime(pd.Series(missing_values), format=format, errors=errors)
+            .dt.normalize()
+            .to_numpy()
+        )
+        parsed[ls_missing] = missing_dates
+
+        with self._lock:
+            self.num_parsed += len(ls_missing)
+            for value, date in zip(missing_values, missing_dates):
+                # a coerced failure may still raise when parsed strictly later
+                if errors == "raise" or not np.isnat(date):
+                    self._cache[(format, value)] = date
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return parsed
+
+    def parse(self, values, format=None, errors="raise") -> pd.Series:
+        """Parse sheet dates into datetime64 normalized to midnight"""
+        series = pd.Series(values)
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series.dt.normalize()
+
+        codes, uniques = pd.factorize(series)
+        parsed = self._parse_uniques(np.asarray(uniques, dtype=object), format, errors)
+        # code -1 marks missing values, it picks the NaT appended at the end
+        dates = np.append(parsed, np.datetime64("NaT", "ns"))[codes]
+        return pd.Series(dates, index=series.index, name=series.name)
+
+    def parse_date(self, value, format=None) -> pd.Timestamp:
+        """Parse a single date through the same cache"""
+        return pd.Timestamp(self.parse([value], format=format).iloc[0])
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+# %%
+# Functions #
+
+DATE_PARSER = DateParser()
+
+
+def parse_dates(values, format=None, errors="raise") -> pd.Series:
+    """Parse dates with the shared parser"""
+    return DATE_PARSER.parse(values, format=format, errors=errors)
+
+
+def parse_date(value, format=None) -> pd.Timestamp:
+    """Parse a single date with the shared parser"""
+    return DATE_PARSER.parse_date(value, format=format)
+
+
+def parse_date_columns(df, dict_formats=DICT_DATE_FORMATS) -> pd.DataFrame:
+    """Copy of df with the columns of known format parsed to dates"""
+    return df.assign(
+        **{
+            column: parse_dates(df[column], format=format)
+            for column, format in dict_formats.items()
+            if column in df.columns
+        }
+    )
+
+
+# %%
@@ -0,0 +1,224 @@
+# %%
+# Running Imports #
+
+import numpy as np
+import pandas as pd
+
+# %%
+# Vars #
+
+STRATEGIES = ["payoff_order", "snowball", "avalanche"]
+MAX_MONTHS = 12 * 30
+# amounts are int64 cents, anything under half a cent is paid off
+PAID_OFF_TOLERANCE = 0.5
+
+
+# %%
+# Functions: Accounts #
+
+
+def get_debt_accounts(df_income_expense) -> pd.DataFrame:
+    """Debt rows of Income_Expense with the columns the simulator needs"""
+    df_debts = df_income_expense[df_income_expense["Balance"] > 0]
+
+    df_debts = pd.DataFrame(
+        {
+            "Account_Name": df_debts["Account_Name"].to_numpy(),
+            "Balance": df_debts["Balance"].to_numpy(dtype="int64"),
+            "Interest_Rate": df_debts["Interest Rate"].to_numpy(dtype=float),
+            # monthly payment rules are entered as negative amounts
+            "Minimum_Payment": df_debts["Amount"].abs().to_numpy(dtype="int64"),
+            "Payoff_Order": df_debts["Payoff Order"].to_numpy(dtype=int),
+        }
+    )
+
+    return df_debts
+
+
+def get_strategy_orders(df_debts, strategies) -> np.ndarray:
+    """(strategies x accounts) array of account indexes in payoff priority"""
+    num_accounts = len(df_debts)
+    # accounts without a payoff order go last
+    payoff_order = np.where(
+        df_debts["Payoff_Order"] > 0, df_debts["Payoff_Order"], num_accounts + 1
+    )
+
+    dict_sort_keys = {
+        "payoff_order": payoff_order,
+        "snowball": df_debts["Balance"].to_numpy(),
+        "avalanche": -df_debts["Interest_Rate"].to_numpy(),
+    }
+
+    orders = np.empty((len(strategies), num_accounts), dtype=np.int64)
+    for i, strategy in enumerate(strategies):
+        if strategy not in dict_sort_keys:
+            raise ValueError(
+                f"Unknown payoff strategy {strategy}, expected one of {STRATEGIES}"
+            )
+        orders[i] = np.argsort(dict_sort_keys[strategy], kind="stable")
+
+    return orders
+
+
+# %%
+# Functions: Simulation #
+
+
+def simulate_debt_payoff(
+    df_debts,
+    extra_monthly_payment=0.0,
+    strategies=None,
+    max_months=MAX_MONTHS,
+):
+    """Amortize every debt month by month for each strategy at once
+
+    The monthly budget is the sum of all minimum payments plus the extra
+    payment. Minimums freed up by paid off accounts roll into the surplus,
+    which is allocated to accounts in the strategy's priority order.
+    """
+    strategies = strategies or STRATEGIES
+    orders = get_strategy_orders(df_debts, strategies)
+    num_strategies, num_accounts = orders.shape
+
+    monthly_rates = df_debts["Interest_Rate"].to_numpy(dtype=float) / 12
+    minimums = df_debts["Minimum_Payment"].to_numpy(dtype=float)
+    monthly_budget = minimums.sum() + extra_monthly_payment
+
+    balances = np.tile(df_debts["Balance"].to_numpy(dtype=float), (num_strategies, 1))
+    total_interest = np.zeros_like(balances)
+    total_paid = np.zeros_like(balances)
+    payoff_months = np.full(balances.shape, -1, dtype=np.int64)
+    history = np.zeros((max_months, num_strategies, num_accounts))
+
+    num_months = 0
+    for month in range(max_months):
+        interest = balances * monthly_rates
+        balances = balances + interest
+        total_interest += interest
+
+        minimum_paid = np.minimum(minimums, balances)
+        balances = balances - minimum_paid
+
+        # surplus goes to the highest priority accounts first
+        surplus = np.maximum(monthly_budget - minimum_paid.sum(axis=1), 0)
+        balances_sorted = np.take_along_axis(balances, orders, axis=1)
+        owed_before = np.cumsum(balances_sorted, axis=1) - balances_sorted
+        extra_sorted = np.clip(surplus[:, None] - owed_before, 0, balances_sorted)
+        extra_paid = np.empty_like(extra_sorted)
+        np.put_along_axis(extra_paid, orders, extra_sorted, axis=1)
+        balances = balances - extra_paid
+
+        total_paid += minimum_paid + extra_paid
+        balances[balances < PAID_OFF_TOLERANCE] = 0
+        payoff_months[(balances == 0) & (payoff_months < 0)] = month + 1
+        history[month] = balances
+
+        num_months = month + 1
+        if not balances.any():
+            break
+
+    return {
+        "strategies": strategies,
+        "payoff_months": payoff_months,
+        "total_interest": total_interest,
+        "total_paid": total_paid,
+        "history": history[:num_months],
+    }
+
+
+# %%
+# Functions: Reports #
+
+
+def generate_debt_payoff_df(
+    df_debts,
+    start_date=None,
+    extra_monthly_payment=0.0,
+    strategies=None,
+    max_months=MAX_MONTHS,
+) -> pd.DataFrame:
+    """One row per strategy and account with payoff date and total interest"""
+    if start_date is None:
+        start_date = pd.to_datetime("today")
+    # payments start on the first of next month
+    first_month = pd.to_datetime(start_date).to_period("M") + 1
+
+    results = simulate_debt_payoff(
+        df_debts,
+        extra_monthly_payment=extra_monthly_payment,
+        strategies=strategies,
+        max_months=max_months,
+    )
+    num_strategies = len(results["strategies"])
+    num_accounts = len(df_debts)
+
+    payoff_months = results["payoff_months"].ravel()
+    paid_off = payoff_months > 0
+    # accounts are paid off at the end of their last payment month
+    payoff_dates = (
+        pd.PeriodIndex.from_ordinals(first_month.ordinal + payoff_months - 1, freq="M")
+        .to_timestamp(how="end")
+        .normalize()
+        .where(paid_off)
+    )
+
+    df_payoff = pd.DataFrame(
+        {
+            "Strategy": np.repeat(results["strategies"], num_accounts),
+            "Account_Name": np.tile(
+                df_debts["Account_Name"].to_numpy(), num_strategies
+            ),
+            "Starting_Balance": np.tile(df_debts["Balance"].to_numpy(), num_strategies),
+            "Interest_Rate": np.tile(
+                df_debts["Interest_Rate"].to_numpy(), num_strategies
+            ),
+            "Months_To_Payoff": np.where(paid_off, payoff_months, np.nan),
+            "Payoff_Date": payoff_dates,
+            "Total_Interest": np.rint(results["total_interest"].ravel()).astype(
+                np.int64
+            ),
+            "Total_Paid": np.rint(results["total_paid"].ravel()).astype(np.int64),
+        }
+    )
+
+    return df_payoff
+
+
+def summarize_debt_payoff_df(df_payoff) -> pd.DataFrame:
+    """Debt free date and total interest for each strategy"""
+    df_summary = (
+        df_payoff.groupby("Strategy", sort=False)
+        .agg(
+            Debt_Free_Date=(
+                "Payoff_Date",
+                lambda x: x.max() if x.notna().all() else pd.NaT,
+            ),
+            Total_Interest=("Total_Interest", "sum"),
+            Total_Paid=("Total_Paid", "sum"),
+        )
+        .reset_index()
+    )
+    df_summary = df_summary.sort_values(by=["Total_Interest"]).reset_index(drop=True)
+
+    return df_summary
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    df_example_debts = pd.DataFrame(
+        {
+            "Account_Name": ["Card A", "Card B", "Car Loan"],
+            "Balance": [420000, 150000, 900000],
+            "Interest_Rate": [0.229, 0.18, 0.065],
+            "Minimum_Payment": [15000, 6000, 32000],
+            "Payoff_Order": [2, 3, 1],
+        }
+    )
+    df_payoff = generate_debt_payoff_df(df_example_debts, extra_monthly_payment=20000)
+    print(df_payoff)
+    print(summarize_debt_payoff_df(df_payoff))
+
+
+# %%
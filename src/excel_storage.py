@@ -0,0 +1,333 @@
+# %%
+# Running Imports #
+
+import datetime
+import numbers
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+import pandas as pd
+
+from sheet_ranges import get_column_letter
+
+# %%
+# Vars #
+
+# Excel limits a tab name to 31 characters
+MAX_SHEET_NAME_LENGTH = 31
+WORKSHEET_CONTENT_TYPE = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+)
+WORKSHEET_REL_TYPE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+)
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+OFFICE_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+# characters XML 1.0 does not allow in text
+ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# date parts of an Excel number format, longest first so yyyy wins over yy
+EXCEL_DATE_TOKENS = re.compile(r"yyyy|yy|mmmm|mmm|mm|m|dddd|ddd|dd|d", re.IGNORECASE)
+# locale and color codes like [$-409] or [Red] and the escapes around literals
+EXCEL_FORMAT_NOISE = re.compile(r'\[[^\]]*\]|\\|"')
+
+
+# %%
+# Functions: Reading #
+
+
+def format_excel_date(value, number_format):
+    """A date as its number format displays it, like 13-Jul for d-mmm
+
+    None when the format is not a plain date format, times of day included.
+    """
+    date_format = EXCEL_FORMAT_NOISE.sub("", number_format.split(";")[0])
+    if re.search(r"[hs]", date_format, re.IGNORECASE) or not (
+        EXCEL_DATE_TOKENS.search(date_format)
+    ):
+        return None
+
+    dict_parts = {
+        "yyyy": f"{value.year}",
+        "yy": f"{value.year % 100:02d}",
+        "mmmm": value.strftime("%B"),
+        "mmm": value.strftime("%b"),
+        "mm": f"{value.month:02d}",
+        "m": f"{value.month}",
+        "dddd": value.strftime("%A"),
+        "ddd": value.strftime("%a"),
+        "dd": f"{value.day:02d}",
+        "d": f"{value.day}",
+    }
+    return EXCEL_DATE_TOKENS.sub(
+        lambda match: dict_parts[match.group(0).lower()], date_format
+    )
+
+
+def format_excel_percent(value, number_format) -> str:
+    """A fraction as its percent format displays it, 0.05 as 5.00% for 0.00%"""
+    match = re.search(r"\.(0+)%", number_format)
+    num_decimals = len(match.group(1)) if match else 0
+    return f"{value * 100:.{num_decimals}f}%"
+
+
+def format_cell_value(value, number_format="General") -> str:
+    """A cell as the display string the sheet getters parse
+
+    Percents and dates follow the cell's number format like Sheets shows
+    them, 0.05 in a percent cell reads as 5.00% and a d-mmm date as 13-Jul.
+    """
+    number_format = number_format or "General"
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, numbers.Real) and "%" in number_format:
+        return format_excel_percent(value, number_format)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime.date):
+        display = format_excel_date(value, number_format)
+        if display is not None:
+            return display
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time(0):
+            return f"{value.month}/{value.day}/{value.year}"
+        return value.isoformat(sep=" ")
+    if isinstance(value, datetime.date):
+        return f"{value.month}/{value.day}/{value.year}"
+    return str(value)
+
+
+def read_excel_sheet(file_path, sheet_name, ls_columns=None) -> pd.DataFrame:
+    """Stream a tab into a frame of strings, keeping only ls_columns if given
+
+    The workbook is opened read-only so rows are parsed as they are
+    iterated, and cells outside the projected columns are never converted.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        iter_rows = workbook[sheet_name].iter_rows()
+        ls_header = [format_cell_value(cell.value) for cell in next(iter_rows, ())]
+        ls_indexes = [
+            i
+            for i, column in enumerate(ls_header)
+            if column != "" and (ls_columns is None or column in ls_columns)
+        ]
+        dict_values = {i: [] for i in ls_indexes}
+        for row in iter_rows:
+            # trailing blank rows are often left behind by deleted data
+            if all(cell.value is None for cell in row):
+                continue
+            for i in ls_indexes:
+                dict_values[i].append(
+                    format_cell_value(row[i].value, row[i].number_format)
+                    if i < len(row)
+                    else ""
+                )
+    finally:
+        workbook.close()
+
+    return pd.DataFrame({ls_header[i]: dict_values[i] for i in ls_indexes})
+
+
+# %%
+# Functions: Writing #
+
+
+def _format_xml_cell(reference, value) -> str:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{reference}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Integral):
+        return f'<c r="{reference}"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Real):
+        return f'<c r="{reference}"><v>{float(value)!r}</v></c>'
+    text = escape(ILLEGAL_XML_CHARS.sub("", str(value)))
+    return (
+        f'<c r="{reference}" t="inlineStr">'
+        f'<is><t xml:space="preserve">{text}</t></is></c>'
+    )
+
+
+def write_sheet_xml(file, ls_rows):
+    """Stream rows as worksheet XML with inline strings
+
+    Inline strings keep the part self contained, it can replace a tab in a
+    workbook without touching the shared string table.
+    """
+    num_columns = max((len(row) for row in ls_rows), default=1)
+    dimension = f"A1:{get_column_letter(max(num_columns - 1, 0))}{max(len(ls_rows), 1)}"
+    file.write(
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<worksheet xmlns="{MAIN_NS}"><dimension ref="{dimension}"/><sheetData>'.encode()
+    )
+    for row_number, row in enumerate(ls_rows, start=1):
+        cells = "".join(
+            _format_xml_cell(f"{get_column_letter(i)}{row_number}", value)
+            for i, value in enumerate(row)
+        )
+        file.write(f'<row r="{row_number}">{cells}</row>'.encode())
+    file.write(b"</sheetData></worksheet>")
+
+
+def get_rows_from_df(df) -> list:
+    """Header and rows of df as python values"""
+    df = df.astype(object).where(df.notna(), None)
+    return [list(df.columns)] + df.values.tolist()
+
+
+def create_workbook(file_path, sheet_name, ls_rows):
+    """New workbook holding one tab, written with openpyxl in write-only mode"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    for row in ls_rows:
+        worksheet.append(row)
+    workbook.save(file_path)
+
+
+def _get_sheet_part_names(zip_file) -> dict:
+    """Tab name to worksheet part name of a workbook"""
+    workbook_xml = ElementTree.fromstring(zip_file.read("xl/workbook.xml"))
+    rels_xml = ElementTree.fromstring(zip_file.read("xl/_rels/workbook.xml.rels"))
+    dict_targets = {
+        rel.get("Id"): rel.get("Target")
+        for rel in rels_xml.iter(f"{{{PACKAGE_REL_NS}}}Relationship")
+    }
+    dict_part_names = {}
+    for sheet in workbook_xml.iter(f"{{{MAIN_NS}}}sheet"):
+        target = dict_targets[sheet.get(f"{{{OFFICE_REL_NS}}}id")]
+        # targets are relative to xl/ unless absolute
+        dict_part_names[sheet.get("name")] = (
+            target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+        )
+    return dict_part_names
+
+
+def _add_sheet_entries(dict_parts, sheet_name, part_name):
+    """Register a new worksheet part in the workbook, rels and content types
+
+    The parts are edited as text so the namespace prefixes Excel relies on
+    for ignorable extensions are left exactly as they were.
+    """
+    workbook_xml = dict_parts["xl/workbook.xml"]
+    rels_xml = dict_parts["xl/_rels/workbook.xml.rels"]
+    content_types_xml = dict_parts["[Content_Types].xml"]
+
+    rel_ids = [int(i) for i in re.findall(r'Id="rId(\d+)"', rels_xml)]
+    rel_id = f"rId{max(rel_ids, default=0) + 1}"
+    sheet_ids = [int(i) for i in re.findall(r'sheetId="(\d+)"', workbook_xml)]
+    sheet_id = max(sheet_ids, default=0) + 1
+    rel_prefix = re.search(rf'xmlns:(\w+)="{re.escape(OFFICE_REL_NS)}"', workbook_xml)
+    if rel_prefix is None:
+        raise ValueError("Workbook has no relationships namespace")
+
+    dict_parts["xl/workbook.xml"] = workbook_xml.replace(
+        "</sheets>",
+        f'<sheet name={quoteattr(sheet_name)} sheetId="{sheet_id}" '
+        f'{rel_prefix.group(1)}:id="{rel_id}"/></sheets>',
+    )
+    dict_parts["xl/_rels/workbook.xml.rels"] = rels_xml.replace(
+        "</Relationships>",
+        f'<Relationship Id="{rel_id}" Type="{WORKSHEET_REL_TYPE}" '
+        f'Target="/{part_name}"/></Relationships>',
+    )
+    dict_parts["[Content_Types].xml"] = content_types_xml.replace(
+        "</Types>",
+        f'<Override PartName="/{part_name}" '
+        f'ContentType="{WORKSHEET_CONTENT_TYPE}"/></Types>',
+    )
+
+
+def _remove_calc_chain(dict_parts):
+    """Drop references to the calculation chain, Excel rebuilds it on open"""
+    dict_parts["xl/_rels/workbook.xml.rels"] = re.sub(
+        r"<Relationship [^>]*Target=\"[^\"]*calcChain\.xml\"[^>]*/>",
+        "",
+        dict_parts["xl/_rels/workbook.xml.rels"],
+    )
+    dict_parts["[Content_Types].xml"] = re.sub(
+        r"<Override [^>]*PartName=\"/xl/calcChain\.xml\"[^>]*/>",
+        "",
+        dict_parts["[Content_Types].xml"],
+    )
+
+
+def write_excel_sheet(file_path, sheet_name, ls_rows):
+    """Replace or add one tab of a workbook without rewriting the others
+
+    Every other part of the package is streamed across unchanged, only the
+    tab's worksheet part and a few small index parts are replaced. The new
+    file is swapped in once complete so a reader never sees a partial one.
+    """
+    if len(sheet_name) > MAX_SHEET_NAME_LENGTH:
+        raise ValueError(f"Sheet name longer than 31 characters: {sheet_name}")
+    if not os.path.exists(file_path):
+        create_workbook(file_path, sheet_name, ls_rows)
+        return
+
+    ls_index_part_names = [
+        "xl/workbook.xml",
+        "xl/_rels/workbook.xml.rels",
+        "[Content_Types].xml",
+    ]
+    with zipfile.ZipFile(file_path) as zip_file:
+        dict_part_names = _get_sheet_part_names(zip_file)
+        dict_parts = {
+            part_name: zip_file.read(part_name).decode()
+            for part_name in ls_index_part_names
+        }
+        ls_existing_part_names = zip_file.namelist()
+
+        if sheet_name in dict_part_names:
+            part_name = dict_part_names[sheet_name]
+        else:
+            number = 1
+            while f"xl/worksheets/sheet{number}.xml" in ls_existing_part_names:
+                number += 1
+            part_name = f"xl/worksheets/sheet{number}.xml"
+            _add_sheet_entries(dict_parts, sheet_name, part_name)
+        _remove_calc_chain(dict_parts)
+        # relationships of the old tab point at drawings and tables laid over
+        # cells that no longer exist
+        sheet_rels_part_name = re.sub(r"([^/]+)$", r"_rels/\1.rels", part_name, count=1)
+        ls_skipped_part_names = [
+            part_name,
+            sheet_rels_part_name,
+            "xl/calcChain.xml",
+        ] + ls_index_part_names
+
+        file_descriptor, tmp_file_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(file_path)), suffix=".xlsx.tmp"
+        )
+        os.close(file_descriptor)
+        try:
+            with zipfile.ZipFile(
+                tmp_file_path, "w", compression=zipfile.ZIP_DEFLATED
+            ) as tmp_zip_file:
+                for zip_info in zip_file.infolist():
+                    if zip_info.filename in ls_skipped_part_names:
+                        continue
+                    with (
+                        zip_file.open(zip_info) as source,
+                        tmp_zip_file.open(zip_info, "w") as target,
+                    ):
+                        shutil.copyfileobj(source, target)
+                for index_part_name, text in dict_parts.items():
+                    tmp_zip_file.writestr(index_part_name, text)
+                with tmp_zip_file.open(part_name, "w") as target:
+                    write_sheet_xml(target, ls_rows)
+            os.replace(tmp_file_path, file_path)
+        except BaseException:
+            os.remove(tmp_file_path)
+            raise
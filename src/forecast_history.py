@@ -0,0 +1,387 @@
+# %%
+# Running Imports #
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import data_dir
+
+# %%
+# Vars #
+
+FORECAST_HISTORY_DIR = os.path.join(data_dir, "forecast_history")
+# every this many runs the full forecast is stored, runs in between only keep
+# the rows that changed against the previous run
+KEYFRAME_INTERVAL = 30
+# string columns are dictionary encoded into int32 codes shared by all runs
+LS_TEXT_COLUMNS = [
+    "Occurrence_ID",
+    "Account_Name",
+    "Category",
+    "Type",
+    "Auto_Pay_Account",
+    "Date_Paid",
+]
+LS_AMOUNT_COLUMNS = ["Amount", "Amount_Paid"]
+# an edited occurrence keeps its id, any of these changing is a change to it
+LS_VALUE_COLUMNS = ["Date"] + LS_TEXT_COLUMNS[1:] + LS_AMOUNT_COLUMNS
+EPOCH = np.datetime64("1970-01-01", "D")
+
+
+# %%
+# Functions: Encoding #
+
+
+def get_row_ids(df_future_cast) -> pd.Series:
+    """Identity of each forecast row, its occurrence id where it has one
+
+    Rows added by hand have a blank id and are identified by date and
+    account instead. Repeats of an identity, like two such rows on a day or
+    a sheet row pasted twice, are told apart by their ordinal.
+    """
+    occurrence_ids = df_future_cast["Occurrence_ID"].fillna("").astype(str)
+    row_ids = occurrence_ids.where(
+        occurrence_ids != "",
+        pd.to_datetime(df_future_cast["Date"]).dt.strftime("%Y-%m-%d")
+        + "|"
+        + df_future_cast["Account_Name"].fillna("").astype(str),
+    )
+    ordinals = row_ids.groupby(row_ids).cumcount()
+    return row_ids.where(ordinals == 0, row_ids + "#" + ordinals.astype(str))
+
+
+def encode_text(values, ls_dictionary, dict_codes) -> np.ndarray:
+    """int32 codes of strings, new strings are appended to the dictionary"""
+    values = values.fillna("").astype(str)
+    for value in pd.unique(values):
+        if value not in dict_codes:
+            dict_codes[value] = len(ls_dictionary)
+            ls_dictionary.append(value)
+    return values.map(dict_codes).to_numpy(dtype=np.int32)
+
+
+def encode_forecast(df_future_cast, ls_dictionary, dict_codes) -> dict:
+    """Columnar arrays of a forecast sorted by row key
+
+    The key of a row is the dictionary code of its row id, see get_row_ids.
+    New strings are appended to ls_dictionary so existing codes never move.
+    """
+    dict_arrays = {
+        "Date": (
+            pd.to_datetime(df_future_cast["Date"]).to_numpy().astype("datetime64[D]")
+            - EPOCH
+        ).astype(np.int32)
+    }
+    for column in LS_TEXT_COLUMNS:
+        dict_arrays[column] = encode_text(
+            df_future_cast[column], ls_dictionary, dict_codes
+        )
+    for column in LS_AMOUNT_COLUMNS:
+        dict_arrays[column] = df_future_cast[column].to_numpy(dtype=np.int64)
+
+    keys = encode_text(get_row_ids(df_future_cast), ls_dictionary, dict_codes).astype(
+        np.int64
+    )
+    order = np.argsort(keys, kind="stable")
+    dict_arrays = {column: values[order] for column, values in dict_arrays.items()}
+    dict_arrays["Key"] = keys[order]
+
+    return dict_arrays
+
+
+def decode_columns(dict_arrays, ls_dictionary) -> pd.DataFrame:
+    """Forecast columns of the arrays in their stored order"""
+    dictionary = np.asarray(ls_dictionary, dtype=object)
+    df = pd.DataFrame(
+        {
+            "Date": (EPOCH + dict_arrays["Date"].astype("timedelta64[D]")).astype(
+                "datetime64[ns]"
+            )
+        }
+    )
+    for column in LS_TEXT_COLUMNS:
+        df[column] = dictionary[dict_arrays[column]]
+    for column in LS_AMOUNT_COLUMNS:
+        df[column] = dict_arrays[column]
+    return df
+
+
+def decode_forecast(dict_arrays, ls_dictionary, starting_balance) -> pd.DataFrame:
+    """Forecast frame of a run with its running balance recomputed"""
+    # same ordering update_transactions uses, expenses first within a day
+    df_future_cast = (
+        decode_columns(dict_arrays, ls_dictionary)
+        .sort_values(by=["Date", "Amount"], kind="stable")
+        .reset_index(drop=True)
+    )
+    unpaid = df_future_cast["Date_Paid"] == ""
+    df_future_cast["Running_Balance"] = (
+        starting_balance + df_future_cast["Amount"].where(unpaid, 0).cumsum()
+    )
+
+    return df_future_cast
+
+
+# %%
+# Functions: Deltas #
+
+
+def diff_encoded(dict_arrays_a, dict_arrays_b) -> dict:
+    """Keys removed from a, rows added in b and rows whose values changed"""
+    keys_a = dict_arrays_a["Key"]
+    keys_b = dict_arrays_b["Key"]
+
+    removed = ~np.isin(keys_a, keys_b, assume_unique=True)
+    added = ~np.isin(keys_b, keys_a, assume_unique=True)
+
+    # both key arrays are sorted, line the shared rows up with searchsorted
+    shared_b = np.nonzero(~added)[0]
+    shared_a = np.searchsorted(keys_a, keys_b[shared_b])
+    changed_shared = np.zeros(len(shared_b), dtype=bool)
+    for column in LS_VALUE_COLUMNS:
+        changed_shared |= (
+            dict_arrays_a[column][shared_a] != dict_arrays_b[column][shared_b]
+        )
+
+    return {
+        "removed_a": np.nonzero(removed)[0],
+        "added_b": np.nonzero(added)[0],
+        "changed_a": shared_a[changed_shared],
+        "changed_b": shared_b[changed_shared],
+    }
+
+
+def select_rows(dict_arrays, idx) -> dict:
+    return {column: values[idx] for column, values in dict_arrays.items()}
+
+
+def apply_delta(dict_arrays, removed_keys, dict_upserts) -> dict:
+    """Previous run arrays with removed keys dropped and upserted rows replaced"""
+    keep = ~np.isin(
+        dict_arrays["Key"],
+        np.concatenate([removed_keys, dict_upserts["Key"]]),
+    )
+    dict_applied = {
+        column: np.concatenate([values[keep], dict_upserts[column]])
+        for column, values in dict_arrays.items()
+    }
+    order = np.argsort(dict_applied["Key"], kind="stable")
+    return {column: values[order] for column, values in dict_applied.items()}
+
+
+def get_end_of_day_balances(df_future_cast) -> pd.Series:
+    return df_future_cast.groupby("Date")["Running_Balance"].last()
+
+
+# %%
+# Class #
+
+
+class ForecastHistory:
+    """Append only local history of forecast runs
+
+    Runs are stored as compressed numpy columns under history_dir. Strings are
+    dictionary encoded with one dictionary shared by every run, and only
+    keyframe runs store the whole forecast, the others store the removed keys
+    and the added or changed rows against the previous run. Rows are keyed on
+    their occurrence id, so edits to an occurrence are a change rather than a
+    removal and an addition. Running balances are not stored, they are
+    recomputed from the run's starting balance.
+    """
+
+    def __init__(
+        self, history_dir=FORECAST_HISTORY_DIR, keyframe_interval=KEYFRAME_INTERVAL
+    ):
+        self.history_dir = history_dir
+        self.keyframe_interval = keyframe_interval
+        os.makedirs(self.history_dir, exist_ok=True)
+
+        self._index_path = os.path.join(self.history_dir, "runs.json")
+        self._dictionary_path = os.path.join(self.history_dir, "dictionary.json")
+        self.ls_runs = self._read_json(self._index_path, [])
+        self.ls_dictionary = self._read_json(self._dictionary_path, [])
+        self._dict_codes = {
+            value: code for code, value in enumerate(self.ls_dictionary)
+        }
+        # decoded arrays of the latest run, the base of the next delta
+        self._last_run_arrays = None
+
+    def _read_json(self, file_path, default):
+        if not os.path.exists(file_path):
+            return default
+        with open(file_path) as file:
+            return json.load(file)
+
+    def _write_json(self, file_path, value):
+        tmp_file_path = f"{file_path}.tmp"
+        with open(tmp_file_path, "w") as file:
+            json.dump(value, file)
+        os.replace(tmp_file_path, file_path)
+
+    def _get_run_path(self, run_id) -> str:
+        return os.path.join(self.history_dir, f"run_{run_id:06d}.npz")
+
+    def _get_keyframe_id(self, run_id) -> int:
+        """Latest keyframe run at or before run_id"""
+        while not self.ls_runs[run_id]["Is_Keyframe"]:
+            run_id -= 1
+        return run_id
+
+    def _load_run_arrays(self, run_id) -> dict:
+        """Arrays of a run rebuilt from its keyframe and the deltas after it"""
+        keyframe_id = self._get_keyframe_id(run_id)
+        with np.load(self._get_run_path(keyframe_id)) as npz:
+            dict_arrays = {column: npz[column] for column in npz.files}
+        for delta_id in range(keyframe_id + 1, run_id + 1):
+            with np.load(self._get_run_path(delta_id)) as npz:
+                removed_keys = npz["Removed_Key"]
+                dict_upserts = {
+                    column: npz[column] for column in npz.files if column in dict_arrays
+                }
+            dict_arrays = apply_delta(dict_arrays, removed_keys, dict_upserts)
+        return dict_arrays
+
+    def append_run(self, df_future_cast, starting_balance, run_at=None) -> int:
+        """Store a forecast run and return its run id"""
+        run_id = len(self.ls_runs)
+        dict_arrays = encode_forecast(
+            df_future_cast, self.ls_dictionary, self._dict_codes
+        )
+
+        is_keyframe = (
+            run_id == 0
+            or run_id - self._get_keyframe_id(run_id - 1) >= self.keyframe_interval
+        )
+        if is_keyframe:
+            dict_stored = dict_arrays
+        else:
+            if self._last_run_arrays is None:
+                self._last_run_arrays = self._load_run_arrays(run_id - 1)
+            dict_diff = diff_encoded(self._last_run_arrays, dict_arrays)
+            upserts = np.concatenate([dict_diff["added_b"], dict_diff["changed_b"]])
+            dict_stored = select_rows(dict_arrays, upserts)
+            dict_stored["Removed_Key"] = self._last_run_arrays["Key"][
+                dict_diff["removed_a"]
+            ]
+
+        # the dictionary is written first so a stored run never has unknown codes
+        self._write_json(self._dictionary_path, self.ls_dictionary)
+        np.savez_compressed(self._get_run_path(run_id), **dict_stored)
+        self.ls_runs.append(
+            {
+                "Run_ID": run_id,
+                "Run_At": str(pd.Timestamp(run_at or "now")),
+                "Starting_Balance": int(starting_balance),
+                "Num_Rows": len(dict_arrays["Key"]),
+                "Is_Keyframe": is_keyframe,
+            }
+        )
+        self._write_json(self._index_path, self.ls_runs)
+        self._last_run_arrays = dict_arrays
+
+        return run_id
+
+    def list_runs(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            self.ls_runs,
+            columns=["Run_ID", "Run_At", "Starting_Balance", "Num_Rows", "Is_Keyframe"],
+        )
+
+    def get_run(self, run_id) -> pd.DataFrame:
+        """Forecast of a stored run as update_transactions returned it"""
+        return decode_forecast(
+            self._load_run_arrays(run_id),
+            self.ls_dictionary,
+            self.ls_runs[run_id]["Starting_Balance"],
+        )
+
+    def diff_runs(self, run_id_a, run_id_b) -> dict:
+        """Added, removed and changed occurrences and the balance delta per date"""
+        dict_arrays_a = self._load_run_arrays(run_id_a)
+        dict_arrays_b = self._load_run_arrays(run_id_b)
+        dict_diff = diff_encoded(dict_arrays_a, dict_arrays_b)
+
+        def decode_rows(dict_arrays, idx):
+            return decode_forecast(
+                select_rows(dict_arrays, idx), self.ls_dictionary, 0
+            ).drop(columns=["Running_Balance"])
+
+        # changed rows are paired by position, each pair shares a row key
+        df_changed_a = decode_columns(
+            select_rows(dict_arrays_a, dict_diff["changed_a"]), self.ls_dictionary
+        )
+        df_changed_b = decode_columns(
+            select_rows(dict_arrays_b, dict_diff["changed_b"]), self.ls_dictionary
+        )
+        df_changed = (
+            pd.concat(
+                [
+                    df_changed_a[["Occurrence_ID"]],
+                    df_changed_a[LS_VALUE_COLUMNS].add_suffix("_A"),
+                    df_changed_b[LS_VALUE_COLUMNS].add_suffix("_B"),
+                ],
+                axis=1,
+            )
+            .sort_values(by=["Date_A", "Amount_A"], kind="stable")
+            .reset_index(drop=True)
+        )
+
+        balances_a = get_end_of_day_balances(self.get_run(run_id_a))
+        balances_b = get_end_of_day_balances(self.get_run(run_id_b))
+        df_balance_delta = pd.concat(
+            [balances_a.rename("Balance_A"), balances_b.rename("Balance_B")], axis=1
+        ).sort_index()
+        # days without rows sit at the balance of the last day that had one
+        df_balance_delta = df_balance_delta.ffill()
+        df_balance_delta["Balance_A"] = df_balance_delta["Balance_A"].fillna(
+            self.ls_runs[run_id_a]["Starting_Balance"]
+        )
+        df_balance_delta["Balance_B"] = df_balance_delta["Balance_B"].fillna(
+            self.ls_runs[run_id_b]["Starting_Balance"]
+        )
+        df_balance_delta = df_balance_delta.astype(np.int64)
+        df_balance_delta["Delta"] = (
+            df_balance_delta["Balance_B"] - df_balance_delta["Balance_A"]
+        )
+
+        return {
+            "added": decode_rows(dict_arrays_b, dict_diff["added_b"]),
+            "removed": decode_rows(dict_arrays_a, dict_diff["removed_a"]),
+            "changed": df_changed,
+            "balance_delta": df_balance_delta.reset_index(),
+        }
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    import tempfile
+
+    df_example = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2030-01-01", "2030-01-15", "2030-02-01"]),
+            "Category": "Housing",
+            "Type": "monthly",
+            "Account_Name": ["Rent", "Paycheck", "Rent"],
+            "Occurrence_ID": ["o1", "o2", "o3"],
+            "Auto_Pay_Account": "Chase Checking",
+            "Amount": [-180000, 250000, -180000],
+            "Amount_Paid": 0,
+            "Date_Paid": "",
+        }
+    )
+    forecast_history = ForecastHistory(tempfile.mkdtemp())
+    run_id_a = forecast_history.append_run(df_example, starting_balance=300000)
+    df_example.loc[2, "Amount"] = -190000
+    run_id_b = forecast_history.append_run(df_example, starting_balance=300000)
+    print(forecast_history.list_runs())
+    for name, df in forecast_history.diff_runs(run_id_a, run_id_b).items():
+        print(name)
+        print(df)
+
+
+# %%
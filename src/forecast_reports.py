@@ -0,0 +1,184 @@
+# %%
+# Running Imports #
+
+import numpy as np
+import pandas as pd
+
+# %%
+# Vars #
+
+# type of the one-time rows that label the daily balance report
+LABEL_TYPE = "oncely"
+# days before the as-of date each report starts
+ALERT_DAYS_BACK = 1
+DAILY_BALANCE_DAYS_BACK = 10
+
+
+# %%
+# Functions: Positions #
+
+
+def get_sorted_positions(dates):
+    """Row positions in date order, None when the rows already are
+
+    The sort is stable so rows of a day keep the order the forecast put
+    them in, the last one carries the closing balance of the day.
+    """
+    if len(dates) < 2 or (dates[1:] >= dates[:-1]).all():
+        return None
+    return np.argsort(dates, kind="stable")
+
+
+def get_end_of_day_mask(sorted_dates) -> np.ndarray:
+    """True on the last row of each day of date sorted rows"""
+    is_end_of_day = np.ones(len(sorted_dates), dtype=bool)
+    is_end_of_day[:-1] = sorted_dates[1:] != sorted_dates[:-1]
+    return is_end_of_day
+
+
+def get_label_positions(end_of_day_dates, label_dates):
+    """Day row and label row of each daily balance report row
+
+    Each day gets one row per label on that date, or a single row without
+    a label, the rows a left merge of the days with the labels would give.
+    Returns the day positions, the label positions and whether each row has
+    a label.
+    """
+    first = np.searchsorted(label_dates, end_of_day_dates, side="left")
+    counts = np.searchsorted(label_dates, end_of_day_dates, side="right") - first
+    num_rows_per_day = np.maximum(counts, 1)
+
+    day_positions = np.repeat(np.arange(len(end_of_day_dates)), num_rows_per_day)
+    row_starts = np.cumsum(num_rows_per_day) - num_rows_per_day
+    offsets = np.arange(len(day_positions)) - np.repeat(row_starts, num_rows_per_day)
+    has_label = np.repeat(counts > 0, num_rows_per_day)
+    label_positions = np.where(
+        has_label, np.repeat(first, num_rows_per_day) + offsets, 0
+    )
+    return day_positions, label_positions, has_label
+
+
+# %%
+# Functions: Reports #
+
+
+def get_forecast_arrays(df_future_cast) -> dict:
+    """Columns the reports read as arrays in date order, with the row index
+
+    The forecast is expected sorted by date and is then read without a
+    copy, it is stably sorted first if not.
+    """
+    dict_arrays = {
+        "Date": df_future_cast["Date"].to_numpy(dtype="datetime64[ns]"),
+        "Running_Balance": df_future_cast["Running_Balance"].to_numpy(),
+        "Type": df_future_cast["Type"].to_numpy(),
+        "Account_Name": df_future_cast["Account_Name"].to_numpy(),
+        "Amount": df_future_cast["Amount"].to_numpy(),
+        "index": df_future_cast.index.to_numpy(),
+    }
+    sorted_positions = get_sorted_positions(dict_arrays["Date"])
+    if sorted_positions is not None:
+        dict_arrays = {
+            name: values[sorted_positions] for name, values in dict_arrays.items()
+        }
+    return dict_arrays
+
+
+def get_end_of_day_df(dict_arrays) -> pd.DataFrame:
+    """Closing balance of each day, the last forecast row of the day"""
+    is_end_of_day = get_end_of_day_mask(dict_arrays["Date"])
+    return pd.DataFrame(
+        {
+            "Date": dict_arrays["Date"][is_end_of_day],
+            "Running_Balance": dict_arrays["Running_Balance"][is_end_of_day],
+        },
+        index=dict_arrays["index"][is_end_of_day],
+    )
+
+
+def get_label_dates_df(dict_arrays) -> pd.DataFrame:
+    """One-time rows of the forecast as labels"""
+    is_label = dict_arrays["Type"] == LABEL_TYPE
+    return pd.DataFrame(
+        {
+            "Date": dict_arrays["Date"][is_label],
+            "Label_Item": dict_arrays["Account_Name"][is_label],
+            "Label_Amount": dict_arrays["Amount"][is_label],
+        },
+        index=dict_arrays["index"][is_label],
+    )
+
+
+def get_alert_dates_df(df_end_of_day, as_of, threshold) -> pd.DataFrame:
+    """Closing balances below the threshold from the day before as_of on"""
+    min_date = np.datetime64(as_of - pd.Timedelta(days=ALERT_DAYS_BACK))
+    is_alert = (df_end_of_day["Running_Balance"].to_numpy() < threshold) & (
+        df_end_of_day["Date"].to_numpy() >= min_date
+    )
+    return df_end_of_day[is_alert]
+
+
+def get_daily_balance_df(
+    df_end_of_day, df_label_dates, as_of, threshold, emergency_fund_amount
+) -> pd.DataFrame:
+    """Closing balances labelled with the one-time rows of each day"""
+    end_of_day_dates = df_end_of_day["Date"].to_numpy()
+    end_of_day_balances = df_end_of_day["Running_Balance"].to_numpy()
+    label_items = df_label_dates["Label_Item"].to_numpy()
+    label_amounts = df_label_dates["Label_Amount"].to_numpy()
+
+    day_positions, label_positions, has_label = get_label_positions(
+        end_of_day_dates, df_label_dates["Date"].to_numpy()
+    )
+    min_date = np.datetime64(as_of - pd.Timedelta(days=DAILY_BALANCE_DAYS_BACK))
+    is_reported = end_of_day_dates[day_positions] >= min_date
+    day_positions = day_positions[is_reported]
+    label_positions = label_positions[is_reported]
+    has_label = has_label[is_reported]
+
+    if len(label_items) == 0:
+        label_items = np.array([""], dtype=object)
+        label_amounts = np.array([np.nan])
+    report_label_amounts = label_amounts[label_positions]
+    if not has_label.all():
+        # days without a label leave the amount blank like a left merge does
+        report_label_amounts = np.where(
+            has_label, report_label_amounts.astype(float), np.nan
+        )
+
+    return pd.DataFrame(
+        {
+            "Date": end_of_day_dates[day_positions],
+            "Running_Balance": end_of_day_balances[day_positions],
+            "Label_Item": np.where(has_label, label_items[label_positions], ""),
+            "Label_Amount": report_label_amounts,
+            "Emergency_Fund_Amount": emergency_fund_amount * -1,
+            "Alert_Threshold": threshold,
+            "Zero": 0,
+        },
+        index=np.flatnonzero(is_reported),
+    )
+
+
+def build_forecast_reports(
+    df_future_cast, as_of, threshold, emergency_fund_amount
+) -> dict:
+    """End of day balances, label, alert and daily balance frames of a forecast
+
+    The forecast columns are read once and the end of day balances and
+    labels found once, the alert dates and daily balance report are sliced
+    from them instead of each starting over from the forecast.
+    """
+    as_of = pd.Timestamp(as_of).normalize()
+    dict_arrays = get_forecast_arrays(df_future_cast)
+    df_end_of_day = get_end_of_day_df(dict_arrays)
+    df_label_dates = get_label_dates_df(dict_arrays)
+
+    return {
+        "end_of_day": df_end_of_day,
+        "label_dates": df_label_dates,
+        "alert_dates": get_alert_dates_df(df_end_of_day, as_of, threshold),
+        "daily_balance": get_daily_balance_df(
+            df_end_of_day, df_label_dates, as_of, threshold, emergency_fund_amount
+        ),
+    }
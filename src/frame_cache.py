@@ -0,0 +1,29 @@
+# %%
+# Running Imports #
+
+import pandas as pd
+
+# %%
+# Functions #
+
+
+def enable_copy_on_write():
+    """Turn on pandas copy on write, the default from pandas 3 on
+
+    It changes how every frame in the process shares data, so the entry
+    points call this once at start up rather than it happening on import.
+    """
+    pd.set_option("mode.copy_on_write", True)
+
+
+def get_frame_view(df) -> pd.DataFrame:
+    """A lazy copy of a cached frame
+
+    With copy on write the view shares every array with df, so handing it
+    out costs no memory. Setting a column or writing cells on either frame
+    copies only what was written and leaves the other as it was. Without it
+    a shallow copy could write through to the cache, so df is deep copied.
+    """
+    if pd.get_option("mode.copy_on_write") is True:
+        return df.copy(deep=False)
+    return df.copy()
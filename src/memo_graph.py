@@ -0,0 +1,92 @@
+# %%
+# Running Imports #
+
+import threading
+
+import pandas as pd
+
+from frame_cache import get_frame_view
+
+# %%
+# Class #
+
+
+class MemoGraph:
+    """Derived results memoized by node and parameters
+
+    Each node declares the source tabs it reads and the other nodes it is
+    computed from. invalidate drops every result that depends on a source,
+    directly or through other nodes, and nothing else. A result computed
+    while one of its sources was invalidated is returned but not kept, so
+    a refresh during a computation never leaves a stale result behind.
+    """
+
+    def __init__(self):
+        self._dict_nodes = {}
+        self._dict_results = {}
+        # bumped on every invalidation, results keep the versions they saw
+        self._dict_versions = {}
+        self._num_clears = 0
+        self._lock = threading.RLock()
+        self.num_hits = 0
+        self.num_misses = 0
+
+    def register(self, name, func, ls_sources=(), ls_nodes=()):
+        """Add a node, func is called with the parameters given to get"""
+        unknown_nodes = set(ls_nodes) - set(self._dict_nodes)
+        if unknown_nodes:
+            raise ValueError(f"Register {sorted(unknown_nodes)} before {name}")
+
+        set_sources = set(ls_sources)
+        for node_name in ls_nodes:
+            set_sources |= self._dict_nodes[node_name]["set_sources"]
+        with self._lock:
+            self._dict_nodes[name] = {"func": func, "set_sources": set_sources}
+
+    def get(self, name, **params):
+        """Memoized result of a node, frames are handed out as lazy copies"""
+        key = (name, tuple(sorted(params.items())))
+        with self._lock:
+            if key in self._dict_results:
+                self.num_hits += 1
+                return self._get_view(self._dict_results[key])
+            self.num_misses += 1
+            dict_node = self._dict_nodes[name]
+            versions = self._get_versions(dict_node["set_sources"])
+
+        value = dict_node["func"](**params)
+
+        with self._lock:
+            if self._get_versions(dict_node["set_sources"]) == versions:
+                self._dict_results[key] = value
+        return self._get_view(value)
+
+    def invalidate(self, source):
+        """Drop the results that depend on a source tab"""
+        with self._lock:
+            self._dict_versions[source] = self._dict_versions.get(source, 0) + 1
+            ls_stale_keys = [
+                key
+                for key in self._dict_results
+                if source in self._dict_nodes[key[0]]["set_sources"]
+            ]
+            for key in ls_stale_keys:
+                del self._dict_results[key]
+
+    def clear(self):
+        with self._lock:
+            self._num_clears += 1
+            self._dict_results.clear()
+
+    def _get_versions(self, set_sources) -> tuple:
+        return (self._num_clears,) + tuple(
+            self._dict_versions.get(source, 0) for source in sorted(set_sources)
+        )
+
+    def _get_view(self, value):
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return get_frame_view(value)
+        return value
+
+
+# %%
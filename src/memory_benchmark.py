@@ -0,0 +1,129 @@
+# %%
+# Running Imports #
+
+import json
+import os
+import resource
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import enable_copy_on_write
+
+# %%
+# Vars #
+
+# rows of the example Transactions_Report, decades of history
+NUM_ROWS = int(os.getenv("MEMORY_BENCHMARK_ROWS", 500_000))
+# typed reads held at once, about what one forecast run keeps alive
+NUM_READS = int(os.getenv("MEMORY_BENCHMARK_READS", 4))
+# deep_copy is how the caches worked before they handed out lazy copies
+LS_MODES = ["deep_copy", "copy_on_write"]
+
+
+# %%
+# Functions: Example Data #
+
+
+def get_example_transactions_report(num_rows) -> pd.DataFrame:
+    """A Transactions_Report tab of display strings as fetched from Sheets"""
+    rng = np.random.default_rng(0)
+    dates = pd.Timestamp("2000-01-01") + pd.to_timedelta(
+        np.sort(rng.integers(0, 365 * 40, num_rows)), unit="D"
+    )
+    amounts = pd.Series(rng.integers(-500000, 500000, num_rows) / 100).astype(str)
+    account_names = np.array(["Rent", "Power", "Pay", "Food", "Visa"], dtype=object)
+    return pd.DataFrame(
+        {
+            "Date": dates.strftime("%m/%d/%Y"),
+            "Category": "Bills",
+            "Type": "monthly",
+            "Account_Name": account_names[rng.integers(0, 5, num_rows)],
+            "Auto_Pay_Account": "Chase Checking",
+            "Amount": amounts,
+            "Amount_Paid": amounts,
+            "Date_Paid": "",
+            "Running_Balance": amounts,
+            "Occurrence_ID": [f"o{i:016x}" for i in range(num_rows)],
+        }
+    )
+
+
+# %%
+# Functions: Benchmark #
+
+
+def get_peak_rss_mb() -> float:
+    """Peak resident memory of this process so far"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return max_rss / 1024**2 if sys.platform == "darwin" else max_rss / 1024
+
+
+def run_mode(mode, num_rows=NUM_ROWS, num_reads=NUM_READS) -> dict:
+    """Peak memory of holding num_reads typed reads of a cached tab"""
+    from cash_flow_commander import SheetsStorage
+
+    if mode == "deep_copy":
+        pd.set_option("mode.copy_on_write", False)
+
+        class DeepCopySheetsStorage(SheetsStorage):
+            def _get_sheet_data(self, key, sheet_name, force_update=False):
+                return self._dict_sheets_dfs[key].copy()
+
+        sheets_storage = DeepCopySheetsStorage()
+    else:
+        enable_copy_on_write()
+        sheets_storage = SheetsStorage()
+
+    sheets_storage._dict_sheets_dfs["transactions_report"] = (
+        get_example_transactions_report(num_rows)
+    )
+    peak_rss_before_reads = get_peak_rss_mb()
+    ls_reads = [sheets_storage.get_transactions_report() for _ in range(num_reads)]
+    peak_rss = get_peak_rss_mb()
+    sheets_storage.close()
+
+    return {
+        "mode": mode,
+        "rows": num_rows,
+        "reads": len(ls_reads),
+        "peak_rss_before_reads_mb": round(peak_rss_before_reads, 1),
+        "peak_rss_mb": round(peak_rss, 1),
+    }
+
+
+def run_benchmark(ls_modes=LS_MODES) -> pd.DataFrame:
+    """Run each mode in its own process, peak memory only ever grows"""
+    ls_results = []
+    for mode in ls_modes:
+        completed = subprocess.run(
+            [sys.executable, __file__],
+            env={**os.environ, "MEMORY_BENCHMARK_MODE": mode},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        ls_results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    df_results = pd.DataFrame(ls_results)
+    df_results["reads_mb"] = (
+        df_results["peak_rss_mb"] - df_results["peak_rss_before_reads_mb"]
+    )
+    return df_results
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    if os.getenv("MEMORY_BENCHMARK_MODE"):
+        print(json.dumps(run_mode(os.getenv("MEMORY_BENCHMARK_MODE"))))
+    else:
+        df_results = run_benchmark()
+        print(df_results.to_string(index=False))
+        peak_rss_mb = df_results.set_index("mode")["peak_rss_mb"]
+        reduction = 1 - peak_rss_mb["copy_on_write"] / peak_rss_mb["deep_copy"]
+        print(f"Peak RSS reduction: {reduction:.0%}")
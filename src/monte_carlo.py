@@ -0,0 +1,232 @@
+# %%
+# Running Imports #
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from cash_flow_conversions import CENTS_PER_UNIT
+
+# %%
+# Vars #
+
+PERCENTILES = [5, 25, 50, 75, 95]
+DEFAULT_NUM_SCENARIOS = 10000
+DEFAULT_CHUNK_SIZE = 2500
+
+
+# %%
+# Functions: Occurrences #
+
+
+def build_occurrence_arrays(df_future_cast, start_date, num_days) -> dict:
+    """Flatten the unpaid rows of a forecast into day/amount/rule arrays"""
+    start_date = pd.to_datetime(start_date).normalize()
+
+    df_unpaid = df_future_cast[
+        (df_future_cast["Date_Paid"].fillna("") == "")
+        & (
+            pd.to_datetime(df_future_cast["Date"])
+            <= start_date + pd.Timedelta(days=num_days - 1)
+        )
+    ]
+
+    # anything still unpaid from the past is expected to land today
+    day_idx = (pd.to_datetime(df_unpaid["Date"]) - start_date).dt.days.to_numpy()
+    day_idx = np.clip(day_idx, 0, num_days - 1)
+
+    rule_keys = (
+        df_unpaid["Account_Name"].astype(str) + "|" + df_unpaid["Type"].astype(str)
+    )
+    rule_idx, rule_names = pd.factorize(rule_keys)
+
+    return {
+        "day_idx": day_idx.astype(np.int64),
+        "amount": df_unpaid["Amount"].to_numpy(dtype=float),
+        "rule_idx": rule_idx.astype(np.int64),
+        "rule_names": list(rule_names),
+        "num_days": num_days,
+    }
+
+
+def get_rule_noise(occurrences, amount_noise, dict_rule_noise=None) -> np.ndarray:
+    """Per-rule standard deviation of the relative amount noise"""
+    rule_noise = np.full(len(occurrences["rule_names"]), float(amount_noise))
+    if dict_rule_noise:
+        for i, rule_name in enumerate(occurrences["rule_names"]):
+            account_name = rule_name.split("|")[0]
+            if account_name in dict_rule_noise:
+                rule_noise[i] = dict_rule_noise[account_name]
+    return rule_noise
+
+
+# %%
+# Functions: Simulation #
+
+
+def simulate_balance_paths(
+    occurrences,
+    rule_noise,
+    starting_balance,
+    num_scenarios,
+    rng,
+    income_delay_prob=0.1,
+    max_income_delay_days=3,
+    shocks_per_year=2.0,
+    shock_mean=500.0 * CENTS_PER_UNIT,
+) -> np.ndarray:
+    """Simulate a (scenarios x days) array of end-of-day balances in cents"""
+    num_days = occurrences["num_days"]
+    day_idx = occurrences["day_idx"]
+    amount = occurrences["amount"]
+    num_occurrences = len(day_idx)
+
+    # amount noise: each occurrence scaled by its rule's relative noise
+    noise = rng.standard_normal((num_scenarios, num_occurrences))
+    amounts = amount * (1 + noise * rule_noise[occurrences["rule_idx"]])
+    # noise never flips an income into an expense or the other way around
+    amounts = np.where(amount >= 0, np.maximum(amounts, 0), np.minimum(amounts, 0))
+
+    # income delays: some paychecks land a few days late
+    days = np.broadcast_to(day_idx, (num_scenarios, num_occurrences)).copy()
+    if max_income_delay_days > 0 and income_delay_prob > 0:
+        delayed = (amount > 0) & (
+            rng.random((num_scenarios, num_occurrences)) < income_delay_prob
+        )
+        delays = rng.integers(1, max_income_delay_days + 1, size=delayed.shape)
+        days = np.minimum(days + delays * delayed, num_days - 1)
+
+    scenario_idx = np.repeat(np.arange(num_scenarios), num_occurrences)
+    flat_idx = scenario_idx * num_days + days.ravel()
+    flat_amounts = amounts.ravel()
+
+    # one-off shocks: poisson count per scenario, exponential size
+    if shocks_per_year > 0:
+        shock_counts = rng.poisson(shocks_per_year * num_days / 365, size=num_scenarios)
+        shock_scenarios = np.repeat(np.arange(num_scenarios), shock_counts)
+        shock_days = rng.integers(0, num_days, size=shock_scenarios.size)
+        shock_amounts = -rng.exponential(shock_mean, size=shock_scenarios.size)
+        flat_idx = np.concatenate([flat_idx, shock_scenarios * num_days + shock_days])
+        flat_amounts = np.concatenate([flat_amounts, shock_amounts])
+
+    daily_flows = np.bincount(
+        flat_idx, weights=flat_amounts, minlength=num_scenarios * num_days
+    ).reshape(num_scenarios, num_days)
+
+    return starting_balance + np.cumsum(daily_flows, axis=1)
+
+
+def _simulate_chunk(args) -> np.ndarray:
+    """Process pool entry point, simulates one chunk of scenarios
+
+    Balances come back as int64 cents, float32 would lose cents above 2**24.
+    """
+    occurrences, rule_noise, starting_balance, num_scenarios, seed, kwargs = args
+    rng = np.random.default_rng(seed)
+    return np.rint(
+        simulate_balance_paths(
+            occurrences, rule_noise, starting_balance, num_scenarios, rng, **kwargs
+        )
+    ).astype(np.int64)
+
+
+# %%
+# Functions: Monte Carlo #
+
+
+def run_monte_carlo(
+    df_future_cast,
+    starting_balance,
+    threshold,
+    start_date=None,
+    num_days=731,
+    num_scenarios=DEFAULT_NUM_SCENARIOS,
+    amount_noise=0.1,
+    dict_rule_noise=None,
+    seed=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    max_workers: Optional[int] = None,
+    **simulation_kwargs,
+) -> pd.DataFrame:
+    """Run perturbed forecasts and summarize them into daily percentile bands
+
+    The chunks are simulated on a process pool unless there is only one or
+    max_workers is 1, callers that are already a pool worker or run threads
+    of their own pass 1 to keep them in process.
+    """
+    if start_date is None:
+        start_date = pd.to_datetime("today")
+    start_date = pd.to_datetime(start_date).normalize()
+
+    occurrences = build_occurrence_arrays(df_future_cast, start_date, num_days)
+    rule_noise = get_rule_noise(occurrences, amount_noise, dict_rule_noise)
+
+    # split the scenarios into chunks each with an independent random stream
+    ls_chunk_sizes = [
+        min(chunk_size, num_scenarios - i) for i in range(0, num_scenarios, chunk_size)
+    ]
+    ls_seeds = np.random.SeedSequence(seed).spawn(len(ls_chunk_sizes))
+    ls_args = [
+        (occurrences, rule_noise, starting_balance, n, s, simulation_kwargs)
+        for n, s in zip(ls_chunk_sizes, ls_seeds)
+    ]
+
+    if len(ls_args) == 1 or max_workers == 1:
+        ls_balances = [_simulate_chunk(args) for args in ls_args]
+    else:
+        max_workers = max_workers or min(len(ls_args), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            ls_balances = list(executor.map(_simulate_chunk, ls_args))
+
+    balances = np.concatenate(ls_balances, axis=0)
+
+    return summarize_balance_paths(balances, threshold, start_date)
+
+
+def summarize_balance_paths(balances, threshold, start_date) -> pd.DataFrame:
+    """Percentile bands and threshold probabilities for each forecast day"""
+    num_days = balances.shape[1]
+
+    df_bands = pd.DataFrame(
+        {"Date": pd.date_range(pd.to_datetime(start_date), periods=num_days, freq="D")}
+    )
+
+    percentiles = np.percentile(balances, PERCENTILES, axis=0)
+    for percentile, values in zip(PERCENTILES, percentiles):
+        df_bands[f"P{percentile}"] = np.rint(values).astype(np.int64)
+
+    below = balances < threshold
+    df_bands["Prob_Below_Threshold"] = below.mean(axis=0)
+    # probability that a scenario has been below the threshold at any point so far
+    df_bands["Prob_Breached_By_Date"] = np.logical_or.accumulate(below, axis=1).mean(
+        axis=0
+    )
+
+    return df_bands
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    num_days = 731
+    df_example = pd.DataFrame(
+        {
+            "Date": pd.date_range("today", periods=num_days, freq="D").normalize(),
+            "Type": "everyXDays",
+            "Account_Name": "Example",
+            "Amount": -2000,
+            "Date_Paid": "",
+        }
+    )
+    df_bands = run_monte_carlo(
+        df_example, starting_balance=1000000, threshold=100000, num_days=num_days
+    )
+    print(df_bands.head(20))
+    print(df_bands.tail(20))
+
+
+# %%
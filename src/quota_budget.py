@@ -0,0 +1,64 @@
+# %%
+# Running Imports #
+
+import threading
+import time
+
+# %%
+# Vars #
+
+# the Sheets API allows 300 read and 300 write requests a minute per project,
+# leave some room for the other tools using the same project
+REQUESTS_PER_MINUTE = 240
+
+
+# %%
+# Class #
+
+
+class QuotaBudget:
+    """Requests per minute shared by every caller drawing from it
+
+    A token bucket refilled continuously at the per minute rate and holding
+    at most a minute of requests. acquire blocks the calling thread until
+    enough requests are available, so callers on many threads, or many
+    households, together stay under one quota.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=REQUESTS_PER_MINUTE,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._available = float(requests_per_minute)
+        self._refilled_at = clock()
+        self.num_acquired = 0
+
+    def _refill(self):
+        now = self._clock()
+        self._available = min(
+            self.requests_per_minute,
+            self._available + (now - self._refilled_at) * self.requests_per_minute / 60,
+        )
+        self._refilled_at = now
+
+    def acquire(self, num_requests=1):
+        """Take num_requests from the budget, waiting for them if needed"""
+        # a call larger than the bucket could never be served whole
+        num_requests = min(num_requests, self.requests_per_minute)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._available >= num_requests:
+                    self._available -= num_requests
+                    self.num_acquired += num_requests
+                    return
+                wait_seconds = (
+                    (num_requests - self._available) * 60 / self.requests_per_minute
+                )
+            self._sleep(wait_seconds)
@@ -0,0 +1,399 @@
+# %%
+# Running Imports #
+
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from date_parsing import DICT_WHEN_FORMATS, parse_date
+
+# %%
+# Vars #
+
+CALENDAR_START = "2000-01-01"
+CALENDAR_END = "2100-12-31"
+LS_WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+# rule types in the order their occurrences are listed within a day
+LS_RULE_TYPES = [
+    "oncely",
+    "yearly",
+    "monthly",
+    "biweekly",
+    "everyXDays",
+    "weekly",
+    "semiMonthly",
+    "nthWeekday",
+    "lastBusinessDay",
+]
+# how an occurrence falling on a weekend or bank holiday is moved
+LS_ROLL_CONVENTIONS = ["", "following", "preceding", "modifiedFollowing"]
+# columns identifying a rule, amounts can be edited without changing its ids
+LS_RULE_KEY_COLUMNS = ["Type", "When", "Account_Name"]
+
+
+# %%
+# Functions: Holidays #
+
+
+def get_nth_weekday(year, month, weekday, n) -> pd.Timestamp:
+    """Date of the nth weekday of a month, counting from the end when n < 0"""
+    if n > 0:
+        first = pd.Timestamp(year=year, month=month, day=1)
+        return first + pd.Timedelta(days=(weekday - first.dayofweek) % 7 + 7 * (n - 1))
+    last = pd.Timestamp(year=year, month=month, day=1) + pd.offsets.MonthEnd(0)
+    return last - pd.Timedelta(days=(last.dayofweek - weekday) % 7 + 7 * (-n - 1))
+
+
+def get_bank_holidays(start_year, end_year) -> pd.DatetimeIndex:
+    """Federal Reserve holidays, a Sunday holiday is observed on the Monday
+
+    Banks stay open on the Friday before a Saturday holiday, so those are not
+    moved.
+    """
+    ls_holidays = []
+    for year in range(start_year, end_year + 1):
+        ls_fixed = [(1, 1), (7, 4), (11, 11), (12, 25)]
+        if year >= 2021:
+            ls_fixed.append((6, 19))
+        for month, day in ls_fixed:
+            holiday = pd.Timestamp(year=year, month=month, day=day)
+            if holiday.dayofweek == 6:
+                holiday += pd.Timedelta(days=1)
+            ls_holidays.append(holiday)
+        ls_holidays += [
+            get_nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+            get_nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+            get_nth_weekday(year, 5, 0, -1),  # Memorial Day
+            get_nth_weekday(year, 9, 0, 1),  # Labor Day
+            get_nth_weekday(year, 10, 0, 2),  # Columbus Day
+            get_nth_weekday(year, 11, 3, 4),  # Thanksgiving Day
+        ]
+    return pd.DatetimeIndex(sorted(ls_holidays))
+
+
+# %%
+# Class: Business Calendar #
+
+
+class BusinessCalendar:
+    """Business-day bitmap over a fixed range of days
+
+    The bitmap and the index of the next and previous business day of every
+    day are computed once, so rolling any number of dates is an array lookup.
+    """
+
+    def __init__(self, start=CALENDAR_START, end=CALENDAR_END, holidays=None):
+        self.start = np.datetime64(pd.Timestamp(start), "D")
+        self.end = np.datetime64(pd.Timestamp(end), "D")
+        if holidays is None:
+            holidays = get_bank_holidays(
+                pd.Timestamp(start).year, pd.Timestamp(end).year
+            )
+
+        num_days = int((self.end - self.start).astype(int)) + 1
+        days = self.start + np.arange(num_days)
+        self.is_business_day = np.is_busday(
+            days, holidays=pd.DatetimeIndex(holidays).to_numpy(dtype="datetime64[D]")
+        )
+
+        index = np.arange(num_days)
+        self.next_business_day = np.minimum.accumulate(
+            np.where(self.is_business_day, index, num_days - 1)[::-1]
+        )[::-1]
+        self.previous_business_day = np.maximum.accumulate(
+            np.where(self.is_business_day, index, 0)
+        )
+
+    def get_hash(self) -> str:
+        """Content hash of the range and business days, holidays included"""
+        return hashlib.sha1(
+            f"{self.start}:{self.end}:".encode() + self.is_business_day.tobytes()
+        ).hexdigest()
+
+    def _to_index(self, dates) -> np.ndarray:
+        days = np.asarray(dates, dtype="datetime64[D]")
+        if len(days) and (days.min() < self.start or days.max() > self.end):
+            raise ValueError(f"Dates outside the calendar {self.start} to {self.end}")
+        return (days - self.start).astype(int)
+
+    def _to_dates(self, index) -> np.ndarray:
+        return (self.start + index).astype("datetime64[ns]")
+
+    def is_business(self, dates) -> np.ndarray:
+        return self.is_business_day[self._to_index(dates)]
+
+    def roll(self, dates, convention) -> np.ndarray:
+        """Move dates off non-business days following the convention"""
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        if convention == "":
+            return dates
+        index = self._to_index(dates)
+        if convention == "following":
+            return self._to_dates(self.next_business_day[index])
+        if convention == "preceding":
+            return self._to_dates(self.previous_business_day[index])
+        if convention == "modifiedFollowing":
+            following = self._to_dates(self.next_business_day[index])
+            # stay in the month by rolling back instead
+            crosses_month = following.astype("datetime64[M]") != dates.astype(
+                "datetime64[M]"
+            )
+            preceding = self._to_dates(self.previous_business_day[index])
+            return np.where(crosses_month, preceding, following)
+        raise ValueError(f"Unknown roll convention: {convention}")
+
+
+@lru_cache(maxsize=None)
+def get_default_business_calendar() -> BusinessCalendar:
+    return BusinessCalendar()
+
+
+# %%
+# Functions: Occurrence Generators #
+
+
+def _get_months(start, end) -> np.ndarray:
+    return np.arange(
+        np.datetime64(start, "M"), np.datetime64(end, "M") + 1, dtype="datetime64[M]"
+    )
+
+
+def _clamp_to_month(months, day) -> np.ndarray:
+    """Day of each month, the last day of the months shorter than day"""
+    month_starts = months.astype("datetime64[D]")
+    month_lengths = ((months + 1).astype("datetime64[D]") - month_starts).astype(int)
+    return month_starts + (np.minimum(day, month_lengths) - 1)
+
+
+def _make_interval_generator(anchor, num_days):
+    anchor = np.datetime64(anchor, "D")
+
+    def generate(start, end):
+        # first multiple of num_days from the anchor on or after start
+        first = (
+            anchor + int(np.ceil((start - anchor).astype(int) / num_days)) * num_days
+        )
+        return np.arange(first, end + 1, num_days, dtype="datetime64[D]")
+
+    return generate
+
+
+def _make_monthly_generator(ls_days):
+    def generate(start, end):
+        months = _get_months(start, end)
+        return np.sort(
+            np.concatenate([_clamp_to_month(months, day) for day in ls_days])
+        )
+
+    return generate
+
+
+def _make_nth_weekday_generator(n, weekday):
+    def generate(start, end):
+        months = _get_months(start, end)
+        if n > 0:
+            month_starts = months.astype("datetime64[D]")
+            # 1970-01-01 was a Thursday, weekday 3 counting from Monday
+            first_weekdays = (month_starts.astype(int) + 3) % 7
+            dates = month_starts + (weekday - first_weekdays) % 7 + 7 * (n - 1)
+        else:
+            month_ends = (months + 1).astype("datetime64[D]") - 1
+            last_weekdays = (month_ends.astype(int) + 3) % 7
+            dates = month_ends - (last_weekdays - weekday) % 7 - 7 * (-n - 1)
+        # a fifth weekday does not exist in every month
+        return dates[dates.astype("datetime64[M]") == months]
+
+    return generate
+
+
+def _make_yearly_generator(month, day):
+    def generate(start, end):
+        years = np.arange(
+            np.datetime64(start, "Y"),
+            np.datetime64(end, "Y") + 1,
+            dtype="datetime64[Y]",
+        )
+        months = years.astype("datetime64[M]") + (month - 1)
+        return _clamp_to_month(months, day)
+
+    return generate
+
+
+def _make_last_business_day_generator(business_calendar):
+    def generate(start, end):
+        months = _get_months(start, end)
+        month_ends = (months + 1).astype("datetime64[D]") - 1
+        return business_calendar.roll(month_ends, "preceding").astype("datetime64[D]")
+
+    return generate
+
+
+def _parse_weekday(text) -> int:
+    text = text.strip()[:3].title()
+    if text not in LS_WEEKDAYS:
+        raise ValueError(f"Unknown weekday: {text}")
+    return LS_WEEKDAYS.index(text)
+
+
+@lru_cache(maxsize=None)
+def compile_rule(rule_type, when, after_days=0, business_calendar=None):
+    """Vectorized occurrence generator of one recurrence rule
+
+    The generator takes a start and end datetime64[D] and returns every
+    occurrence between them, possibly with a few outside the range which the
+    caller trims. When formats by rule type:
+
+    - oncely: 2/29/2024
+    - yearly: 13-Jul, clamped to the end of short months
+    - monthly: 25, clamped to the end of short months
+    - biweekly: an occurrence date, 2/29/2024
+    - everyXDays: an occurrence date, repeating every AfterDays days
+    - weekly: a weekday or a comma separated list of them, Fri or Mon,Thu
+    - semiMonthly: comma separated days of the month, 1,15 or 15,31
+    - nthWeekday: n and a weekday, 2 Tue for the second Tuesday, -1 Fri for the last
+    - lastBusinessDay: blank, the last business day of each month
+    """
+    when = str(when).strip()
+    if rule_type == "oncely":
+        date = np.datetime64(parse_date(when, DICT_WHEN_FORMATS["oncely"]), "D")
+        return lambda start, end: np.array([date])
+    if rule_type == "yearly":
+        date = parse_date(when, DICT_WHEN_FORMATS["yearly"])
+        return _make_yearly_generator(date.month, date.day)
+    if rule_type == "monthly":
+        return _make_monthly_generator([int(when)])
+    if rule_type == "biweekly":
+        return _make_interval_generator(
+            parse_date(when, DICT_WHEN_FORMATS["biweekly"]), 14
+        )
+    if rule_type == "everyXDays":
+        if int(after_days) <= 0:
+            raise ValueError(f"everyXDays needs a positive AfterDays, got {after_days}")
+        return _make_interval_generator(
+            parse_date(when, DICT_WHEN_FORMATS["everyXDays"]), int(after_days)
+        )
+    if rule_type == "weekly":
+        ls_generators = [
+            # 1970-01-05 was a Monday
+            _make_interval_generator(
+                np.datetime64("1970-01-05") + _parse_weekday(day), 7
+            )
+            for day in when.split(",")
+        ]
+        return lambda start, end: np.sort(
+            np.concatenate([generate(start, end) for generate in ls_generators])
+        )
+    if rule_type == "semiMonthly":
+        return _make_monthly_generator([int(day) for day in when.split(",")])
+    if rule_type == "nthWeekday":
+        n, weekday = when.split()
+        if int(n) == 0 or abs(int(n)) > 5:
+            raise ValueError(f"nthWeekday needs n between -5 and 5, got {n}")
+        return _make_nth_weekday_generator(int(n), _parse_weekday(weekday))
+    if rule_type == "lastBusinessDay":
+        return _make_last_business_day_generator(
+            business_calendar or get_default_business_calendar()
+        )
+    raise ValueError(f"Unknown recurrence type: {rule_type}")
+
+
+# %%
+# Functions: Occurrences #
+
+
+def get_rule_keys(df_rules) -> pd.Series:
+    """Identity of each rule, repeated rules are told apart by their ordinal"""
+    ls_columns = [
+        column for column in LS_RULE_KEY_COLUMNS if column in df_rules.columns
+    ]
+    rule_keys = df_rules[ls_columns[0]].astype(str)
+    for column in ls_columns[1:]:
+        rule_keys = rule_keys + "|" + df_rules[column].astype(str)
+    ordinals = rule_keys.groupby(rule_keys).cumcount()
+    return rule_keys + "|" + ordinals.astype(str)
+
+
+def get_occurrence_ids(rule_keys, scheduled_dates) -> np.ndarray:
+    """Deterministic ids from rule keys and scheduled dates
+
+    The hash is prefixed with a letter so Sheets never reads an id made of
+    digits, or digits around an e, as a number.
+    """
+    occurrence_keys = (
+        pd.Series(rule_keys, dtype=str).to_numpy()
+        + "|"
+        + np.datetime_as_string(
+            np.asarray(scheduled_dates, dtype="datetime64[D]"), unit="D"
+        )
+    )
+    hashes = pd.util.hash_array(occurrence_keys.astype(object))
+    return np.array([f"o{value:016x}" for value in hashes], dtype=object)
+
+
+def generate_occurrences(df_rules, start, end, business_calendar=None):
+    """One row per occurrence of every rule between start and end inclusive
+
+    df_rules carries Type, When and AfterDays and optionally Business_Day_Roll,
+    rows of unknown types are skipped. The occurrence date is in Date and
+    the rows are ordered by date, then rule type, then sheet order. Each row
+    gets an Occurrence_ID from its rule and scheduled date, so it is stable
+    across runs and business-day rolls.
+    """
+    business_calendar = business_calendar or get_default_business_calendar()
+    start = np.datetime64(pd.Timestamp(start), "D")
+    end = np.datetime64(pd.Timestamp(end), "D")
+    if "Business_Day_Roll" in df_rules.columns:
+        roll_conventions = df_rules["Business_Day_Roll"].fillna("").astype(str)
+    else:
+        roll_conventions = pd.Series("", index=df_rules.index)
+    # generate a little wider so a rolled occurrence can move into the range
+    generate_start = start - 7
+    generate_end = end + 7
+
+    ls_positions, ls_dates, ls_scheduled_dates = [], [], []
+    for position, (rule_type, when, after_days, convention) in enumerate(
+        zip(
+            df_rules["Type"],
+            df_rules["When"],
+            df_rules["AfterDays"],
+            roll_conventions,
+        )
+    ):
+        if rule_type not in LS_RULE_TYPES:
+            continue
+        if convention not in LS_ROLL_CONVENTIONS:
+            raise ValueError(f"Unknown roll convention: {convention}")
+        generate = compile_rule(rule_type, when, after_days, business_calendar)
+        dates = generate(generate_start, generate_end)
+        scheduled_dates = dates[(dates >= generate_start) & (dates <= generate_end)]
+        dates = business_calendar.roll(scheduled_dates, convention).astype(
+            "datetime64[D]"
+        )
+        in_range = (dates >= start) & (dates <= end)
+        ls_positions.append(np.full(in_range.sum(), position))
+        ls_dates.append(dates[in_range])
+        ls_scheduled_dates.append(scheduled_dates[in_range])
+
+    if not ls_dates:
+        return df_rules.iloc[0:0].assign(
+            Date=pd.Series(dtype="datetime64[ns]"),
+            Occurrence_ID=pd.Series(dtype=object),
+        )
+    positions = np.concatenate(ls_positions)
+    dates = np.concatenate(ls_dates).astype("datetime64[ns]")
+    occurrence_ids = get_occurrence_ids(
+        get_rule_keys(df_rules).to_numpy()[positions],
+        np.concatenate(ls_scheduled_dates),
+    )
+
+    type_ranks = (
+        df_rules["Type"].map({name: i for i, name in enumerate(LS_RULE_TYPES)})
+    ).to_numpy()[positions]
+    order = np.lexsort((positions, type_ranks, dates))
+
+    df_occurrences = df_rules.iloc[positions[order]].reset_index(drop=True)
+    df_occurrences["Date"] = dates[order]
+    df_occurrences["Occurrence_ID"] = occurrence_ids[order]
+    return df_occurrences
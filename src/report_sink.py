@@ -0,0 +1,184 @@
+# %%
+# Running Imports #
+
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+
+from config import data_dir
+
+# %%
+# Vars #
+
+REPORT_JOURNAL_DIR = os.path.join(data_dir, "report_journal")
+MAX_JOURNAL_NAME_LENGTH = 60
+
+
+# %%
+# Functions: Journal #
+
+
+def get_journal_dir(*ls_target_parts, journal_root=REPORT_JOURNAL_DIR) -> str:
+    """Journal directory of one write target, like a backend and book name
+
+    A sink only replays the writes journaled for its own target. The name
+    keeps a readable prefix, the hash tells apart targets it would merge.
+    """
+    target = "|".join(str(part) for part in ls_target_parts if part is not None)
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", target)[:MAX_JOURNAL_NAME_LENGTH]
+    target_hash = hashlib.sha1(target.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(journal_root, f"{name}_{target_hash}")
+
+
+def get_journal_file_path(journal_dir, key) -> str:
+    file_name = re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+    return os.path.join(journal_dir, f"{file_name}.pkl")
+
+
+def write_journal_entry(journal_dir, entry):
+    """Atomically persist a pending write, replacing any older one for its key"""
+    file_path = get_journal_file_path(journal_dir, entry["key"])
+    tmp_file_path = f"{file_path}.tmp"
+    with open(tmp_file_path, "wb") as file:
+        pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_file_path, file_path)
+
+
+def read_journal_entries(journal_dir) -> list:
+    """Pending writes left behind by an earlier run, oldest first"""
+    ls_entries = []
+    for file_name in os.listdir(journal_dir):
+        if not file_name.endswith(".pkl"):
+            continue
+        with open(os.path.join(journal_dir, file_name), "rb") as file:
+            ls_entries.append(pickle.load(file))
+    return sorted(ls_entries, key=lambda entry: entry["seq"])
+
+
+# %%
+# Class #
+
+
+class ReportSink:
+    """Write-behind queue for finished report writes
+
+    submit journals the write to local disk and returns, a background thread
+    hands it to the registered writer. Writes are keyed by the tab they
+    replace, so a newer write to the same tab supersedes one that has not
+    been flushed yet. Entries left in the journal by a crash or by a write
+    that kept failing are replayed when the next sink starts on the same
+    directory.
+    """
+
+    def __init__(self, dict_writers, journal_dir=REPORT_JOURNAL_DIR):
+        self.dict_writers = dict_writers
+        self.journal_dir = journal_dir
+        os.makedirs(self.journal_dir, exist_ok=True)
+
+        self._condition = threading.Condition()
+        self._dict_pending = {}
+        self._dict_journal_seqs = {}
+        self._num_in_flight = 0
+        self._closed = False
+
+        for entry in read_journal_entries(self.journal_dir):
+            self._dict_pending[entry["key"]] = entry
+            self._dict_journal_seqs[entry["key"]] = entry["seq"]
+
+        self._thread = threading.Thread(
+            target=self._flush_loop, name="report_sink", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, key, writer, **kwargs):
+        """Queue writer(**kwargs) to replace whatever was last written to key"""
+        if writer not in self.dict_writers:
+            raise ValueError(f"Unknown report writer: {writer}")
+
+        entry = {"key": key, "writer": writer, "seq": time.time_ns(), "kwargs": kwargs}
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("ReportSink is closed")
+            write_journal_entry(self.journal_dir, entry)
+            self._dict_journal_seqs[key] = entry["seq"]
+            # re-inserting moves the key to the back so tabs flush in order
+            self._dict_pending.pop(key, None)
+            self._dict_pending[key] = entry
+            self._condition.notify_all()
+
+    def num_pending(self) -> int:
+        with self._condition:
+            return len(self._dict_pending) + self._num_in_flight
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while not self._dict_pending and not self._closed:
+                    self._condition.wait()
+                if not self._dict_pending:
+                    return
+                key = next(iter(self._dict_pending))
+                entry = self._dict_pending.pop(key)
+                self._num_in_flight += 1
+
+            try:
+                # the writers retry with backoff themselves
+                self.dict_writers[entry["writer"]](**entry["kwargs"])
+                failed = False
+            except Exception as error:
+                print(f"Report write to {key} failed, keeping it journaled: {error!r}")
+                failed = True
+
+            with self._condition:
+                self._num_in_flight -= 1
+                superseded = self._dict_journal_seqs.get(key) != entry["seq"]
+                if not failed and not superseded:
+                    os.remove(get_journal_file_path(self.journal_dir, key))
+                    del self._dict_journal_seqs[key]
+                self._condition.notify_all()
+
+    def flush(self, timeout=None) -> bool:
+        """Wait until every submitted write has been attempted, False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._dict_pending and self._num_in_flight == 0,
+                timeout=timeout,
+            )
+
+    def close(self, timeout=None):
+        """Flush what is pending and stop the flusher, failed writes stay journaled"""
+        self.flush(timeout=timeout)
+        with self._condition:
+            self._closed = True
+            self._dict_pending.clear()
+            self._condition.notify_all()
+        self._thread.join(timeout=timeout)
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    def print_write(sheet_name, df):
+        print(f"writing {sheet_name}")
+        print(df)
+
+    report_sink = ReportSink({"sheet": print_write})
+    for i in range(3):
+        report_sink.submit(
+            "Example_Report",
+            "sheet",
+            sheet_name="Example_Report",
+            df=pd.DataFrame({"Run": [i]}),
+        )
+    report_sink.close()
+
+
+# %%
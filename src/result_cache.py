@@ -0,0 +1,141 @@
+# %%
+# Running Imports #
+
+import hashlib
+import os
+import pickle
+
+import pandas as pd
+
+from config import data_dir
+
+# %%
+# Vars #
+
+RESULT_CACHE_DIR = os.path.join(data_dir, "result_cache")
+# results kept per name, the least recently used are removed past this
+MAX_ENTRIES_PER_NAME = 100
+# part of every key, bump it when a code change alters the results cached so
+# the pickles computed by the old code are no longer read back
+CACHE_VERSION = 1
+
+
+# %%
+# Functions: Hashing #
+
+
+def hash_frame(df) -> str:
+    """Content hash of a frame covering its values, dtypes and column names"""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    schema = str([(str(column), str(dtype)) for column, dtype in df.dtypes.items()])
+    return hashlib.sha1(row_hashes.tobytes() + schema.encode()).hexdigest()
+
+
+def get_cache_key(dict_frames, as_of=None, **params) -> str:
+    """Key of a result computed from the frames, the as-of date and params
+
+    Inputs that are not frames, like the business calendar, go in params as
+    their own content hash.
+    """
+    ls_parts = [f"version={CACHE_VERSION}"]
+    ls_parts += [f"{name}={hash_frame(df)}" for name, df in sorted(dict_frames.items())]
+    if as_of is not None:
+        ls_parts.append(f"as_of={pd.Timestamp(as_of).date()}")
+    ls_parts += [f"{name}={value!r}" for name, value in sorted(params.items())]
+    return hashlib.sha1("|".join(ls_parts).encode()).hexdigest()
+
+
+# %%
+# Functions: Files #
+
+
+def _write_pickle_atomically(file_path, value):
+    tmp_file_path = f"{file_path}.tmp"
+    with open(tmp_file_path, "wb") as file:
+        pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file_path, file_path)
+
+
+# %%
+# Class #
+
+
+class ResultCache:
+    """Computed results on local disk keyed by the hash of their inputs
+
+    A result is stored under the hash of the typed input frames, the as-of
+    date and any parameters, so an unchanged input on the same day is read
+    back instead of recomputed. The last result computed for each as-of date
+    is also indexed by that date, which lets a past forecast be looked up
+    without the inputs it was computed from.
+    """
+
+    def __init__(
+        self, cache_dir=RESULT_CACHE_DIR, max_entries_per_name=MAX_ENTRIES_PER_NAME
+    ):
+        self.cache_dir = cache_dir
+        self.max_entries_per_name = max_entries_per_name
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _get_name_dir(self, name) -> str:
+        name_dir = os.path.join(self.cache_dir, name)
+        os.makedirs(name_dir, exist_ok=True)
+        return name_dir
+
+    def _get_result_file_path(self, name, key) -> str:
+        return os.path.join(self._get_name_dir(name), f"{key}.pkl")
+
+    def _get_as_of_file_path(self, name, as_of) -> str:
+        as_of_dir = os.path.join(self._get_name_dir(name), "as_of")
+        os.makedirs(as_of_dir, exist_ok=True)
+        return os.path.join(as_of_dir, f"{pd.Timestamp(as_of).date()}.pkl")
+
+    def get(self, name, key):
+        """The cached result or None"""
+        file_path = self._get_result_file_path(name, key)
+        try:
+            with open(file_path, "rb") as file:
+                value = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        # touch the entry so pruning keeps recently read results
+        os.utime(file_path)
+        return value
+
+    def put(self, name, key, value, as_of=None):
+        _write_pickle_atomically(self._get_result_file_path(name, key), value)
+        if as_of is not None:
+            _write_pickle_atomically(self._get_as_of_file_path(name, as_of), key)
+        self.prune(name)
+
+    def get_or_compute(self, name, dict_frames, compute_func, as_of=None, **params):
+        """Cached result of compute_func for these inputs, computing it on a miss"""
+        key = get_cache_key(dict_frames, as_of=as_of, **params)
+        value = self.get(name, key)
+        if value is None:
+            value = compute_func()
+            self.put(name, key, value, as_of=as_of)
+        return value
+
+    def get_as_of(self, name, as_of):
+        """Last result of name computed for the as-of date, or None"""
+        try:
+            with open(self._get_as_of_file_path(name, as_of), "rb") as file:
+                key = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        return self.get(name, key)
+
+    def prune(self, name):
+        """Remove the least recently used results of name past the limit"""
+        name_dir = self._get_name_dir(name)
+        ls_file_paths = [
+            os.path.join(name_dir, file_name)
+            for file_name in os.listdir(name_dir)
+            if file_name.endswith(".pkl")
+        ]
+        if len(ls_file_paths) <= self.max_entries_per_name:
+            return
+        ls_file_paths.sort(key=os.path.getmtime)
+        for file_path in ls_file_paths[: -self.max_entries_per_name]:
+            os.remove(file_path)
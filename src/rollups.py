@@ -0,0 +1,153 @@
+# %%
+# Running Imports #
+
+import numpy as np
+import pandas as pd
+
+# %%
+# Vars #
+
+# finest first, reports use the finest resolution that fits in MAX_REPORT_ROWS
+DICT_ROLLUP_FREQS = {
+    "D": "Daily",
+    "W": "Weekly",
+    "M": "Monthly",
+    "Y": "Yearly",
+}
+MAX_REPORT_ROWS = 800
+DICT_ROLLUP_DTYPES = {
+    "Period_Start": "datetime64[ns]",
+    "Period_End": "datetime64[ns]",
+    "Inflows": "int64",
+    "Outflows": "int64",
+    "Net": "int64",
+    "End_Balance": "int64",
+    "Min_Balance": "int64",
+    "Num_Transactions": "int64",
+}
+
+
+# %%
+# Functions #
+
+
+def get_report_freq(start_date, end_date, max_rows=MAX_REPORT_ROWS) -> str:
+    """Finest resolution whose number of periods stays within max_rows"""
+    for freq in DICT_ROLLUP_FREQS:
+        num_periods = len(pd.period_range(start_date, end_date, freq=freq))
+        if num_periods <= max_rows:
+            return freq
+    return "Y"
+
+
+def compute_rollup(
+    dates, flows, running_balances, freq, starting_balance=None
+) -> pd.DataFrame:
+    """Inflows, outflows, end and minimum balance for each period
+
+    dates must be sorted, flows are the int64 cents applied to the running
+    balance on each row. Segments come from a searchsorted of the period
+    starts into the dates and are reduced with reduceat, periods without
+    any rows carry the previous balance forward.
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    flows = np.asarray(flows, dtype=np.int64)
+    running_balances = np.asarray(running_balances, dtype=np.int64)
+    if starting_balance is None:
+        starting_balance = running_balances[0] - flows[0] if len(flows) else 0
+    # a forecast without rows, say no rules inside the horizon, has no periods
+    if len(dates) == 0:
+        return pd.DataFrame(columns=list(DICT_ROLLUP_DTYPES)).astype(DICT_ROLLUP_DTYPES)
+
+    periods = pd.period_range(dates[0], dates[-1], freq=freq)
+    period_starts = periods.start_time.to_numpy().astype("datetime64[D]")
+
+    segment_starts = np.searchsorted(dates, period_starts, side="left")
+    segment_ends = np.append(segment_starts[1:], len(dates))
+    non_empty = segment_starts < segment_ends
+    starts = segment_starts[non_empty]
+
+    inflows = np.zeros(len(periods), dtype=np.int64)
+    outflows = np.zeros(len(periods), dtype=np.int64)
+    num_transactions = segment_ends - segment_starts
+    end_balances = np.full(len(periods), np.nan)
+    min_balances = np.full(len(periods), np.nan)
+
+    inflows[non_empty] = np.add.reduceat(np.maximum(flows, 0), starts)
+    outflows[non_empty] = np.add.reduceat(np.minimum(flows, 0), starts)
+    end_balances[non_empty] = running_balances[segment_ends[non_empty] - 1]
+    min_balances[non_empty] = np.minimum.reduceat(running_balances, starts)
+
+    # empty periods sit at the balance the previous period ended on
+    end_balances = pd.Series(end_balances).ffill().fillna(starting_balance).to_numpy()
+    start_balances = np.concatenate([[starting_balance], end_balances[:-1]])
+    min_balances = np.where(
+        non_empty, np.minimum(min_balances, start_balances), end_balances
+    )
+
+    df_rollup = pd.DataFrame(
+        {
+            "Period_Start": periods.start_time.normalize(),
+            "Period_End": periods.end_time.normalize(),
+            "Inflows": inflows,
+            "Outflows": outflows,
+            "Net": inflows + outflows,
+            "End_Balance": np.rint(end_balances).astype(np.int64),
+            "Min_Balance": np.rint(min_balances).astype(np.int64),
+            "Num_Transactions": num_transactions,
+        }
+    )
+
+    return df_rollup
+
+
+def compute_forecast_rollups(
+    df_future_cast, starting_balance=None, min_date=None
+) -> dict:
+    """Weekly, monthly and yearly rollups of a sorted forecast
+
+    Rows before min_date are left out, they only set the balance the first
+    period starts from.
+    """
+    # paid rows are already part of the current balance
+    unpaid = (df_future_cast["Date_Paid"].fillna("") == "").to_numpy()
+    flows = np.where(unpaid, df_future_cast["Amount"].to_numpy(dtype=np.int64), 0)
+    dates = pd.to_datetime(df_future_cast["Date"]).to_numpy()
+    running_balances = df_future_cast["Running_Balance"].to_numpy(dtype=np.int64)
+    if min_date is not None:
+        num_before = int(
+            np.searchsorted(dates, pd.Timestamp(min_date).to_datetime64(), "left")
+        )
+        if num_before:
+            starting_balance = running_balances[num_before - 1]
+        dates = dates[num_before:]
+        flows = flows[num_before:]
+        running_balances = running_balances[num_before:]
+
+    dict_rollups = {
+        freq: compute_rollup(dates, flows, running_balances, freq, starting_balance)
+        for freq in DICT_ROLLUP_FREQS
+        if freq != "D"
+    }
+
+    return dict_rollups
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    df_example = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2030-01-01", "2030-01-01", "2030-03-15"]),
+            "Amount": [-10000, 250000, -90000],
+            "Date_Paid": "",
+        }
+    )
+    df_example["Running_Balance"] = 100000 + df_example["Amount"].cumsum()
+    for freq, df_rollup in compute_forecast_rollups(df_example).items():
+        print(freq)
+        print(df_rollup)
+
+
+# %%
@@ -0,0 +1,213 @@
+# %%
+# Running Imports #
+
+import numpy as np
+import pandas as pd
+
+# %%
+# Vars #
+
+# serial day 0 of Google Sheets and Excel dates
+SERIAL_DATE_ORIGIN = "1899-12-30"
+FORMATTED_VALUE = "FORMATTED_VALUE"
+UNFORMATTED_VALUE = "UNFORMATTED_VALUE"
+SERIAL_NUMBER = "SERIAL_NUMBER"
+
+
+# %%
+# Functions: Ranges #
+
+
+def get_column_letter(index) -> str:
+    """Column letter of a zero based column index"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def quote_sheet_name(sheet_name) -> str:
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+
+def get_a1_range(sheet_name, first_index, last_index, first_row, last_row=None) -> str:
+    """A1 range over zero based columns, open ended downwards without last_row"""
+    return (
+        f"{quote_sheet_name(sheet_name)}!"
+        f"{get_column_letter(first_index)}{first_row}:"
+        f"{get_column_letter(last_index)}{'' if last_row is None else last_row}"
+    )
+
+
+def get_column_runs(ls_header, ls_columns, ls_typed_columns=()) -> list:
+    """Contiguous runs of the wanted columns of a header
+
+    Each run is (first_index, last_index, typed), columns fetched as typed
+    values and as display strings never share a run since the render option
+    is set per request. Wanted columns missing from the header are skipped.
+    """
+    ls_runs = []
+    for index, column in enumerate(ls_header):
+        if column not in ls_columns:
+            continue
+        typed = column in ls_typed_columns
+        if ls_runs and ls_runs[-1][1] == index - 1 and ls_runs[-1][2] == typed:
+            ls_runs[-1] = (ls_runs[-1][0], index, typed)
+        else:
+            ls_runs.append((index, index, typed))
+    return ls_runs
+
+
+def get_first_row_on_or_after(date_values, min_date, first_row=2) -> int:
+    """Sheet row of the first serial date on or after min_date
+
+    Rows are not assumed sorted, everything from the earliest matching row
+    is fetched and rows before min_date are dropped after the fetch.
+    """
+    dates = serial_to_dates(date_values)
+    matching = np.flatnonzero((dates >= pd.Timestamp(min_date)).to_numpy())
+    if len(matching) == 0:
+        return first_row + len(date_values)
+    return first_row + int(matching[0])
+
+
+def get_num_requests(
+    ls_columns=None,
+    ls_typed_columns=(),
+    ls_date_columns=(),
+    min_date_column=None,
+    min_date=None,
+) -> int:
+    """Most Sheets API requests fetch_projected_sheet makes for these arguments"""
+    has_typed = bool(ls_typed_columns)
+    has_formatted = ls_columns is None or bool(set(ls_columns) - set(ls_typed_columns))
+    # the header, the date column for a lower bound, one per render option
+    return 1 + (min_date is not None) + has_typed + has_formatted
+
+
+# %%
+# Functions: Values #
+
+
+def serial_to_dates(values) -> pd.Series:
+    """Serial day numbers as datetime64 normalized to midnight, blanks as NaT
+
+    Dates typed into a cell as plain text come back as that text, they are
+    parsed as date strings instead.
+    """
+    series = pd.Series(values, dtype=object)
+    numbers = pd.to_numeric(series, errors="coerce")
+    dates = pd.to_datetime(numbers, unit="D", origin=SERIAL_DATE_ORIGIN)
+    is_text = numbers.isna() & (series.astype(str).str.strip() != "")
+    if is_text.any():
+        dates[is_text] = pd.to_datetime(series[is_text].astype(str), errors="coerce")
+    return dates.dt.normalize()
+
+
+def to_typed_numbers(values) -> pd.Series:
+    """Unformatted cell values as floats, blanks as NaN
+
+    Numbers typed into a cell as plain text come back as that text, the
+    column is then left as strings for the getters to parse.
+    """
+    series = pd.Series(values, dtype=object)
+    numbers = pd.to_numeric(series, errors="coerce")
+    if (numbers.isna() & (series.astype(str).str.strip() != "")).any():
+        return series.astype(str)
+    return numbers.astype(float)
+
+
+def build_projected_frame(ls_header, ls_runs, ls_value_blocks, ls_date_columns=()):
+    """Frame of the fetched runs, the API leaves out trailing blank cells and rows
+
+    Display string columns stay strings, typed columns become floats, and
+    typed date columns datetime64.
+    """
+    num_rows = max((len(block) for block in ls_value_blocks), default=0)
+    dict_columns = {}
+    for (first_index, last_index, typed), block in zip(ls_runs, ls_value_blocks):
+        width = last_index - first_index + 1
+        padded = [list(row) + [""] * (width - len(row)) for row in block]
+        padded += [[""] * width] * (num_rows - len(block))
+        for offset in range(width):
+            column = ls_header[first_index + offset]
+            values = [row[offset] for row in padded]
+            if not typed:
+                dict_columns[column] = pd.Series(values, dtype=object).astype(str)
+            elif column in ls_date_columns:
+                dict_columns[column] = serial_to_dates(values)
+            else:
+                dict_columns[column] = to_typed_numbers(values)
+
+    # keep the sheet's column order
+    ls_columns = [column for column in ls_header if column in dict_columns]
+    return pd.DataFrame({column: dict_columns[column] for column in ls_columns})
+
+
+# %%
+# Functions: Fetch #
+
+
+def fetch_projected_sheet(
+    values_batch_get,
+    sheet_name,
+    ls_columns=None,
+    ls_typed_columns=(),
+    ls_date_columns=(),
+    min_date_column=None,
+    min_date=None,
+) -> pd.DataFrame:
+    """Fetch only the wanted columns, and rows from min_date on, of a tab
+
+    values_batch_get(ls_ranges, value_render_option, date_time_render_option)
+    returns the values of each range. The header row is read first, then the
+    min_date_column if a lower bound is given, then one request per render
+    option for the minimal ranges covering the wanted columns.
+    """
+    ls_header = values_batch_get(
+        [f"{quote_sheet_name(sheet_name)}!1:1"], FORMATTED_VALUE, SERIAL_NUMBER
+    )[0]
+    ls_header = [str(column) for column in (ls_header[0] if ls_header else [])]
+    if ls_columns is None:
+        ls_columns = [column for column in ls_header if column != ""]
+
+    first_row = 2
+    if min_date is not None:
+        if min_date_column not in ls_header:
+            raise ValueError(f"{sheet_name} has no {min_date_column} column")
+        date_index = ls_header.index(min_date_column)
+        date_block = values_batch_get(
+            [get_a1_range(sheet_name, date_index, date_index, first_row)],
+            UNFORMATTED_VALUE,
+            SERIAL_NUMBER,
+        )[0]
+        first_row = get_first_row_on_or_after(
+            [row[0] if row else "" for row in date_block], min_date
+        )
+
+    ls_runs = get_column_runs(ls_header, ls_columns, ls_typed_columns)
+    ls_value_blocks = [None] * len(ls_runs)
+    for typed in [False, True]:
+        ls_run_indexes = [i for i, run in enumerate(ls_runs) if run[2] == typed]
+        if not ls_run_indexes:
+            continue
+        ls_blocks = values_batch_get(
+            [
+                get_a1_range(sheet_name, ls_runs[i][0], ls_runs[i][1], first_row)
+                for i in ls_run_indexes
+            ],
+            UNFORMATTED_VALUE if typed else FORMATTED_VALUE,
+            SERIAL_NUMBER,
+        )
+        for i, block in zip(ls_run_indexes, ls_blocks):
+            ls_value_blocks[i] = block
+
+    df = build_projected_frame(ls_header, ls_runs, ls_value_blocks, ls_date_columns)
+    if min_date is not None and min_date_column in df.columns:
+        dates = df[min_date_column]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, errors="coerce")
+        df = df[dates >= pd.Timestamp(min_date)].reset_index(drop=True)
+    return df
@@ -0,0 +1,399 @@
+# %%
+# Running Imports #
+
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from bank_adapters import combine_statements, read_statement
+from cash_flow_conversions import CENTS_PER_UNIT, to_as_of_date
+from config import data_dir
+from date_parsing import DICT_WHEN_FORMATS, parse_dates
+from result_cache import hash_frame
+
+# %%
+# Vars #
+
+SPENDING_HISTORY_DIR = os.path.join(data_dir, "spending_history")
+# bank statement CSVs dropped here are added on the next run
+STATEMENTS_DIR = os.path.join(data_dir, "statements")
+TRAILING_MONTHS = 12
+SEASONAL_YEARS = 3
+# occurrences a year of the rule types a monthly spend is spread over,
+# everyXDays rules use their AfterDays and yearly rules the seasonal spend of
+# their month instead
+DICT_OCCURRENCES_PER_YEAR = {
+    "monthly": 12,
+    "weekly": 52,
+    "biweekly": 26,
+    "semiMonthly": 24,
+    "nthWeekday": 12,
+    "lastBusinessDay": 12,
+}
+LS_MONTHLY_COLUMNS = ["Description", "Category", "Month", "Spend", "Num_Transactions"]
+LS_FILE_MONTHLY_COLUMNS = ["File_Name"] + LS_MONTHLY_COLUMNS
+LS_SUGGESTION_COLUMNS = [
+    "Account_Name",
+    "Type",
+    "When",
+    "Amount",
+    "Suggested_Amount",
+    "AverageMonthlyCost",
+    "Suggested_AverageMonthlyCost",
+]
+
+
+# %%
+# Functions: Spending #
+
+
+def hash_file(file_path) -> str:
+    """Content hash of a statement file"""
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_monthly_spend(df_transactions) -> pd.DataFrame:
+    """Spend in cents of each description, category and month
+
+    Refunds net against charges. Descriptions repeat from month to month, so
+    this stays far smaller than the transactions it sums.
+    """
+    df_spend = pd.DataFrame(
+        {
+            "Description": df_transactions["description"].astype(str),
+            "Category": df_transactions["category"].astype(object).fillna(""),
+            "Month": df_transactions["post_date"].dt.to_period("M").dt.start_time,
+            "Spend": (-df_transactions["amount"].fillna(0) * CENTS_PER_UNIT)
+            .round()
+            .astype(np.int64),
+        }
+    ).dropna(subset=["Month"])
+    return (
+        df_spend.groupby(["Description", "Category", "Month"], sort=True)
+        .agg(Spend=("Spend", "sum"), Num_Transactions=("Spend", "size"))
+        .reset_index()[LS_MONTHLY_COLUMNS]
+    )
+
+
+def assign_spending_keys(df_monthly, ls_account_names) -> pd.Series:
+    """Income_Expense account each description is spent on, else its category
+
+    An account matches when its name appears in the description, longer
+    names are tried first so the most specific one wins. Descriptions with
+    neither, like card payments and transfers, get an empty key.
+    """
+    descriptions = df_monthly["Description"].str.lower()
+    keys = pd.Series("", index=df_monthly.index, dtype=object)
+    for account_name in sorted(set(ls_account_names), key=len, reverse=True):
+        matched = (keys == "") & descriptions.str.contains(
+            account_name.lower(), regex=False
+        )
+        keys[matched] = account_name
+    return keys.where(keys != "", df_monthly["Category"])
+
+
+def get_key_monthly_spend(df_monthly, ls_account_names) -> pd.DataFrame:
+    """Spend of each account or category and month"""
+    df_key_monthly = df_monthly.assign(
+        Key=assign_spending_keys(df_monthly, ls_account_names)
+    )
+    df_key_monthly = df_key_monthly[df_key_monthly["Key"] != ""]
+    return df_key_monthly.groupby(["Key", "Month"], sort=True, as_index=False)[
+        "Spend"
+    ].sum()
+
+
+def get_window_months(df_monthly, as_of, num_months) -> pd.DatetimeIndex:
+    """Complete months before the as-of month covered by the history"""
+    as_of_month = to_as_of_date(as_of).to_period("M")
+    first_month = max(
+        as_of_month - num_months,
+        (df_monthly["Month"].min().to_period("M") if len(df_monthly) else as_of_month),
+    )
+    return pd.period_range(first_month, as_of_month - 1, freq="M").start_time
+
+
+def get_trailing_monthly_spend(
+    df_key_monthly, as_of=None, num_months=TRAILING_MONTHS
+) -> pd.Series:
+    """Average spend a month of each key over the trailing complete months
+
+    Months without any spend count as zero, a history shorter than the
+    window is averaged over the months it covers.
+    """
+    months = get_window_months(df_key_monthly, as_of, num_months)
+    if len(months) == 0:
+        return pd.Series(dtype=float, name="Spend")
+    df_window = df_key_monthly[df_key_monthly["Month"].isin(months)]
+    return (df_window.groupby("Key")["Spend"].sum() / len(months)).rename("Spend")
+
+
+def get_seasonal_spend(
+    df_key_monthly, as_of=None, num_years=SEASONAL_YEARS
+) -> pd.Series:
+    """Average spend of each key in each month of the year over num_years"""
+    months = get_window_months(df_key_monthly, as_of, num_years * 12)
+    if len(months) == 0:
+        return pd.Series(
+            dtype=float,
+            name="Spend",
+            index=pd.MultiIndex.from_arrays([[], []], names=["Key", "Month_of_Year"]),
+        )
+    # years the window covers each month of the year
+    num_years_covered = pd.Series(months.month).value_counts()
+    df_window = df_key_monthly[df_key_monthly["Month"].isin(months)]
+    df_seasonal = df_window.groupby(["Key", df_window["Month"].dt.month])["Spend"].sum()
+    df_seasonal.index = df_seasonal.index.set_names(["Key", "Month_of_Year"])
+    return (
+        df_seasonal
+        / num_years_covered.reindex(
+            df_seasonal.index.get_level_values("Month_of_Year")
+        ).to_numpy()
+    ).rename("Spend")
+
+
+# %%
+# Functions: Suggestions #
+
+
+def suggest_income_expense_amounts(
+    df_income_expense, df_monthly, as_of=None
+) -> pd.DataFrame:
+    """Amounts and AverageMonthlyCost of the expense rules from actual spend
+
+    Rules are matched to spend by Account_Name, monthly style rules spread
+    the trailing monthly spend over their occurrences and yearly rules take
+    the seasonal spend of their month. Rules without matching spend, and
+    income rules, get no suggestion.
+    """
+    df_key_monthly = get_key_monthly_spend(
+        df_monthly, df_income_expense["Account_Name"].astype(str)
+    )
+    trailing_spend = get_trailing_monthly_spend(df_key_monthly, as_of)
+    seasonal_spend = get_seasonal_spend(df_key_monthly, as_of)
+
+    is_expense = df_income_expense["Amount"] < 0
+    monthly_spend = df_income_expense["Account_Name"].map(trailing_spend)
+    occurrences_per_year = df_income_expense["Type"].map(DICT_OCCURRENCES_PER_YEAR)
+    is_every_x_days = (df_income_expense["Type"] == "everyXDays") & (
+        df_income_expense["AfterDays"] > 0
+    )
+    occurrences_per_year[is_every_x_days] = (
+        365.25 / df_income_expense.loc[is_every_x_days, "AfterDays"]
+    )
+    suggested_amount = -monthly_spend * 12 / occurrences_per_year
+
+    is_yearly = df_income_expense["Type"] == "yearly"
+    if is_yearly.any():
+        df_yearly = df_income_expense[is_yearly]
+        month_of_year = parse_dates(
+            df_yearly["When"].astype(str),
+            format=DICT_WHEN_FORMATS["yearly"],
+            errors="coerce",
+        ).dt.month
+        suggested_amount[is_yearly] = -pd.Series(
+            seasonal_spend.reindex(
+                pd.MultiIndex.from_arrays([df_yearly["Account_Name"], month_of_year])
+            ).to_numpy(),
+            index=df_yearly.index,
+        )
+
+    df_suggestions = df_income_expense.assign(
+        Suggested_Amount=suggested_amount.where(is_expense).round().astype("Int64"),
+        Suggested_AverageMonthlyCost=monthly_spend.where(is_expense)
+        .round()
+        .astype("Int64"),
+    )
+    return df_suggestions[LS_SUGGESTION_COLUMNS]
+
+
+def apply_suggested_amounts(df_income_expense, df_suggestions) -> pd.DataFrame:
+    """Income_Expense with the suggested values in place where there are any"""
+    return df_income_expense.assign(
+        Amount=df_suggestions["Suggested_Amount"]
+        .fillna(df_income_expense["Amount"])
+        .astype(np.int64),
+        AverageMonthlyCost=df_suggestions["Suggested_AverageMonthlyCost"]
+        .fillna(df_income_expense["AverageMonthlyCost"])
+        .astype(np.int64),
+    )
+
+
+# %%
+# Class #
+
+
+class SpendingHistory:
+    """Monthly spend per account or category built up from bank statements
+
+    Only the monthly totals of each statement file are kept. A file is added
+    again only when its content changed, like a statement downloaded again
+    after more transactions posted, and its new totals then replace the old
+    ones. A new statement costs a pass over its own rows rather than the
+    whole transaction history.
+    """
+
+    def __init__(self, history_dir=SPENDING_HISTORY_DIR):
+        self.history_dir = history_dir
+        os.makedirs(self.history_dir, exist_ok=True)
+        # called with "spending_history" whenever statements are added
+        self._ls_refresh_listeners = []
+
+        self._monthly_path = os.path.join(self.history_dir, "monthly_spend.csv")
+        self._files_path = os.path.join(self.history_dir, "files.json")
+        if os.path.exists(self._monthly_path):
+            self.df_file_monthly = pd.read_csv(
+                self._monthly_path,
+                dtype={
+                    "File_Name": str,
+                    "Description": str,
+                    "Category": str,
+                    "Spend": np.int64,
+                    "Num_Transactions": np.int64,
+                },
+                keep_default_na=False,
+                parse_dates=["Month"],
+            )
+            if "File_Name" not in self.df_file_monthly.columns:
+                # histories from before per file totals, kept as one block
+                self.df_file_monthly.insert(0, "File_Name", "")
+        else:
+            self.df_file_monthly = pd.DataFrame(
+                {
+                    "File_Name": pd.Series(dtype=str),
+                    "Description": pd.Series(dtype=str),
+                    "Category": pd.Series(dtype=str),
+                    "Month": pd.Series(dtype="datetime64[ns]"),
+                    "Spend": pd.Series(dtype=np.int64),
+                    "Num_Transactions": pd.Series(dtype=np.int64),
+                }
+            )
+        # content hash of each file added, None for files added before hashes
+        self.dict_file_hashes = {}
+        if os.path.exists(self._files_path):
+            with open(self._files_path) as file:
+                files = json.load(file)
+            if isinstance(files, list):
+                files = dict.fromkeys(files)
+            self.dict_file_hashes = files
+
+    def add_refresh_listener(self, listener):
+        """Call listener with "spending_history" each time statements are added"""
+        self._ls_refresh_listeners.append(listener)
+
+    def _save(self):
+        tmp_monthly_path = f"{self._monthly_path}.tmp"
+        self.df_file_monthly.to_csv(tmp_monthly_path, index=False)
+        os.replace(tmp_monthly_path, self._monthly_path)
+        tmp_files_path = f"{self._files_path}.tmp"
+        with open(tmp_files_path, "w") as file:
+            json.dump(self.dict_file_hashes, file)
+        os.replace(tmp_files_path, self._files_path)
+
+    def is_added(self, file_name, content_hash) -> bool:
+        """Whether this content of the file is already in the history
+
+        Files added before content hashes were kept are never added again,
+        their totals cannot be told apart to be replaced.
+        """
+        if file_name not in self.dict_file_hashes:
+            return False
+        stored_hash = self.dict_file_hashes[file_name]
+        return stored_hash is None or stored_hash == content_hash
+
+    def add_transactions(self, df_transactions, dict_content_hashes=None) -> int:
+        """Sum the statements not in the history, or changed since, into it
+
+        df_transactions is in the bank_adapters schema. Each file_name is
+        identified by its content hash from dict_content_hashes, or by the
+        hash of its rows when not given. Returns the rows added.
+        """
+        dict_content_hashes = dict_content_hashes or {}
+        file_names = df_transactions["file_name"].astype(str)
+        dict_new_hashes = {}
+        for file_name, df_file in df_transactions.groupby(file_names, sort=True):
+            content_hash = dict_content_hashes.get(file_name) or hash_frame(
+                df_file.reset_index(drop=True)
+            )
+            if not self.is_added(file_name, content_hash):
+                dict_new_hashes[file_name] = content_hash
+        if not dict_new_hashes:
+            return 0
+
+        df_new = df_transactions[file_names.isin(dict_new_hashes)]
+        ls_file_monthly = [
+            get_monthly_spend(df_file).assign(File_Name=file_name)
+            for file_name, df_file in df_new.groupby(
+                df_new["file_name"].astype(str), sort=True
+            )
+        ]
+        # a changed file's new totals replace the ones it was added with
+        df_kept = self.df_file_monthly[
+            ~self.df_file_monthly["File_Name"].isin(dict_new_hashes)
+        ]
+        ls_frames = [df for df in [df_kept, *ls_file_monthly] if not df.empty]
+        if ls_frames:
+            self.df_file_monthly = pd.concat(ls_frames, ignore_index=True)[
+                LS_FILE_MONTHLY_COLUMNS
+            ]
+        else:
+            self.df_file_monthly = df_kept
+        self.dict_file_hashes.update(dict_new_hashes)
+        self._save()
+        for listener in self._ls_refresh_listeners:
+            listener("spending_history")
+        return len(df_new)
+
+    def add_statement_files(self, ls_file_paths) -> int:
+        """Read and add the statement files not added before, or changed since"""
+        dict_content_hashes = {}
+        ls_dfs = []
+        for file_path in ls_file_paths:
+            file_name = os.path.basename(file_path)
+            content_hash = hash_file(file_path)
+            if self.is_added(file_name, content_hash):
+                continue
+            dict_content_hashes[file_name] = content_hash
+            ls_dfs.append(read_statement(file_path, file_name))
+        if not ls_dfs:
+            return 0
+        return self.add_transactions(combine_statements(ls_dfs), dict_content_hashes)
+
+    def get_monthly_spend(self) -> pd.DataFrame:
+        """Spend of each description, category and month over every file"""
+        if self.df_file_monthly.empty:
+            return self.df_file_monthly[LS_MONTHLY_COLUMNS].copy(deep=False)
+        return (
+            self.df_file_monthly.groupby(
+                ["Description", "Category", "Month"], sort=True
+            )[["Spend", "Num_Transactions"]]
+            .sum()
+            .reset_index()[LS_MONTHLY_COLUMNS]
+        )
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    spending_history = SpendingHistory()
+    ls_file_paths = sorted(glob.glob(os.path.join(STATEMENTS_DIR, "*.csv")))
+    num_rows = spending_history.add_statement_files(ls_file_paths)
+    print(f"Added {num_rows} transactions from {STATEMENTS_DIR}")
+    # spend by statement category, accounts are matched when the forecast runs
+    print(
+        get_trailing_monthly_spend(
+            get_key_monthly_spend(spending_history.get_monthly_spend(), [])
+        )
+    )
+
+
+# %%
@@ -1,8 +1,12 @@
 # %%
 # Running Imports #
 
-import pandas as pd
+import asyncio
 
+from async_sheets import AsyncSheetsClient, call_with_backoff
+from bank_adapters import combine_statements, read_statement
+from cash_flow_conversions import format_date_columns
+from frame_cache import get_frame_view
 from readable_utils.display_tools import pprint_df, print_logger  # noqa F401
 from readable_utils.google_drive_tools import (
     download_and_get_drive_file_path,
@@ -24,94 +28,100 @@ dict_dfs = {}
 
 
 def get_transactions_files():
-    ls_transaction_files = get_file_list_from_folder_id_file_path(
-        laura_folder_id, [year]
+    ls_transaction_files = call_with_backoff(
+        get_file_list_from_folder_id_file_path, laura_folder_id, [year]
     )
     print(f"Files in Laura's folder: {ls_transaction_files}")
     return ls_transaction_files
 
 
-def read_chase_csv(file_path):
-    # index_col=False prevents pandas from using the first data column as the
-    # index when trailing commas create more fields than headers.
-    df = pd.read_csv(file_path, index_col=False, low_memory=False)
-    # Drop any unnamed columns (extra columns from trailing commas)
-    df = df.loc[:, ~df.columns.str.contains("^Unnamed")]
-    return df
+def read_transactions_file(file_path, file_name):
+    print(f"Reading file: {file_path}")
+    # the bank and account type come from the statement's header
+    return read_statement(file_path, file_name)
+
+
+def combine_transactions(ls_dfs):
+    df_all_transactions = combine_statements(ls_dfs)
+
+    df_all_transactions = df_all_transactions[
+        [
+            "account_type",
+            "file_name",
+            # "bank",
+            # "transaction_date",
+            "post_date",
+            "description",
+            # "category",
+            "type",
+            "amount",
+        ]
+    ]
+
+    print(f"All transactions DataFrame shape: {df_all_transactions.shape}")
+
+    return df_all_transactions
 
 
 def get_all_transactions():
     key = "all_transactions"
     if key in dict_dfs:
         print(f"Using cached DataFrame for key: {key}")
-        return dict_dfs[key].copy()
+        return get_frame_view(dict_dfs[key])
 
     ls_transaction_files = get_transactions_files()
     ls_dfs = []
 
     for file_obj in ls_transaction_files:
         # download the file
-        file_path = download_and_get_drive_file_path(
+        file_path = call_with_backoff(
+            download_and_get_drive_file_path,
             root_folder_id=laura_folder_id,
             ls_file_path=[year, file_obj["name"]],
             force_download=False,
             dest_root_dir_override=None,
         )
+        ls_dfs.append(read_transactions_file(file_path, file_obj["name"]))
 
-        print(f"Reading file: {file_path}")
-        df = read_chase_csv(file_path)
-        # add column for file path
-        df["file_name"] = file_obj["name"]
-        # if balance in columns then column says checking, else credit card
-        if "Balance" in df.columns:
-            df["account_type"] = "checking"
-        else:
-            df["account_type"] = "credit_card"
-
-        # rename multiple types to the same schema
-        df.rename(
-            columns={
-                "Transaction Date": "transaction_date",
-                "Post Date": "post_date",
-                "Description": "description",
-                "Category": "category",
-                "Type": "type",
-                "Amount": "amount",
-                "Memo": "memo",
-                "Details": "details",
-                "Posting Date": "post_date",
-                "Balance": "balance",
-                "Check or Slip #": "check_or_slip_number",
-            },
-            inplace=True,
-        )
+    df_all_transactions = combine_transactions(ls_dfs)
+    dict_dfs[key] = df_all_transactions
 
-        ls_dfs.append(df)
+    return get_frame_view(df_all_transactions)
 
-    df_all_transactions = pd.concat(ls_dfs, ignore_index=True)
 
-    df_all_transactions = df_all_transactions[
-        [
-            "account_type",
-            "file_name",
-            # "transaction_date",
-            "post_date",
-            "description",
-            # "category",
-            "type",
-            "amount",
-            # "memo",
-            # "details",
-            # "balance",
-            # "check_or_slip_number",
+async def get_all_transactions_async(sheets_client=None):
+    """Async variant of get_all_transactions, files are downloaded concurrently"""
+    key = "all_transactions"
+    if key in dict_dfs:
+        print(f"Using cached DataFrame for key: {key}")
+        return get_frame_view(dict_dfs[key])
+
+    sheets_client = sheets_client or AsyncSheetsClient()
+    ls_transaction_files = await sheets_client.get_file_list_from_folder_id_file_path(
+        laura_folder_id, [year]
+    )
+    print(f"Files in Laura's folder: {ls_transaction_files}")
+
+    ls_file_paths = await asyncio.gather(
+        *[
+            sheets_client.download_and_get_drive_file_path(
+                root_folder_id=laura_folder_id,
+                ls_file_path=[year, file_obj["name"]],
+                force_download=False,
+                dest_root_dir_override=None,
+            )
+            for file_obj in ls_transaction_files
         ]
+    )
+    ls_dfs = [
+        read_transactions_file(file_path, file_obj["name"])
+        for file_path, file_obj in zip(ls_file_paths, ls_transaction_files)
     ]
 
-    print(f"All transactions DataFrame shape: {df_all_transactions.shape}")
+    df_all_transactions = combine_transactions(ls_dfs)
+    dict_dfs[key] = df_all_transactions
 
-    dict_dfs[key] = df_all_transactions.copy()
-
-    return df_all_transactions
+    return get_frame_view(df_all_transactions)
 
 
 def get_formatted_transactions():
@@ -137,10 +147,11 @@ def get_formatted_transactions():
 
 
 def write_transcations_to_sheet(df):
+    # WriteToSheets retries on its own, another backoff around it would nest
     WriteToSheets(
         bookName="2025 Profit and Loss",
         sheetName="Transactions",
-        df=df,
+        df=format_date_columns(df, ["post_date"]),
         indexes=False,
         set_note=None,
         retries=3,
@@ -0,0 +1,250 @@
+# %%
+# Running Imports #
+
+import contextlib
+import curses
+import os
+
+import pandas as pd
+
+from api import ForecastStore, compute_snapshot
+
+# %%
+# Vars #
+
+# views in the order of their number keys
+DICT_VIEWS = {
+    "forecast": "Forecast",
+    "daily_balance": "Daily Balance",
+    "account_balances": "Account Balances",
+    "planned_budgets": "Planned Budgets",
+    "alerts": "Alerts",
+}
+MAX_COLUMN_WIDTH = 24
+# how often the screen checks the store for a new snapshot
+POLL_MILLISECONDS = 500
+HELP_TEXT = "1-5 view  arrows/pgup/pgdn/home/end scroll  a account  r refresh  q quit"
+
+
+# %%
+# Functions: Rendering #
+
+
+def format_cell(value) -> str:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def render_rows(df_window, width) -> list:
+    """Header and row lines of a window, columns sized from the window alone"""
+    ls_columns = list(df_window.columns)
+    ls_rows = [
+        [format_cell(value) for value in row]
+        for row in df_window.itertuples(index=False, name=None)
+    ]
+    ls_widths = [
+        min(
+            max([len(column)] + [len(row[i]) for row in ls_rows]),
+            MAX_COLUMN_WIDTH,
+        )
+        for i, column in enumerate(ls_columns)
+    ]
+
+    def join(cells):
+        line = " ".join(cell[:size].ljust(size) for cell, size in zip(cells, ls_widths))
+        return line[:width]
+
+    return [join(ls_columns)] + [join(row) for row in ls_rows]
+
+
+# %%
+# Class: Table View #
+
+
+class TableView:
+    """Scroll position over one table of the store, fetching only visible rows
+
+    The window is re-queried when the position, filter or snapshot version
+    changes, so every redraw formats at most one screen of rows.
+    """
+
+    def __init__(self, forecast_store, name, account=None):
+        self.forecast_store = forecast_store
+        self.name = name
+        self.account = account
+        self.top = 0
+        self.cursor = 0
+        self.total = 0
+        self.version = None
+        self.df_window = pd.DataFrame()
+        self._window_key = None
+
+    def fetch_window(self, num_rows):
+        """Query the visible rows if anything they depend on changed"""
+        window_key = (
+            self.forecast_store.version,
+            self.account,
+            self.top,
+            num_rows,
+        )
+        if window_key == self._window_key:
+            return self.df_window
+
+        try:
+            version, total, df_window = self.forecast_store.query(
+                self.name, account=self.account, offset=self.top, limit=num_rows
+            )
+        except ValueError:
+            # the table has no accounts to filter on
+            self.set_account(None)
+            return self.fetch_window(num_rows)
+        self.version, self.total, self.df_window = version, total, df_window
+        self._window_key = window_key
+
+        # a refresh can shrink the table under the current position
+        last_top = max(self.total - num_rows, 0)
+        if self.top > last_top:
+            self.top = last_top
+            return self.fetch_window(num_rows)
+        self.cursor = min(self.cursor, max(self.total - 1, 0))
+        return self.df_window
+
+    def move(self, delta, num_rows):
+        """Move the cursor, scrolling the window to keep it visible"""
+        self.cursor = min(max(self.cursor + delta, 0), max(self.total - 1, 0))
+        if self.cursor < self.top:
+            self.top = self.cursor
+        elif self.cursor >= self.top + num_rows:
+            self.top = self.cursor - num_rows + 1
+
+    def set_account(self, account):
+        self.account = account or None
+        self.top = 0
+        self.cursor = 0
+
+
+# %%
+# Functions: Curses #
+
+
+def compute_snapshot_quietly(our_cash_data) -> dict:
+    """compute_snapshot with its progress output kept off the curses screen"""
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            return compute_snapshot(our_cash_data)
+
+
+def prompt(stdscr, text) -> str:
+    height, width = stdscr.getmaxyx()
+    stdscr.move(height - 1, 0)
+    stdscr.clrtoeol()
+    stdscr.addstr(height - 1, 0, text[: width - 1])
+    curses.echo()
+    value = stdscr.getstr(height - 1, len(text)).decode().strip()
+    curses.noecho()
+    return value
+
+
+def draw(stdscr, table_view):
+    height, width = stdscr.getmaxyx()
+    num_rows = max(height - 3, 1)
+    df_window = table_view.fetch_window(num_rows)
+    ls_lines = render_rows(df_window, width - 1)
+
+    stdscr.erase()
+    title = (
+        f" {DICT_VIEWS[table_view.name]}"
+        f"{f' [{table_view.account}]' if table_view.account else ''}"
+        f"  rows {table_view.total:,}  v{table_view.version}"
+    )
+    stdscr.addstr(0, 0, title[: width - 1], curses.A_REVERSE)
+    stdscr.addstr(1, 0, ls_lines[0], curses.A_BOLD)
+    for i, line in enumerate(ls_lines[1:]):
+        attr = curses.A_REVERSE if table_view.top + i == table_view.cursor else 0
+        stdscr.addstr(2 + i, 0, line, attr)
+    stdscr.addstr(height - 1, 0, HELP_TEXT[: width - 1], curses.A_DIM)
+    stdscr.refresh()
+
+    return num_rows
+
+
+def get_scroll_delta(key, table_view, num_rows):
+    """Rows a scroll key moves the cursor by, None for any other key"""
+    dict_deltas = {
+        curses.KEY_DOWN: 1,
+        curses.KEY_UP: -1,
+        curses.KEY_NPAGE: num_rows,
+        curses.KEY_PPAGE: -num_rows,
+        curses.KEY_HOME: -table_view.total,
+        curses.KEY_END: table_view.total,
+    }
+    return dict_deltas.get(key)
+
+
+def handle_key(stdscr, key, table_view, dict_table_views, forecast_store, num_rows):
+    """Act on a key press, returns the table view to show next"""
+    scroll_delta = get_scroll_delta(key, table_view, num_rows)
+    if ord("1") <= key < ord("1") + len(DICT_VIEWS):
+        name = list(DICT_VIEWS)[key - ord("1")]
+        if name in forecast_store.table_names():
+            return dict_table_views[name]
+    elif scroll_delta is not None:
+        table_view.move(scroll_delta, num_rows)
+    elif key == ord("a"):
+        table_view.set_account(prompt(stdscr, "Account (blank for all): "))
+    elif key == ord("r"):
+        forecast_store.request_refresh()
+    return table_view
+
+
+def run_tui(stdscr, forecast_store):
+    curses.curs_set(0)
+    stdscr.timeout(POLL_MILLISECONDS)
+    dict_table_views = {name: TableView(forecast_store, name) for name in DICT_VIEWS}
+    table_view = dict_table_views["forecast"]
+
+    while True:
+        if forecast_store.version == 0:
+            stdscr.erase()
+            stdscr.addstr(0, 0, "Computing forecast...")
+            stdscr.refresh()
+            if stdscr.getch() == ord("q"):
+                return
+            continue
+
+        num_rows = draw(stdscr, table_view)
+        # getch times out so a new snapshot is picked up without a key press
+        key = stdscr.getch()
+        if key == -1:
+            continue
+        if key == ord("q"):
+            return
+        table_view = handle_key(
+            stdscr, key, table_view, dict_table_views, forecast_store, num_rows
+        )
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    from cash_flow_commander import OurCashData, SheetsStorage
+    from frame_cache import enable_copy_on_write
+
+    enable_copy_on_write()
+
+    our_cash_data = OurCashData(
+        SheetsStorage(), num_days=int(os.getenv("FORECAST_NUM_DAYS", 365 * 2))
+    )
+    forecast_store = ForecastStore(lambda: compute_snapshot_quietly(our_cash_data))
+    forecast_store.start()
+    try:
+        curses.wrapper(run_tui, forecast_store)
+    finally:
+        forecast_store.stop()
+
+
+# %%
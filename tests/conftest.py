@@ -0,0 +1,77 @@
+# %%
+# Imports #
+
+import importlib
+import sys
+import types
+
+import pytest
+
+# %%
+# Vars #
+
+# what the modules under test import from readable_utils, by submodule
+DICT_READABLE_UTILS_NAMES = {
+    "display_tools": ["pprint_df", "print_logger"],
+    "google_drive_tools": [
+        "download_and_get_drive_file_path",
+        "get_file_list_from_folder_id_file_path",
+    ],
+    "google_tools": [
+        "WriteToSheets",
+        "clear_range_of_sheet_obj",
+        "get_book",
+        "get_book_sheet",
+        "get_book_sheet_df",
+        "write_df_to_range_of_sheet_obj",
+    ],
+}
+
+
+# %%
+# Fixtures #
+
+
+def get_readable_utils_stub(module_name, name):
+    """Display helpers do nothing, Google calls raise if a test reaches them"""
+
+    def stub(*args, **kwargs):
+        if module_name == "display_tools":
+            return None
+        raise RuntimeError(f"readable_utils.{name} is stubbed in the tests")
+
+    stub.__name__ = name
+    return stub
+
+
+@pytest.fixture(scope="session")
+def readable_utils():
+    """readable_utils, stubbed when it is not installed
+
+    Lets the modules that import it at the top be imported and tested
+    without the Google helpers.
+    """
+    try:
+        installed = importlib.import_module("readable_utils")
+    except ImportError:
+        installed = None
+    if installed is not None:
+        yield installed
+        return
+
+    package = types.ModuleType("readable_utils")
+    package.__path__ = []
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setitem(sys.modules, "readable_utils", package)
+        for module_name, ls_names in DICT_READABLE_UTILS_NAMES.items():
+            module = types.ModuleType(f"readable_utils.{module_name}")
+            for name in ls_names:
+                setattr(module, name, get_readable_utils_stub(module_name, name))
+            setattr(package, module_name, module)
+            monkeypatch.setitem(sys.modules, module.__name__, module)
+        yield package
+
+
+@pytest.fixture(scope="session")
+def async_sheets(readable_utils):
+    return importlib.import_module("async_sheets")
@@ -0,0 +1,78 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import numpy as np
+import pandas as pd
+from alerts import (
+    build_max_sparse_table,
+    evaluate_alert_rules,
+    evaluate_below_threshold_rules,
+    find_first_at_or_above,
+)
+
+# %%
+# Tests #
+
+
+def test_below_threshold_matches_brute_force():
+    rng = np.random.default_rng(3)
+    balances = np.cumsum(rng.normal(0, 50, 2000)) + 1000
+    thresholds = rng.uniform(-1000, 1500, 200)
+
+    first_idx, recovery_idx = evaluate_below_threshold_rules(balances, thresholds)
+
+    for threshold, first, recovery in zip(thresholds, first_idx, recovery_idx):
+        below = np.nonzero(balances < threshold)[0]
+        expected_first = below[0] if len(below) else len(balances)
+        assert first == expected_first
+        if expected_first < len(balances):
+            above = np.nonzero(balances[expected_first:] >= threshold)[0]
+            expected_recovery = expected_first + above[0] if len(above) else 2000
+            assert recovery == expected_recovery
+
+
+def test_find_first_at_or_above_past_end():
+    values = np.array([1.0, 5.0, 2.0, 7.0])
+    sparse_table = build_max_sparse_table(values)
+
+    idx = find_first_at_or_above(sparse_table, [0, 2, 0, 3], [5.0, 6.0, 8.0, 7.0])
+
+    assert idx.tolist() == [1, 3, 4, 3]
+
+
+def test_evaluate_alert_rules_dates_and_durations():
+    df_balances = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2030-01-01", "2030-01-10", "2030-01-20"]),
+            "Account_Name": "Checking",
+            "Balance": [5000.0, 800.0, 3000.0],
+        }
+    )
+    df_rules = pd.DataFrame(
+        {
+            "Rule_Name": ["Low", "Overdraft", "Big_Drop", "Other_Account"],
+            "Account_Name": ["Checking", "Checking", "Checking", "Savings"],
+            "Rule_Type": [
+                "min_balance",
+                "min_balance",
+                "drop_over_days",
+                "min_balance",
+            ],
+            "Threshold": [1000.0, 0.0, 2000.0, 100.0],
+            "Window_Days": [0, 0, 5, 0],
+        }
+    )
+
+    df_alerts = evaluate_alert_rules(
+        df_rules, df_balances, start_date="2030-01-01", end_date="2030-01-31"
+    ).set_index("Rule_Name")
+
+    assert df_alerts.loc["Low", "First_Crossing_Date"] == pd.Timestamp("2030-01-10")
+    assert df_alerts.loc["Low", "Duration_Days"] == 10
+    assert df_alerts.loc["Low", "Recovery_Date"] == pd.Timestamp("2030-01-20")
+    assert pd.isna(df_alerts.loc["Overdraft", "First_Crossing_Date"])
+    # the peak stays inside the 5 day lookback for 5 days
+    assert df_alerts.loc["Big_Drop", "Days_Until_Crossing"] == 9
+    assert df_alerts.loc["Big_Drop", "Duration_Days"] == 5
+    assert pd.isna(df_alerts.loc["Other_Account", "First_Crossing_Date"])
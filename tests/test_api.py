@@ -0,0 +1,79 @@
+# %%
+# Imports #
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import config_tests  # noqa F401
+import pandas as pd
+from api import ForecastStore, QueryTable, make_server
+
+# %%
+# Tests #
+
+
+def get_example_frames():
+    df_forecast = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(
+                ["2030-01-15", "2030-01-01", "2030-02-01", "2030-01-15"]
+            ),
+            "Account_Name": ["Power", "Rent", "Rent", "Paycheck"],
+            "Amount": [-12000, -180000, -180000, 250000],
+            "Amount_Paid": 0,
+            "Running_Balance": [108000, 120000, 178000, 358000],
+        }
+    )
+    return {"forecast": df_forecast}
+
+
+def test_query_table_slices_sorted_dates():
+    query_table = QueryTable(
+        get_example_frames()["forecast"],
+        money_columns=["Amount", "Amount_Paid", "Running_Balance"],
+        date_columns=["Date"],
+        range_column="Date",
+    )
+
+    total, df = query_table.query(start="2030-01-10", end="2030-01-31")
+    assert total == 2
+    assert df["Date"].tolist() == ["2030-01-15", "2030-01-15"]
+    assert df["Amount"].tolist() == [-120.0, 2500.0]
+
+    total, df = query_table.query(account="Rent", offset=1, limit=5)
+    assert total == 2
+    assert df["Date"].tolist() == ["2030-02-01"]
+
+
+def test_http_conditional_get():
+    forecast_store = ForecastStore(get_example_frames)
+    forecast_store.refresh()
+    server = make_server(forecast_store, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/forecast?account=Rent"
+
+    try:
+        with urllib.request.urlopen(url) as response:
+            etag = response.headers["ETag"]
+            body = json.loads(response.read())
+        assert body["total"] == 2
+        assert [row["Account_Name"] for row in body["rows"]] == ["Rent", "Rent"]
+
+        request = urllib.request.Request(url, headers={"If-None-Match": etag})
+        try:
+            urllib.request.urlopen(request)
+            status = 200
+        except urllib.error.HTTPError as error:
+            status = error.code
+        assert status == 304
+
+        # a new snapshot invalidates the etag
+        forecast_store.refresh()
+        with urllib.request.urlopen(request) as response:
+            assert response.status == 200
+            assert response.headers["ETag"] != etag
+    finally:
+        server.shutdown()
+        server.server_close()
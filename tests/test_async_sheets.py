@@ -0,0 +1,121 @@
+# %%
+# Imports #
+
+import asyncio
+import threading
+import time
+
+import config_tests  # noqa F401
+import pytest
+
+# async_sheets is imported through its fixture, after readable_utils is stubbed
+
+# %%
+# Tests #
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeApiError(Exception):
+    def __init__(self, status_code, message="", headers=None):
+        super().__init__(message)
+        self.response = FakeResponse(status_code, headers)
+
+
+def test_retryable_errors_are_told_apart_from_failures(async_sheets):
+    is_retryable_error = async_sheets.is_retryable_error
+
+    assert is_retryable_error(FakeApiError(429))
+    assert is_retryable_error(FakeApiError(503))
+    assert is_retryable_error(FakeApiError(403, "Quota exceeded for quota metric"))
+    assert is_retryable_error(ConnectionError())
+    assert not is_retryable_error(FakeApiError(400))
+    assert not is_retryable_error(FakeApiError(404))
+    assert not is_retryable_error(ValueError("bad range"))
+
+
+def test_backoff_delay_grows_and_is_capped(async_sheets):
+    get_backoff_delay = async_sheets.get_backoff_delay
+
+    error = FakeApiError(503)
+    for attempt in range(4):
+        delay = get_backoff_delay(error, attempt)
+        assert 2**attempt / 2 <= delay <= 2**attempt
+
+    # quota errors start from the longer base, nothing waits past the cap
+    assert get_backoff_delay(FakeApiError(429), 0) >= 7.5
+    assert get_backoff_delay(FakeApiError(429), 20) <= async_sheets.MAX_DELAY_SECONDS
+    assert get_backoff_delay(FakeApiError(429, headers={"Retry-After": "3"}), 5) == 3
+
+
+def test_call_with_backoff_retries_only_retryable_errors(async_sheets, monkeypatch):
+    call_with_backoff = async_sheets.call_with_backoff
+    ls_delays = []
+    monkeypatch.setattr(async_sheets.time, "sleep", ls_delays.append)
+    ls_errors = [FakeApiError(503), FakeApiError(429)]
+
+    def flaky():
+        if ls_errors:
+            raise ls_errors.pop(0)
+        return "ok"
+
+    assert call_with_backoff(flaky) == "ok"
+    assert len(ls_delays) == 2
+
+    num_calls = []
+
+    def failing():
+        num_calls.append(1)
+        raise FakeApiError(400)
+
+    with pytest.raises(FakeApiError):
+        call_with_backoff(failing)
+    assert len(num_calls) == 1
+
+    def always_busy():
+        num_calls.append(1)
+        raise FakeApiError(503)
+
+    num_calls.clear()
+    with pytest.raises(FakeApiError):
+        call_with_backoff(always_busy, retries=2)
+    assert len(num_calls) == 3
+
+
+def test_run_keeps_calls_in_flight_within_the_limit(async_sheets, monkeypatch):
+    monkeypatch.setattr(async_sheets, "get_backoff_delay", lambda error, attempt: 0)
+    sheets_client = async_sheets.AsyncSheetsClient(max_concurrent_requests=2)
+    lock = threading.Lock()
+    dict_counts = {"in_flight": 0, "max_in_flight": 0, "calls": 0}
+
+    def blocking_call(value):
+        with lock:
+            dict_counts["calls"] += 1
+            dict_counts["in_flight"] += 1
+            dict_counts["max_in_flight"] = max(
+                dict_counts["max_in_flight"], dict_counts["in_flight"]
+            )
+            # the first call fails once so retries go through the limit too
+            should_fail = dict_counts["calls"] == 1
+        time.sleep(0.02)
+        with lock:
+            dict_counts["in_flight"] -= 1
+        if should_fail:
+            raise FakeApiError(503)
+        return value
+
+    async def run_all():
+        return await asyncio.gather(
+            *[sheets_client.run(blocking_call, value) for value in range(8)]
+        )
+
+    try:
+        assert asyncio.run(run_all()) == list(range(8))
+    finally:
+        sheets_client.close()
+    assert dict_counts["max_in_flight"] == 2
+    assert dict_counts["calls"] == 9
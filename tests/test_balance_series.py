@@ -0,0 +1,75 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import numpy as np
+import pandas as pd
+from balance_series import BalanceSeries
+
+# %%
+# Tests #
+
+
+def test_lookups_match_dense_balances():
+    rng = np.random.default_rng(5)
+    change_days = np.sort(rng.choice(np.arange(1, 400), 60, replace=False))
+    balance_series = BalanceSeries(
+        np.datetime64("2030-01-01") + change_days,
+        rng.integers(-5000, 5000, 60),
+        initial_value=100,
+    )
+    dense = balance_series.to_dense("2030-01-01", "2031-03-01").to_numpy()
+    # the balance from each change day on, the initial value before the first
+    expected = np.full(425, 100.0)
+    for day, value in zip(change_days, balance_series.values):
+        expected[day:] = value
+    assert (dense == expected).all()
+
+    starts = rng.integers(0, 425, 200)
+    ends = np.minimum(starts + rng.integers(0, 120, 200), 424)
+    start_dates = np.datetime64("2030-01-01") + starts
+    end_dates = np.datetime64("2030-01-01") + ends
+    range_max = balance_series.range_max(start_dates, end_dates)
+    range_min = balance_series.range_min(start_dates, end_dates)
+    # the ranges include their end day
+    for idx, (start, stop) in enumerate(zip(starts, ends + 1)):
+        assert range_max[idx] == expected[start:stop].max()
+        assert range_min[idx] == expected[start:stop].min()
+
+
+def test_from_balances_keeps_last_balance_of_each_day():
+    df_future_cast = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(
+                ["2030-01-03", "2030-01-01", "2030-01-03", "2030-01-20"]
+            ),
+            "Running_Balance": [45000, 25000, 5000, 255000],
+        }
+    )
+
+    balance_series = BalanceSeries.from_balances(df_future_cast)
+
+    assert len(balance_series) == 3
+    assert balance_series.values.tolist() == [25000, 5000, 255000]
+    assert np.isnan(balance_series.value_at("2029-12-31")[0])
+    assert balance_series.value_at(["2030-01-02", "2030-01-19"]).tolist() == [
+        25000,
+        5000,
+    ]
+    # an unknown opening balance is left out of range minima
+    assert balance_series.range_min("2029-12-01", "2030-01-10")[0] == 5000
+
+
+def test_resample_to_period_ends():
+    balance_series = BalanceSeries(
+        np.array(["2030-01-15", "2030-02-28", "2030-04-02"], dtype="datetime64[D]"),
+        [100, 200, 300],
+        initial_value=0,
+    )
+
+    df_monthly = balance_series.resample("M", "2030-01-01", "2030-04-30")
+
+    assert df_monthly.index.tolist() == list(
+        pd.to_datetime(["2030-01-31", "2030-02-28", "2030-03-31", "2030-04-30"])
+    )
+    assert df_monthly.tolist() == [100, 200, 200, 300]
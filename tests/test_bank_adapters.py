@@ -0,0 +1,74 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import pandas as pd
+import pytest
+from bank_adapters import (
+    LS_TRANSACTION_COLUMNS,
+    combine_statements,
+    read_statement,
+    sniff_bank_format,
+)
+
+# %%
+# Tests #
+
+
+def write_statement(tmp_path, file_name, text):
+    file_path = tmp_path / file_name
+    file_path.write_text(text)
+    return str(file_path)
+
+
+def test_statements_of_each_bank_share_one_schema(tmp_path):
+    ls_file_paths = [
+        write_statement(
+            tmp_path,
+            "checking.csv",
+            "Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\n"
+            "DEBIT,01/05/2030,RENT,-1800.00,ACH_DEBIT,2000.00,,\n",
+        ),
+        write_statement(
+            tmp_path,
+            "capital_one.csv",
+            "Transaction Date,Posted Date,Card No.,Description,Category,Debit,Credit\n"
+            "2030-01-02,2030-01-03,1234,GAS,Gas/Automotive,40.00,\n"
+            "2030-01-09,2030-01-09,1234,PAYMENT,Payment/Credit,,100.00\n",
+        ),
+        write_statement(
+            tmp_path,
+            "discover.csv",
+            "Trans. Date,Post Date,Description,Amount,Category\n"
+            "01/02/2030,01/02/2030,BOOKS,12.99,Merchandise\n",
+        ),
+    ]
+
+    df_all = combine_statements(
+        [read_statement(file_path, "file.csv") for file_path in ls_file_paths]
+    )
+
+    assert df_all.columns.tolist() == LS_TRANSACTION_COLUMNS
+    assert df_all["bank"].tolist() == [
+        "chase",
+        "capital_one",
+        "capital_one",
+        "discover",
+    ]
+    assert df_all["account_type"].tolist() == [
+        "checking",
+        "credit_card",
+        "credit_card",
+        "credit_card",
+    ]
+    # money leaving the account is negative whatever the bank's convention
+    assert df_all["amount"].tolist() == [-1800.0, -40.0, 100.0, -12.99]
+    assert df_all["post_date"].tolist() == list(
+        pd.to_datetime(["2030-01-05", "2030-01-03", "2030-01-09", "2030-01-02"])
+    )
+    assert isinstance(df_all["bank"].dtype, pd.CategoricalDtype)
+
+
+def test_unknown_header_is_rejected():
+    with pytest.raises(ValueError):
+        sniff_bank_format(["Date", "Memo", "Value"])
@@ -0,0 +1,175 @@
+# %%
+# Imports #
+
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+
+import config_tests  # noqa F401
+import forecast_history
+import pandas as pd
+from batch_runner import BatchRunner, WriteCollector, compute_household_writes
+
+# %%
+# Tests #
+
+
+class FakeStorage:
+    DICT_WRITER_REQUESTS = {"sheet": 3}
+
+    def __init__(self, dict_household, sheets_client):
+        self.book_name = dict_household["book_name"]
+        self.ls_written = sheets_client
+        self._dict_source_dfs = {}
+
+    async def refresh_from_sheets_async(self):
+        if self.book_name == "Missing_Book":
+            raise RuntimeError("book not found")
+        self._dict_source_dfs = {"income_expense_df": pd.DataFrame({"Amount": [1]})}
+
+    def get_source_dfs(self):
+        return self._dict_source_dfs
+
+    def get_report_writers(self):
+        return {"sheet": self._write_sheet_now}
+
+    def _write_sheet_now(self, sheet_name, df):
+        self.ls_written.append((self.book_name, sheet_name, len(df)))
+
+    async def write_async(self, write_method, *args, num_requests=1, **kwargs):
+        return write_method(*args, **kwargs)
+
+
+def compute_example_writes(dict_household, dict_source_dfs):
+    write_collector = WriteCollector()
+    df = dict_source_dfs["income_expense_df"]
+    write_collector.submit("Report", "sheet", sheet_name="Report", df=df)
+    # a newer write to the same tab replaces the first one
+    write_collector.submit("Report", "sheet", sheet_name="Report", df=df.head(0))
+    write_collector.submit("Other", "sheet", sheet_name="Other", df=df)
+    return write_collector.get_writes()
+
+
+def test_each_household_gets_its_own_status():
+    ls_households = [
+        {"household_id": "smith", "book_name": "Smith_Cash"},
+        {"household_id": "broken", "book_name": "Missing_Book"},
+        {"household_id": "jones", "book_name": "Jones_Cash"},
+    ]
+    ls_written = []
+
+    with ThreadPoolExecutor(2) as executor:
+        df_statuses = BatchRunner(
+            ls_households,
+            ls_written,
+            executor,
+            max_households_in_flight=2,
+            storage_factory=FakeStorage,
+            compute_func=compute_example_writes,
+        ).run()
+
+    assert df_statuses["status"].tolist() == ["ok", "failed", "ok"]
+    assert "book not found" in df_statuses.loc[1, "error"]
+    assert df_statuses["num_writes"].tolist() == [2, 0, 2]
+    assert (df_statuses["total_seconds"] >= df_statuses["fetch_seconds"]).all()
+    assert sorted(ls_written) == [
+        ("Jones_Cash", "Other", 1),
+        ("Jones_Cash", "Report", 0),
+        ("Smith_Cash", "Other", 1),
+        ("Smith_Cash", "Report", 0),
+    ]
+
+
+def get_example_source_dfs():
+    """Source tabs as the parent fetches them, display strings"""
+    df_income_expense = pd.DataFrame(
+        {
+            "Category": ["Income", "Housing"],
+            "Sub_Category": ["Job", "Rent"],
+            "Type": ["biweekly", "monthly"],
+            "When": ["1/2/2030", "1"],
+            "Account_Name": ["Paycheck", "Rent"],
+            "Amount": ["2,500.00", "-1,800.00"],
+            "Auto_Pay_Account": ["Chase Checking", "Chase Checking"],
+            "AfterDays": ["0", "0"],
+            "Priority": ["0", "1"],
+        }
+    ).assign(
+        **{
+            column: ""
+            for column in [
+                "Auto_Pay_Amount",
+                "AverageMonthlyCost",
+                "Balance",
+                "Limit",
+                "Available Credit",
+                "Interest Rate",
+                "Monthly Interest Incurred",
+                "Payoff Order",
+                "Maturity Date",
+                "Business_Day_Roll",
+            ]
+        }
+    )
+    today = f"{pd.Timestamp('today'):%m/%d/%Y}"
+    return {
+        "income_expense_df": df_income_expense,
+        "account_balances": pd.DataFrame(
+            {
+                "Date": [today],
+                "Account_Name": ["Chase Checking"],
+                "Balance": ["3,000.00"],
+            }
+        ),
+        "account_details": pd.DataFrame(
+            {
+                "Account_Name": ["Chase Checking"],
+                "Category": ["Cash"],
+                "Sub_Category": ["Checking"],
+                "Limit": [""],
+                "Interest Rate": [""],
+                "Maturity Date": [""],
+                "Link": [""],
+            }
+        ),
+        "transactions_report": pd.DataFrame(
+            {
+                "Date": [today],
+                "Category": ["Housing"],
+                "Type": ["monthly"],
+                "Account_Name": ["Rent"],
+                "Auto_Pay_Account": ["Chase Checking"],
+                "Amount": ["-1,800.00"],
+                "Amount_Paid": ["-1,800.00"],
+                "Date_Paid": [today],
+                "Running_Balance": ["0"],
+                "Occurrence_ID": [""],
+            }
+        ),
+    }
+
+
+def test_compute_reads_only_the_seeded_tabs(readable_utils, tmp_path, monkeypatch):
+    cash_flow_commander = importlib.import_module("cash_flow_commander")
+    monkeypatch.setattr(forecast_history, "FORECAST_HISTORY_DIR", str(tmp_path))
+    ls_fetched = []
+
+    def fetch_sheet_data(self, key, sheet_name):
+        ls_fetched.append(sheet_name)
+        raise AssertionError(f"{sheet_name} fetched by the worker")
+
+    monkeypatch.setattr(
+        cash_flow_commander.SheetsStorage, "_fetch_sheet_data", fetch_sheet_data
+    )
+
+    ls_writes = compute_household_writes(
+        {
+            "household_id": "smith",
+            "book_name": "Smith_Cash",
+            "num_days": 60,
+            "num_scenarios": 20,
+        },
+        get_example_source_dfs(),
+    )
+
+    assert ls_fetched == []
+    assert "Transactions_Report" in [write["key"] for write in ls_writes]
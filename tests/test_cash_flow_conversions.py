@@ -0,0 +1,62 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import numpy as np
+import pandas as pd
+import pytest
+from cash_flow_conversions import (
+    format_date_columns,
+    format_money_columns,
+    to_cents,
+    to_dates,
+)
+
+# %%
+# Tests #
+
+
+def test_to_cents_parses_sheet_amounts():
+    cents = to_cents(["1,234.50", "$-12", "(12.00)", " 0.1 ", "", None])
+
+    assert cents.tolist() == [123450, -1200, -1200, 10, 0, 0]
+    assert cents.dtype == np.int64
+    assert to_cents(pd.Series([19.99, np.nan])).tolist() == [1999, 0]
+    assert to_cents("$5.05") == 505
+
+
+def test_to_cents_raises_on_malformed_amounts():
+    with pytest.raises(ValueError, match="12..50"):
+        to_cents(["10.00", "12..50", ""])
+
+
+def test_format_money_columns_round_trips_cents():
+    df = pd.DataFrame({"Amount": to_cents(["1,234.56", "-0.07"]), "Note": ["a", "b"]})
+
+    df_formatted = format_money_columns(df, ["Amount", "Missing"])
+
+    assert df_formatted["Amount"].tolist() == [1234.56, -0.07]
+    assert df["Amount"].dtype == np.int64
+    assert to_cents(df_formatted["Amount"]).tolist() == df["Amount"].tolist()
+
+
+def test_dates_round_trip_through_sheet_strings():
+    df = pd.DataFrame(
+        {"Date": to_dates(["1/2/2030", "12/31/2030", "1/2/2030"], format="%m/%d/%Y")}
+    )
+
+    df_formatted = format_date_columns(df, ["Date"])
+
+    assert df["Date"].dtype == "datetime64[ns]"
+    assert df_formatted["Date"].tolist() == ["2030-01-02", "2030-12-31", "2030-01-02"]
+    pd.testing.assert_series_equal(to_dates(df_formatted["Date"]), df["Date"])
+
+
+def test_blank_dates_are_nat_and_write_back_blank():
+    dates = to_dates(["1/2/2030", "", None], format="%m/%d/%Y")
+
+    assert dates.isna().tolist() == [False, True, True]
+    # times of day are dropped, NaT is written as an empty cell
+    df = pd.DataFrame({"Date": [pd.Timestamp("2030-01-02 13:45"), pd.NaT]})
+    assert format_date_columns(df, ["Date"])["Date"].tolist() == ["2030-01-02", ""]
+    assert to_dates(pd.Series(df["Date"])).tolist()[0] == pd.Timestamp("2030-01-02")
@@ -0,0 +1,86 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+from daemon import WatchDaemon
+
+# %%
+# Tests #
+
+
+class FakeSheetsStorage:
+    def __init__(self):
+        self.dict_sheets = {
+            "income_expense_df": "a",
+            "account_balances": "b",
+            "account_details": "c",
+            "transactions_report": "d",
+        }
+        self.modified_time = 1
+        self.dict_cached = {}
+        self.num_fetches = 0
+
+    async def refresh_from_sheets_async(self, ls_keys=None):
+        for key in ls_keys or list(self.dict_sheets):
+            self.num_fetches += 1
+            self.dict_cached[key] = self.dict_sheets[key]
+
+    def get_source_hashes(self):
+        return dict(self.dict_cached)
+
+    def get_book_modified_time(self):
+        return self.modified_time
+
+    def flush_writes(self):
+        pass
+
+
+def get_daemon():
+    sheets_storage = FakeSheetsStorage()
+    ls_runs = []
+
+    def write_forecast():
+        # the forecast rewrites one of its own inputs
+        ls_runs.append("forecast")
+        sheets_storage.dict_sheets["transactions_report"] += "x"
+        sheets_storage.modified_time += 1
+
+    dict_output_runners = {
+        "forecast": write_forecast,
+        "account_balances_report": lambda: ls_runs.append("account_balances_report"),
+        "debt_payoff": lambda: ls_runs.append("debt_payoff"),
+    }
+    return WatchDaemon(sheets_storage, dict_output_runners), sheets_storage, ls_runs
+
+
+def test_first_poll_runs_every_output():
+    watch_daemon, _, ls_runs = get_daemon()
+    assert watch_daemon.run_once() == [
+        "forecast",
+        "account_balances_report",
+        "debt_payoff",
+    ]
+    assert ls_runs == ["forecast", "account_balances_report", "debt_payoff"]
+
+
+def test_unchanged_book_is_not_fetched():
+    watch_daemon, sheets_storage, ls_runs = get_daemon()
+    watch_daemon.run_once()
+    # the poll after our own write re-baselines without recomputing
+    assert watch_daemon.run_once() == []
+
+    num_fetches = sheets_storage.num_fetches
+    assert watch_daemon.run_once() == []
+    assert sheets_storage.num_fetches == num_fetches
+
+
+def test_only_outputs_of_changed_sources_rerun():
+    watch_daemon, sheets_storage, ls_runs = get_daemon()
+    watch_daemon.run_once()
+    watch_daemon.run_once()
+    ls_runs.clear()
+
+    sheets_storage.dict_sheets["account_details"] = "c2"
+    sheets_storage.modified_time += 1
+    assert watch_daemon.run_once() == ["account_balances_report"]
+    assert ls_runs == ["account_balances_report"]
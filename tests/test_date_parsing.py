@@ -0,0 +1,55 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import numpy as np
+import pandas as pd
+import pytest
+from date_parsing import DateParser
+
+# %%
+# Tests #
+
+
+def test_parses_each_distinct_value_once():
+    date_parser = DateParser()
+    values = pd.Series(
+        ["1/5/2030", "", "1/5/2030", np.nan, "2/1/2030", "1/5/2030"],
+        index=[10, 11, 12, 13, 14, 15],
+        name="Date",
+    )
+
+    dates = date_parser.parse(values, format="%m/%d/%Y")
+
+    pd.testing.assert_series_equal(
+        dates, pd.to_datetime(values, format="%m/%d/%Y").dt.normalize()
+    )
+    assert date_parser.num_parsed == 3
+
+    # a refresh only parses the dates it has not seen
+    date_parser.parse(["2/1/2030", "3/1/2030"], format="%m/%d/%Y")
+    assert date_parser.num_parsed == 4
+
+
+def test_cache_is_bounded_and_least_recently_used_first_out():
+    date_parser = DateParser(max_size=2)
+    date_parser.parse(["2030-01-01", "2030-01-02"])
+    date_parser.parse(["2030-01-01"])
+    date_parser.parse(["2030-01-03"])
+
+    date_parser.parse(["2030-01-01", "2030-01-03"])
+    assert date_parser.num_parsed == 3
+    date_parser.parse(["2030-01-02"])
+    assert date_parser.num_parsed == 4
+
+
+def test_coerced_failures_still_raise_when_strict():
+    date_parser = DateParser()
+
+    dates = date_parser.parse(
+        ["not a date", "2030-01-01"], format="%Y-%m-%d", errors="coerce"
+    )
+
+    assert pd.isna(dates.iloc[0])
+    with pytest.raises(ValueError):
+        date_parser.parse(["not a date"], format="%Y-%m-%d")
@@ -0,0 +1,79 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import numpy as np
+import pandas as pd
+from debt_payoff import (
+    generate_debt_payoff_df,
+    simulate_debt_payoff,
+    summarize_debt_payoff_df,
+)
+
+# %%
+# Helpers #
+
+
+def get_example_debts():
+    return pd.DataFrame(
+        {
+            "Account_Name": ["Card A", "Card B", "Car Loan"],
+            "Balance": [420000, 150000, 900000],
+            "Interest_Rate": [0.229, 0.18, 0.065],
+            "Minimum_Payment": [15000, 6000, 32000],
+            "Payoff_Order": [2, 3, 1],
+        }
+    )
+
+
+# %%
+# Tests #
+
+
+def test_zero_interest_loan_pays_off_in_expected_months():
+    df_debts = pd.DataFrame(
+        {
+            "Account_Name": ["Loan"],
+            "Balance": [100000],
+            "Interest_Rate": [0.0],
+            "Minimum_Payment": [30000],
+            "Payoff_Order": [1],
+        }
+    )
+
+    results = simulate_debt_payoff(df_debts, strategies=["payoff_order"])
+
+    assert results["payoff_months"][0, 0] == 4
+    assert np.isclose(results["total_paid"][0, 0], 100000)
+    assert np.isclose(results["total_interest"][0, 0], 0)
+
+
+def test_avalanche_pays_least_interest():
+    df_payoff = generate_debt_payoff_df(
+        get_example_debts(), start_date="2030-01-15", extra_monthly_payment=20000
+    )
+    df_summary = summarize_debt_payoff_df(df_payoff).set_index("Strategy")
+
+    assert (
+        df_summary.loc["avalanche", "Total_Interest"]
+        <= df_summary["Total_Interest"].min()
+    )
+    assert df_payoff["Payoff_Date"].notna().all()
+    assert df_payoff["Payoff_Date"].min() >= pd.Timestamp("2030-02-28")
+
+
+def test_payment_below_interest_never_pays_off():
+    df_debts = pd.DataFrame(
+        {
+            "Account_Name": ["Loan"],
+            "Balance": [1000000],
+            "Interest_Rate": [0.24],
+            "Minimum_Payment": [10000],
+            "Payoff_Order": [1],
+        }
+    )
+
+    df_payoff = generate_debt_payoff_df(df_debts, max_months=24)
+
+    assert df_payoff["Payoff_Date"].isna().all()
+    assert df_payoff["Months_To_Payoff"].isna().all()
@@ -0,0 +1,93 @@
+# %%
+# Imports #
+
+import datetime
+import zipfile
+
+import config_tests  # noqa F401
+import pandas as pd
+from excel_storage import (
+    create_workbook,
+    get_rows_from_df,
+    read_excel_sheet,
+    write_excel_sheet,
+)
+
+# %%
+# Tests #
+
+
+def get_example_balances():
+    return pd.DataFrame(
+        {
+            "Date": ["1/1/2030", "2/1/2030"],
+            "Account_Name": ["Chase Checking", "Chase Checking"],
+            "Balance": [3100.5, 2900],
+            "Notes": ["opening", "after rent"],
+        }
+    )
+
+
+def test_read_projects_columns_as_strings(tmp_path):
+    file_path = str(tmp_path / "Our_Cash.xlsx")
+    create_workbook(
+        file_path, "Account_Date_Balances", get_rows_from_df(get_example_balances())
+    )
+
+    df = read_excel_sheet(
+        file_path, "Account_Date_Balances", ["Date", "Account_Name", "Balance"]
+    )
+
+    assert df.columns.tolist() == ["Date", "Account_Name", "Balance"]
+    assert df["Balance"].tolist() == ["3100.5", "2900"]
+
+
+def test_write_replaces_one_tab_and_keeps_the_others(tmp_path):
+    file_path = str(tmp_path / "Our_Cash.xlsx")
+    create_workbook(
+        file_path, "Account_Date_Balances", get_rows_from_df(get_example_balances())
+    )
+    with zipfile.ZipFile(file_path) as zip_file:
+        source_part = zip_file.read("xl/worksheets/sheet1.xml")
+
+    df_report = pd.DataFrame({"Date": ["2030-01-01"], "Running_Balance": [120.25]})
+    write_excel_sheet(file_path, "Daily_Balance_Report", get_rows_from_df(df_report))
+    df_report = pd.DataFrame(
+        {"Date": ["2030-01-01", "2030-01-02"], "Running_Balance": [120.25, -4.0]}
+    )
+    write_excel_sheet(file_path, "Daily_Balance_Report", get_rows_from_df(df_report))
+
+    with zipfile.ZipFile(file_path) as zip_file:
+        assert zip_file.read("xl/worksheets/sheet1.xml") == source_part
+        assert len(zip_file.namelist()) == len(set(zip_file.namelist()))
+
+    df = read_excel_sheet(file_path, "Daily_Balance_Report")
+    assert df.values.tolist() == [["2030-01-01", "120.25"], ["2030-01-02", "-4"]]
+    assert read_excel_sheet(file_path, "Account_Date_Balances").shape == (2, 4)
+
+
+def test_read_renders_percents_and_dates_like_sheets(tmp_path):
+    from openpyxl import Workbook
+
+    file_path = str(tmp_path / "Our_Cash.xlsx")
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Income_Expense"
+    worksheet.append(["Account_Name", "Interest Rate", "When", "Start"])
+    worksheet.append(
+        ["Card", 0.0525, datetime.datetime(2024, 7, 13), datetime.datetime(2030, 1, 2)]
+    )
+    worksheet.append(["Loan", 0.05, datetime.datetime(2024, 1, 5), None])
+    for row in worksheet.iter_rows(min_row=2):
+        row[1].number_format = "0.00%"
+        row[2].number_format = "d-mmm"
+        row[3].number_format = "m/d/yyyy"
+    worksheet["B3"].number_format = "0%"
+    workbook.save(file_path)
+
+    df = read_excel_sheet(file_path, "Income_Expense")
+
+    assert df["Interest Rate"].tolist() == ["5.25%", "5%"]
+    # yearly rules parse When with %d-%b
+    assert df["When"].tolist() == ["13-Jul", "5-Jan"]
+    assert df["Start"].tolist() == ["1/2/2030", ""]
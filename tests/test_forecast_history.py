@@ -0,0 +1,143 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import pandas as pd
+from forecast_history import ForecastHistory
+
+# %%
+# Tests #
+
+
+def get_example_forecast():
+    df_future_cast = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(
+                ["2030-01-01", "2030-01-01", "2030-01-15", "2030-02-01"]
+            ),
+            "Category": ["Housing", "Income", "Utilities", "Housing"],
+            "Type": ["monthly", "biweekly", "monthly", "monthly"],
+            "Account_Name": ["Rent", "Paycheck", "Power", "Rent"],
+            "Occurrence_ID": ["o1", "o2", "o3", "o4"],
+            "Auto_Pay_Account": "Chase Checking",
+            "Amount": [-180000, 250000, -12000, -180000],
+            "Amount_Paid": [-180000, 0, 0, 0],
+            "Date_Paid": ["01/01/2030", "", "", ""],
+        }
+    )
+    unpaid = df_future_cast["Date_Paid"] == ""
+    df_future_cast["Running_Balance"] = (
+        300000 + df_future_cast["Amount"].where(unpaid, 0).cumsum()
+    )
+    return df_future_cast.sort_values(by=["Date", "Amount"]).reset_index(drop=True)
+
+
+def test_runs_round_trip_through_keyframes_and_deltas(tmp_path):
+    forecast_history = ForecastHistory(str(tmp_path), keyframe_interval=2)
+    ls_forecasts = []
+    df_future_cast = get_example_forecast()
+    for i in range(5):
+        df_future_cast = df_future_cast.copy()
+        df_future_cast.loc[df_future_cast["Account_Name"] == "Power", "Amount"] -= i
+        # Power is the third row, it and every row after it move with it
+        df_future_cast["Running_Balance"] -= i * (df_future_cast.index >= 2)
+        ls_forecasts.append(df_future_cast)
+        forecast_history.append_run(df_future_cast, starting_balance=300000)
+
+    # a fresh instance reads the history back from disk
+    forecast_history = ForecastHistory(str(tmp_path), keyframe_interval=2)
+    assert forecast_history.list_runs()["Is_Keyframe"].tolist() == [
+        True,
+        False,
+        True,
+        False,
+        True,
+    ]
+    for run_id, df_expected in enumerate(ls_forecasts):
+        df_run = forecast_history.get_run(run_id)
+        pd.testing.assert_frame_equal(
+            df_run[df_expected.columns], df_expected, check_dtype=False
+        )
+
+
+def test_diff_runs(tmp_path):
+    forecast_history = ForecastHistory(str(tmp_path))
+    df_a = get_example_forecast()
+    df_b = df_a[df_a["Account_Name"] != "Paycheck"].copy()
+    df_b.loc[df_b["Account_Name"] == "Power", "Amount"] = -15000
+    df_b = pd.concat(
+        [
+            df_b,
+            pd.DataFrame(
+                {
+                    "Date": pd.to_datetime(["2030-01-20"]),
+                    "Category": "Subscriptions",
+                    "Type": "oncely",
+                    "Account_Name": "Gym",
+                    "Occurrence_ID": "o5",
+                    "Auto_Pay_Account": "Chase Checking",
+                    "Amount": [-5000],
+                    "Amount_Paid": [0],
+                    "Date_Paid": [""],
+                }
+            ),
+        ]
+    )
+    run_id_a = forecast_history.append_run(df_a, starting_balance=300000)
+    run_id_b = forecast_history.append_run(df_b, starting_balance=300000)
+
+    dict_diff = forecast_history.diff_runs(run_id_a, run_id_b)
+
+    assert dict_diff["added"]["Account_Name"].tolist() == ["Gym"]
+    assert dict_diff["removed"]["Account_Name"].tolist() == ["Paycheck"]
+    assert dict_diff["changed"][
+        ["Occurrence_ID", "Account_Name_B", "Amount_A", "Amount_B"]
+    ].values.tolist() == [["o3", "Power", -12000, -15000]]
+    df_balance_delta = dict_diff["balance_delta"].set_index("Date")
+    assert df_balance_delta["Delta"].tolist() == [-250000, -253000, -258000, -258000]
+
+
+def test_rows_sharing_an_account_and_date_stay_apart(tmp_path):
+    forecast_history = ForecastHistory(str(tmp_path), keyframe_interval=10)
+    df_a = get_example_forecast()
+    df_a = pd.concat(
+        [
+            df_a,
+            pd.DataFrame(
+                {
+                    "Date": pd.to_datetime(["2030-01-01", "2030-01-01"] * 2),
+                    "Category": "Credit",
+                    "Type": ["monthly", "monthly", "oncely", "oncely"],
+                    "Account_Name": "Card",
+                    # two rules on the card and two rows added by hand
+                    "Occurrence_ID": ["c1", "c2", "", ""],
+                    "Auto_Pay_Account": "Chase Checking",
+                    "Amount": [-2000, -3000, -400, -500],
+                    "Amount_Paid": 0,
+                    "Date_Paid": "",
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+    df_b = df_a.copy()
+    df_b.loc[df_b["Occurrence_ID"] == "c2", "Amount"] = -3500
+    # an edit can move an occurrence to another day and keep its id
+    df_b.loc[df_b["Occurrence_ID"] == "c1", "Date"] = pd.Timestamp("2030-01-02")
+
+    run_id_a = forecast_history.append_run(df_a, starting_balance=300000)
+    run_id_b = forecast_history.append_run(df_b, starting_balance=300000)
+
+    for run_id, df_expected in [(run_id_a, df_a), (run_id_b, df_b)]:
+        df_run = forecast_history.get_run(run_id)
+        assert len(df_run) == len(df_expected)
+        assert sorted(df_run["Amount"]) == sorted(df_expected["Amount"])
+    dict_diff = forecast_history.diff_runs(run_id_a, run_id_b)
+    assert dict_diff["added"].empty
+    assert dict_diff["removed"].empty
+    assert dict_diff["changed"][
+        ["Occurrence_ID", "Date_B", "Amount_A", "Amount_B"]
+    ].values.tolist() == [
+        ["c2", pd.Timestamp("2030-01-01"), -3000, -3500],
+        ["c1", pd.Timestamp("2030-01-02"), -2000, -2000],
+    ]
@@ -0,0 +1,96 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import numpy as np
+import pandas as pd
+from forecast_reports import build_forecast_reports
+
+# %%
+# Tests #
+
+
+def get_example_forecast():
+    return pd.DataFrame(
+        {
+            "Date": pd.to_datetime(
+                [
+                    "2030-01-01",
+                    "2030-01-01",
+                    "2030-01-03",
+                    "2030-01-03",
+                    "2030-01-03",
+                    "2030-01-20",
+                ]
+            ),
+            "Type": ["monthly", "oncely", "oncely", "oncely", "weekly", "monthly"],
+            "Account_Name": ["Rent", "Gift", "Bonus", "Repair", "Food", "Pay"],
+            "Amount": [-180000, 5000, 20000, -30000, -10000, 250000],
+            "Running_Balance": [20000, 25000, 45000, 15000, 5000, 255000],
+        }
+    )
+
+
+def expected_daily_balance_report(df_future_cast, as_of, threshold, emergency_fund):
+    """The report as a merge of end of day balances with the one-time rows"""
+    df_end_of_day = df_future_cast[["Date", "Running_Balance"]].drop_duplicates(
+        subset=["Date"], keep="last"
+    )
+    df_label_dates = df_future_cast[df_future_cast["Type"] == "oncely"].rename(
+        columns={"Amount": "Label_Amount", "Account_Name": "Label_Item"}
+    )[["Date", "Label_Item", "Label_Amount"]]
+    df = pd.merge(df_end_of_day, df_label_dates, how="left", on="Date")
+    df["Label_Item"] = df["Label_Item"].fillna("")
+    df["Emergency_Fund_Amount"] = emergency_fund * -1
+    df["Alert_Threshold"] = threshold
+    df["Zero"] = 0
+    return df[df["Date"] >= pd.Timestamp(as_of) - pd.Timedelta(days=10)]
+
+
+def test_reports_match_separate_passes():
+    df_future_cast = get_example_forecast()
+
+    dict_reports = build_forecast_reports(
+        df_future_cast, "2030-01-12", threshold=10000, emergency_fund_amount=600000
+    )
+
+    assert dict_reports["end_of_day"]["Running_Balance"].tolist() == [
+        25000,
+        5000,
+        255000,
+    ]
+    assert dict_reports["label_dates"]["Label_Item"].tolist() == [
+        "Gift",
+        "Bonus",
+        "Repair",
+    ]
+    # the balance on the 3rd is below the threshold but before the day before as-of
+    assert dict_reports["alert_dates"].empty
+    pd.testing.assert_frame_equal(
+        dict_reports["daily_balance"],
+        expected_daily_balance_report(df_future_cast, "2030-01-12", 10000, 600000),
+    )
+
+
+def test_unsorted_forecast_is_read_in_date_order():
+    df_future_cast = get_example_forecast()
+    df_shuffled = df_future_cast.iloc[[5, 0, 1, 2, 3, 4]]
+
+    dict_reports = build_forecast_reports(
+        df_shuffled, "2030-01-01", threshold=10000, emergency_fund_amount=0
+    )
+
+    assert dict_reports["alert_dates"]["Date"].tolist() == [pd.Timestamp("2030-01-03")]
+    assert dict_reports["end_of_day"].index.tolist() == [1, 4, 5]
+
+
+def test_no_one_time_rows_leave_labels_blank():
+    df_future_cast = get_example_forecast()
+    df_future_cast["Type"] = "monthly"
+
+    df_daily_balance = build_forecast_reports(
+        df_future_cast, "2030-01-01", threshold=0, emergency_fund_amount=0
+    )["daily_balance"]
+
+    assert df_daily_balance["Label_Item"].tolist() == ["", "", ""]
+    assert np.isnan(df_daily_balance["Label_Amount"]).all()
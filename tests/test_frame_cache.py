@@ -0,0 +1,53 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import numpy as np
+import pandas as pd
+import pytest
+from frame_cache import get_frame_view
+
+# %%
+# Tests #
+
+
+@pytest.fixture
+def copy_on_write():
+    # the entry points turn it on, importing frame_cache leaves it alone
+    with pd.option_context("mode.copy_on_write", True):
+        yield
+
+
+def test_view_shares_arrays_until_written(copy_on_write):
+    df_cached = pd.DataFrame({"Amount": np.arange(5), "Type": ["monthly"] * 5})
+
+    df_view = get_frame_view(df_cached)
+
+    assert np.shares_memory(
+        df_view["Amount"].to_numpy(), df_cached["Amount"].to_numpy()
+    )
+    df_view["Amount"] = df_view["Amount"] * 100
+    df_view.loc[0, "Type"] = "oncely"
+    assert df_cached["Amount"].tolist() == [0, 1, 2, 3, 4]
+    assert df_cached["Type"].tolist() == ["monthly"] * 5
+
+
+def test_cached_frame_writes_do_not_reach_views(copy_on_write):
+    df_cached = pd.DataFrame({"Amount": np.arange(3)})
+    df_view = get_frame_view(df_cached)
+
+    df_cached.loc[1, "Amount"] = 10
+
+    assert df_view["Amount"].tolist() == [0, 1, 2]
+
+
+def test_views_are_deep_copies_without_copy_on_write():
+    with pd.option_context("mode.copy_on_write", False):
+        df_cached = pd.DataFrame({"Amount": np.arange(3)})
+        df_view = get_frame_view(df_cached)
+        df_view.loc[1, "Amount"] = 10
+
+        assert not np.shares_memory(
+            df_view["Amount"].to_numpy(), df_cached["Amount"].to_numpy()
+        )
+        assert df_cached["Amount"].tolist() == [0, 1, 2]
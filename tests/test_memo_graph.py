@@ -0,0 +1,82 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import pandas as pd
+import pytest
+from memo_graph import MemoGraph
+
+# %%
+# Tests #
+
+
+def get_example_graph(dict_calls):
+    def count(name, value):
+        dict_calls[name] = dict_calls.get(name, 0) + 1
+        return value
+
+    memo_graph = MemoGraph()
+    memo_graph.register(
+        "pivot",
+        lambda: count("pivot", pd.DataFrame({"Balance": [1, 2]})),
+        ls_sources=["account_balances"],
+    )
+    memo_graph.register(
+        "report",
+        lambda: count("report", memo_graph.get("pivot")["Balance"].sum()),
+        ls_sources=["account_details"],
+        ls_nodes=["pivot"],
+    )
+    memo_graph.register(
+        "fund",
+        lambda months: count("fund", 100 * months),
+        ls_sources=["income_expense_df"],
+    )
+    return memo_graph
+
+
+def test_refresh_drops_only_dependent_results():
+    dict_calls = {}
+    memo_graph = get_example_graph(dict_calls)
+
+    for _ in range(3):
+        assert memo_graph.get("report") == 3
+        assert memo_graph.get("fund", months=6) == 600
+    assert memo_graph.get("fund", months=3) == 300
+    assert dict_calls == {"pivot": 1, "report": 1, "fund": 2}
+
+    # the report depends on the balances through the pivot
+    memo_graph.invalidate("account_balances")
+    memo_graph.get("report")
+    memo_graph.get("fund", months=6)
+    assert dict_calls == {"pivot": 2, "report": 2, "fund": 2}
+
+    memo_graph.invalidate("account_details")
+    memo_graph.get("report")
+    assert dict_calls == {"pivot": 2, "report": 3, "fund": 2}
+
+
+def test_result_of_a_refreshed_source_is_not_kept():
+    memo_graph = MemoGraph()
+
+    def compute():
+        # the tab refreshes while the result is being computed
+        memo_graph.invalidate("account_balances")
+        return pd.DataFrame({"Balance": [1]})
+
+    memo_graph.register("pivot", compute, ls_sources=["account_balances"])
+    memo_graph.get("pivot")
+    memo_graph.get("pivot")
+
+    assert memo_graph.num_misses == 2
+
+
+def test_cached_frames_are_handed_out_as_copies():
+    memo_graph = get_example_graph({})
+
+    df_pivot = memo_graph.get("pivot")
+    df_pivot.loc[0, "Balance"] = 100
+
+    assert memo_graph.get("pivot")["Balance"].tolist() == [1, 2]
+    with pytest.raises(ValueError):
+        memo_graph.register("summary", lambda: 0, ls_nodes=["missing"])
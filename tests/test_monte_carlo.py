@@ -0,0 +1,138 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import monte_carlo
+import numpy as np
+import pandas as pd
+from monte_carlo import run_monte_carlo, simulate_balance_paths
+
+# %%
+# Helpers #
+
+
+def get_example_forecast(start_date, num_days):
+    return pd.DataFrame(
+        {
+            "Date": pd.date_range(start_date, periods=num_days, freq="D"),
+            "Type": "everyXDays",
+            "Account_Name": "Groceries",
+            "Amount": -10.0,
+            "Date_Paid": "",
+        }
+    )
+
+
+# %%
+# Tests #
+
+
+def test_no_noise_matches_deterministic_forecast():
+    start_date = pd.Timestamp("2030-01-01")
+    df = get_example_forecast(start_date, 30)
+
+    df_bands = run_monte_carlo(
+        df,
+        starting_balance=500,
+        threshold=300,
+        start_date=start_date,
+        num_days=30,
+        num_scenarios=50,
+        amount_noise=0,
+        shocks_per_year=0,
+        seed=1,
+    )
+
+    expected = 500 - 10.0 * np.arange(1, 31)
+    assert np.allclose(df_bands["P5"], expected)
+    assert np.allclose(df_bands["P95"], expected)
+    # balance first goes under 300 on day 21
+    assert df_bands["Prob_Below_Threshold"].iloc[19] == 0
+    assert df_bands["Prob_Below_Threshold"].iloc[20] == 1
+
+
+def test_chunks_are_reproducible_with_seed():
+    start_date = pd.Timestamp("2030-01-01")
+    df = get_example_forecast(start_date, 60)
+    kwargs = dict(
+        starting_balance=1000,
+        threshold=600,
+        start_date=start_date,
+        num_days=60,
+        num_scenarios=40,
+        seed=7,
+        chunk_size=10,
+        max_workers=2,
+    )
+
+    df_first = run_monte_carlo(df, **kwargs)
+    df_second = run_monte_carlo(df, **kwargs)
+
+    pd.testing.assert_frame_equal(df_first, df_second)
+    assert (df_first["Prob_Breached_By_Date"].diff().dropna() >= 0).all()
+
+
+def test_income_delay_stays_inside_horizon():
+    occurrences = {
+        "day_idx": np.array([9]),
+        "amount": np.array([100.0]),
+        "rule_idx": np.array([0]),
+        "rule_names": ["Paycheck|biweekly"],
+        "num_days": 10,
+    }
+    balances = simulate_balance_paths(
+        occurrences,
+        rule_noise=np.zeros(1),
+        starting_balance=0,
+        num_scenarios=100,
+        rng=np.random.default_rng(0),
+        income_delay_prob=1.0,
+        shocks_per_year=0,
+    )
+
+    assert balances.shape == (100, 10)
+    assert np.allclose(balances[:, -1], 100)
+
+
+def test_one_worker_runs_the_chunks_in_process(monkeypatch):
+    start_date = pd.Timestamp("2030-01-01")
+    df = get_example_forecast(start_date, 60)
+    kwargs = dict(
+        starting_balance=1000,
+        threshold=600,
+        start_date=start_date,
+        num_days=60,
+        num_scenarios=40,
+        seed=7,
+        chunk_size=10,
+    )
+    df_pooled = run_monte_carlo(df, max_workers=2, **kwargs)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a process pool was started")
+
+    monkeypatch.setattr(monte_carlo, "ProcessPoolExecutor", no_pool)
+    df_in_process = run_monte_carlo(df, max_workers=1, **kwargs)
+
+    pd.testing.assert_frame_equal(df_in_process, df_pooled)
+
+
+def test_large_balances_keep_their_cents():
+    start_date = pd.Timestamp("2030-01-01")
+    df = get_example_forecast(start_date, 30).assign(Amount=-1)
+    # past 2**24 cents a float32 balance can no longer hold every cent
+    starting_balance = 2**24 * 10 + 1
+
+    df_bands = run_monte_carlo(
+        df,
+        starting_balance=starting_balance,
+        threshold=0,
+        start_date=start_date,
+        num_days=30,
+        num_scenarios=20,
+        amount_noise=0,
+        shocks_per_year=0,
+        seed=1,
+    )
+
+    assert df_bands["P50"].tolist() == list(starting_balance - np.arange(1, 31))
@@ -0,0 +1,46 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+from quota_budget import QuotaBudget
+
+# %%
+# Tests #
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.ls_sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.ls_sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_budget_waits_once_a_minute_of_requests_is_spent():
+    clock = FakeClock()
+    quota_budget = QuotaBudget(60, clock=clock, sleep=clock.sleep)
+
+    for _ in range(60):
+        quota_budget.acquire()
+    assert clock.ls_sleeps == []
+
+    quota_budget.acquire(3)
+    assert clock.ls_sleeps == [3.0]
+    assert quota_budget.num_acquired == 63
+
+
+def test_budget_refills_up_to_one_minute():
+    clock = FakeClock()
+    quota_budget = QuotaBudget(60, clock=clock, sleep=clock.sleep)
+    quota_budget.acquire(60)
+
+    clock.now += 600
+    quota_budget.acquire(60)
+    quota_budget.acquire(1)
+
+    assert clock.ls_sleeps == [1.0]
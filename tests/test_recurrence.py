@@ -0,0 +1,131 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import pandas as pd
+from recurrence import BusinessCalendar, generate_occurrences
+
+# %%
+# Tests #
+
+
+def get_dates(df_occurrences, account_name) -> list:
+    df = df_occurrences[df_occurrences["Account_Name"] == account_name]
+    return df["Date"].dt.strftime("%Y-%m-%d").tolist()
+
+
+def test_rules_generate_expected_dates():
+    df_rules = pd.DataFrame(
+        {
+            "Type": [
+                "monthly",
+                "semiMonthly",
+                "weekly",
+                "nthWeekday",
+                "nthWeekday",
+                "everyXDays",
+                "lastBusinessDay",
+                "notARule",
+            ],
+            "When": [
+                "31",
+                "15,31",
+                "Fri",
+                "2 Tue",
+                "-1 Fri",
+                "1/1/2030",
+                "",
+                "",
+            ],
+            "AfterDays": [0, 0, 0, 0, 0, 10, 0, 0],
+            "Account_Name": [
+                "Monthly",
+                "Semi",
+                "Weekly",
+                "Second_Tue",
+                "Last_Fri",
+                "Every_10",
+                "Last_Business",
+                "Ignored",
+            ],
+        }
+    )
+
+    df_occurrences = generate_occurrences(df_rules, "2030-02-01", "2030-03-10")
+
+    # day 31 is clamped to the end of February
+    assert get_dates(df_occurrences, "Monthly") == ["2030-02-28"]
+    assert get_dates(df_occurrences, "Semi") == ["2030-02-15", "2030-02-28"]
+    assert get_dates(df_occurrences, "Weekly") == [
+        "2030-02-01",
+        "2030-02-08",
+        "2030-02-15",
+        "2030-02-22",
+        "2030-03-01",
+        "2030-03-08",
+    ]
+    assert get_dates(df_occurrences, "Second_Tue") == ["2030-02-12"]
+    assert get_dates(df_occurrences, "Last_Fri") == ["2030-02-22"]
+    assert get_dates(df_occurrences, "Every_10") == [
+        "2030-02-10",
+        "2030-02-20",
+        "2030-03-02",
+    ]
+    assert get_dates(df_occurrences, "Last_Business") == ["2030-02-28"]
+    assert "Ignored" not in df_occurrences["Account_Name"].tolist()
+    assert df_occurrences["Date"].is_monotonic_increasing
+
+
+def test_business_day_roll_conventions():
+    # 2030-08-31 is a Saturday, 2030-09-02 is Labor Day
+    df_rules = pd.DataFrame(
+        {
+            "Type": "monthly",
+            "When": "31",
+            "AfterDays": 0,
+            "Account_Name": ["None", "Following", "Preceding", "Modified"],
+            "Business_Day_Roll": [
+                "",
+                "following",
+                "preceding",
+                "modifiedFollowing",
+            ],
+        }
+    )
+
+    df_occurrences = generate_occurrences(df_rules, "2030-08-25", "2030-09-05")
+
+    assert get_dates(df_occurrences, "None") == ["2030-08-31"]
+    assert get_dates(df_occurrences, "Following") == ["2030-09-03"]
+    assert get_dates(df_occurrences, "Preceding") == ["2030-08-30"]
+    assert get_dates(df_occurrences, "Modified") == ["2030-08-30"]
+
+
+def test_business_calendar_holidays():
+    business_calendar = BusinessCalendar("2030-01-01", "2030-12-31")
+    is_business = business_calendar.is_business(
+        pd.to_datetime(["2030-07-04", "2030-11-28", "2030-12-24", "2030-12-28"])
+    )
+    assert is_business.tolist() == [False, False, True, False]
+
+
+def test_occurrence_ids_are_stable_and_distinct():
+    df_rules = pd.DataFrame(
+        {
+            "Type": ["monthly", "monthly", "monthly"],
+            "When": ["1", "1", "15"],
+            "AfterDays": 0,
+            "Account_Name": ["Rent", "Rent", "Rent"],
+            "Amount": [-180000, -5000, -1000],
+        }
+    )
+
+    df_a = generate_occurrences(df_rules, "2030-01-01", "2030-02-28")
+    # an edited amount keeps the ids and a wider range keeps the shared ones
+    df_rules.loc[0, "Amount"] = -190000
+    df_b = generate_occurrences(df_rules, "2029-12-01", "2030-02-28")
+
+    # two rules on the same account and day get their own ids
+    assert df_a["Occurrence_ID"].is_unique
+    assert len(df_a) == 6
+    assert set(df_a["Occurrence_ID"]) <= set(df_b["Occurrence_ID"])
@@ -0,0 +1,80 @@
+# %%
+# Imports #
+
+import os
+import threading
+
+import config_tests  # noqa F401
+import pandas as pd
+from report_sink import ReportSink, get_journal_dir, read_journal_entries
+
+# %%
+# Tests #
+
+
+def test_superseded_writes_are_coalesced(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+    ls_written = []
+
+    def blocking_write(sheet_name, df):
+        started.set()
+        release.wait(timeout=5)
+        ls_written.append((sheet_name, df["Run"].iloc[0]))
+
+    report_sink = ReportSink({"sheet": blocking_write}, journal_dir=str(tmp_path))
+    for i in range(4):
+        report_sink.submit(
+            "Report", "sheet", sheet_name="Report", df=pd.DataFrame({"Run": [i]})
+        )
+        started.wait(timeout=5)
+    release.set()
+    report_sink.close(timeout=5)
+
+    # the first write was already in flight, the next two were superseded
+    assert ls_written == [("Report", 0), ("Report", 3)]
+    assert os.listdir(tmp_path) == []
+
+
+def test_failed_writes_stay_journaled_and_replay(tmp_path):
+    def failing_write(sheet_name, df):
+        raise ConnectionError("offline")
+
+    report_sink = ReportSink({"sheet": failing_write}, journal_dir=str(tmp_path))
+    report_sink.submit(
+        "Report", "sheet", sheet_name="Report", df=pd.DataFrame({"Run": [1]})
+    )
+    report_sink.close(timeout=5)
+    assert [entry["key"] for entry in read_journal_entries(str(tmp_path))] == ["Report"]
+
+    ls_written = []
+    report_sink = ReportSink(
+        {"sheet": lambda sheet_name, df: ls_written.append(sheet_name)},
+        journal_dir=str(tmp_path),
+    )
+    assert report_sink.flush(timeout=5)
+    report_sink.close(timeout=5)
+
+    assert ls_written == ["Report"]
+    assert read_journal_entries(str(tmp_path)) == []
+
+
+def test_each_target_gets_its_own_journal(tmp_path):
+    journal_root = str(tmp_path)
+    ls_journal_dirs = [
+        get_journal_dir("sheets", "Our_Cash", journal_root=journal_root),
+        get_journal_dir("excel", "/home/me/Our_Cash", journal_root=journal_root),
+        get_journal_dir("excel", "/home/me/Our:Cash", journal_root=journal_root),
+        get_journal_dir("sheets", "Our_Cash", "smith", journal_root=journal_root),
+        get_journal_dir("sheets", "Our_Cash", "jones", journal_root=journal_root),
+    ]
+
+    assert len(set(ls_journal_dirs)) == len(ls_journal_dirs)
+    assert all(
+        os.path.dirname(journal_dir) == journal_root for journal_dir in ls_journal_dirs
+    )
+    # the same target finds the journal it left behind, a missing household
+    # is the same as none
+    assert ls_journal_dirs[0] == get_journal_dir(
+        "sheets", "Our_Cash", None, journal_root=journal_root
+    )
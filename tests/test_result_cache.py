@@ -0,0 +1,95 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import pandas as pd
+import result_cache
+from recurrence import BusinessCalendar
+from result_cache import ResultCache, get_cache_key
+
+# %%
+# Tests #
+
+
+def get_example_frame():
+    return pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2030-01-01", "2030-01-15"]),
+            "Account_Name": ["Rent", "Power"],
+            "Amount": [-180000, -12000],
+        }
+    )
+
+
+def test_cache_key_follows_values_dtypes_and_as_of():
+    df = get_example_frame()
+    key = get_cache_key({"df": df}, as_of="2030-01-01")
+
+    assert get_cache_key({"df": df.copy()}, as_of="2030-01-01 08:00") == key
+    assert get_cache_key({"df": df}, as_of="2030-01-02") != key
+    assert get_cache_key({"df": df.astype({"Amount": "float64"})}) != key
+
+    df_changed = df.copy()
+    df_changed.loc[1, "Amount"] = -15000
+    assert get_cache_key({"df": df_changed}, as_of="2030-01-01") != key
+
+
+def test_cache_key_follows_calendar_and_cache_version(monkeypatch):
+    df = get_example_frame()
+    business_calendar = BusinessCalendar("2030-01-01", "2030-12-31")
+    key = get_cache_key({"df": df}, business_calendar=business_calendar.get_hash())
+
+    business_calendar_same = BusinessCalendar("2030-01-01", "2030-12-31")
+    assert (
+        get_cache_key({"df": df}, business_calendar=business_calendar_same.get_hash())
+        == key
+    )
+    business_calendar_holiday = BusinessCalendar(
+        "2030-01-01", "2030-12-31", holidays=["2030-03-04"]
+    )
+    assert (
+        get_cache_key(
+            {"df": df}, business_calendar=business_calendar_holiday.get_hash()
+        )
+        != key
+    )
+
+    monkeypatch.setattr(result_cache, "CACHE_VERSION", result_cache.CACHE_VERSION + 1)
+    assert (
+        get_cache_key({"df": df}, business_calendar=business_calendar.get_hash()) != key
+    )
+
+
+def test_get_or_compute_reads_back_hits(tmp_path):
+    result_cache = ResultCache(str(tmp_path))
+    ls_calls = []
+
+    def compute():
+        ls_calls.append(1)
+        return get_example_frame()
+
+    dict_frames = {"df": get_example_frame()}
+    df_a = result_cache.get_or_compute(
+        "forecast", dict_frames, compute, as_of="2030-01-01"
+    )
+    # a fresh instance reads the result back from disk
+    result_cache = ResultCache(str(tmp_path))
+    df_b = result_cache.get_or_compute(
+        "forecast", dict_frames, compute, as_of="2030-01-01"
+    )
+
+    assert len(ls_calls) == 1
+    pd.testing.assert_frame_equal(df_a, df_b)
+    pd.testing.assert_frame_equal(
+        result_cache.get_as_of("forecast", "2030-01-01"), df_a
+    )
+    assert result_cache.get_as_of("forecast", "2030-01-02") is None
+
+
+def test_prune_keeps_most_recent(tmp_path):
+    result_cache = ResultCache(str(tmp_path), max_entries_per_name=2)
+    for i in range(4):
+        result_cache.put("forecast", f"key_{i}", i)
+
+    assert result_cache.get("forecast", "key_0") is None
+    assert result_cache.get("forecast", "key_3") == 3
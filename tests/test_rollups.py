@@ -0,0 +1,109 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import numpy as np
+import pandas as pd
+from rollups import (
+    DICT_ROLLUP_DTYPES,
+    compute_forecast_rollups,
+    compute_rollup,
+    get_report_freq,
+)
+
+# %%
+# Tests #
+
+
+def test_rollup_matches_groupby():
+    rng = np.random.default_rng(5)
+    dates = np.sort(
+        pd.Timestamp("2030-01-01").to_datetime64()
+        + rng.integers(0, 3000, 500).astype("timedelta64[D]")
+    )
+    flows = rng.integers(-30000, 30000, 500)
+    running_balances = 100000 + np.cumsum(flows)
+
+    df_rollup = compute_rollup(dates, flows, running_balances, "M", 100000)
+
+    df_expected = (
+        pd.DataFrame({"Date": dates, "Flow": flows, "Balance": running_balances})
+        .groupby(pd.to_datetime(dates).to_period("M"))
+        .agg(
+            Inflows=("Flow", lambda x: x[x > 0].sum()),
+            End_Balance=("Balance", "last"),
+        )
+    )
+    df_rollup = df_rollup.set_index(
+        pd.to_datetime(df_rollup["Period_Start"]).dt.to_period("M")
+    )
+    assert (df_rollup.loc[df_expected.index, "Inflows"] == df_expected["Inflows"]).all()
+    assert (
+        df_rollup.loc[df_expected.index, "End_Balance"] == df_expected["End_Balance"]
+    ).all()
+    assert df_rollup["Net"].sum() == flows.sum()
+
+
+def test_empty_periods_carry_balance_forward():
+    df_future_cast = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2030-01-01", "2030-01-01", "2030-03-15"]),
+            "Amount": [-10000, 250000, -90000],
+            "Date_Paid": ["", "", ""],
+        }
+    )
+    df_future_cast["Running_Balance"] = 100000 + df_future_cast["Amount"].cumsum()
+
+    df_monthly = compute_forecast_rollups(df_future_cast, starting_balance=100000)["M"]
+
+    assert df_monthly["End_Balance"].tolist() == [340000, 340000, 250000]
+    assert df_monthly["Min_Balance"].tolist() == [90000, 340000, 250000]
+    assert df_monthly["Num_Transactions"].tolist() == [2, 0, 1]
+
+
+def test_report_freq_follows_horizon():
+    assert get_report_freq("2030-01-01", "2031-12-31") == "D"
+    assert get_report_freq("2030-01-01", "2039-12-31") == "W"
+    assert get_report_freq("2030-01-01", "2059-12-31") == "M"
+    assert get_report_freq("2030-01-01", "2130-12-31") == "Y"
+
+
+def test_history_before_min_date_only_sets_starting_balance():
+    df_future_cast = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2029-01-10", "2029-06-01", "2030-01-05"]),
+            "Amount": [-5000, -20000, -10000],
+            "Date_Paid": ["", "", ""],
+        }
+    )
+    df_future_cast["Running_Balance"] = 100000 + df_future_cast["Amount"].cumsum()
+
+    df_monthly = compute_forecast_rollups(
+        df_future_cast, starting_balance=100000, min_date="2030-01-01"
+    )["M"]
+
+    assert df_monthly["Period_Start"].tolist() == [pd.Timestamp("2030-01-01")]
+    assert df_monthly["Outflows"].tolist() == [-10000]
+    assert df_monthly["Min_Balance"].tolist() == [65000]
+
+
+def test_empty_forecast_has_no_periods():
+    df_future_cast = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2029-01-10"]),
+            "Amount": [-5000],
+            "Date_Paid": [""],
+            "Running_Balance": [95000],
+        }
+    )
+
+    dict_rollups = compute_forecast_rollups(df_future_cast.head(0))
+    # history only, nothing from min_date on
+    dict_rollups_after = compute_forecast_rollups(
+        df_future_cast, starting_balance=100000, min_date="2030-01-01"
+    )
+
+    for df_rollup in [*dict_rollups.values(), *dict_rollups_after.values()]:
+        assert df_rollup.empty
+        assert df_rollup.columns.tolist() == list(DICT_ROLLUP_DTYPES)
+        assert df_rollup["End_Balance"].dtype == np.int64
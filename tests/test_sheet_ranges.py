@@ -0,0 +1,120 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import pandas as pd
+from sheet_ranges import (
+    UNFORMATTED_VALUE,
+    fetch_projected_sheet,
+    get_a1_range,
+    get_column_runs,
+)
+
+# %%
+# Tests #
+
+LS_HEADER = ["Date", "Notes", "Account_Name", "Balance", "Checked_By"]
+# formatted and unformatted values of each row, as the Sheets API returns them
+LS_FORMATTED_ROWS = [
+    ["1/1/2030", "opening", "Chase Checking", "$3,100.50", "me"],
+    ["2/1/2030", "", "Chase Checking", "$2,900.00"],
+    ["3/1/2030", "after rent", "Savings", "$12,000.00", "me"],
+]
+LS_UNFORMATTED_ROWS = [
+    [47484, "opening", "Chase Checking", 3100.5, "me"],
+    [47515, "", "Chase Checking", 2900],
+    [47543, "after rent", "Savings", 12000, "me"],
+]
+
+
+def get_fake_values_batch_get(ls_requests):
+    """values_batch_get over the example tab, recording each request"""
+
+    def values_batch_get(ls_ranges, value_render_option, date_time_render_option):
+        ls_requests.append((list(ls_ranges), value_render_option))
+        ls_rows = (
+            LS_UNFORMATTED_ROWS
+            if value_render_option == UNFORMATTED_VALUE
+            else LS_FORMATTED_ROWS
+        )
+        ls_blocks = []
+        for a1_range in ls_ranges:
+            cells = a1_range.split("!")[1]
+            if cells == "1:1":
+                ls_blocks.append([LS_HEADER])
+                continue
+            first, last = cells.split(":")
+            first_index = ord(first[0]) - ord("A")
+            stop_index = ord(last[0]) - ord("A") + 1
+            # ls_rows starts at sheet row 2, below the header
+            first_row_index = int(first[1:]) - 2
+            ls_blocks.append(
+                [row[first_index:stop_index] for row in ls_rows[first_row_index:]]
+            )
+        return ls_blocks
+
+    return values_batch_get
+
+
+def test_column_runs_split_on_gaps_and_render_option():
+    ls_runs = get_column_runs(
+        LS_HEADER, ["Date", "Account_Name", "Balance", "Missing"], ["Date", "Balance"]
+    )
+
+    assert ls_runs == [(0, 0, True), (2, 2, False), (3, 3, True)]
+    assert get_a1_range("Bob's Tab", 2, 3, 2) == "'Bob''s Tab'!C2:D"
+    assert get_a1_range("Data", 25, 27, 2, 9) == "'Data'!Z2:AB9"
+
+
+def test_fetch_requests_only_projected_columns():
+    ls_requests = []
+
+    df = fetch_projected_sheet(
+        get_fake_values_batch_get(ls_requests),
+        "Account_Date_Balances",
+        ls_columns=["Date", "Account_Name", "Balance"],
+        ls_typed_columns=["Date", "Balance"],
+        ls_date_columns=["Date"],
+    )
+
+    ls_ranges = [a1_range for ls_ranges, _ in ls_requests for a1_range in ls_ranges]
+    assert "'Account_Date_Balances'!B2:B" not in ls_ranges
+    assert "'Account_Date_Balances'!E2:E" not in ls_ranges
+    assert df.columns.tolist() == ["Date", "Account_Name", "Balance"]
+    assert df["Date"].tolist() == list(
+        pd.to_datetime(["2030-01-01", "2030-02-01", "2030-03-01"])
+    )
+    assert df["Balance"].tolist() == [3100.5, 2900, 12000]
+    assert df["Account_Name"].tolist() == [
+        "Chase Checking",
+        "Chase Checking",
+        "Savings",
+    ]
+
+
+def test_fetch_pads_ragged_rows_and_keeps_display_strings():
+    df = fetch_projected_sheet(get_fake_values_batch_get([]), "Account_Date_Balances")
+
+    assert df.columns.tolist() == LS_HEADER
+    assert df["Balance"].tolist() == ["$3,100.50", "$2,900.00", "$12,000.00"]
+    assert df["Checked_By"].tolist() == ["me", "", "me"]
+
+
+def test_fetch_from_min_date_starts_at_first_matching_row():
+    ls_requests = []
+
+    df = fetch_projected_sheet(
+        get_fake_values_batch_get(ls_requests),
+        "Account_Date_Balances",
+        ls_columns=["Date", "Balance"],
+        ls_typed_columns=["Date", "Balance"],
+        ls_date_columns=["Date"],
+        min_date_column="Date",
+        min_date="2030-02-01",
+    )
+
+    assert ls_requests[-1][0] == [
+        "'Account_Date_Balances'!A3:A",
+        "'Account_Date_Balances'!D3:D",
+    ]
+    assert df["Balance"].tolist() == [2900, 12000]
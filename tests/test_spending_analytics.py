@@ -0,0 +1,141 @@
+# %%
+# Imports #
+
+import config_tests  # noqa F401
+import numpy as np
+import pandas as pd
+from bank_adapters import DICT_TRANSACTION_DTYPES
+from spending_analytics import (
+    SpendingHistory,
+    get_key_monthly_spend,
+    get_monthly_spend,
+    get_trailing_monthly_spend,
+    suggest_income_expense_amounts,
+)
+
+# %%
+# Tests #
+
+
+def get_example_transactions(file_name, ls_rows):
+    df = pd.DataFrame(
+        ls_rows, columns=["post_date", "description", "category", "amount"]
+    )
+    return df.assign(
+        bank="chase",
+        account_type="credit_card",
+        file_name=file_name,
+        transaction_date=pd.to_datetime(df["post_date"]),
+        post_date=pd.to_datetime(df["post_date"]),
+        type="Sale",
+    )[list(DICT_TRANSACTION_DTYPES)].astype(DICT_TRANSACTION_DTYPES)
+
+
+def get_example_history():
+    ls_rows = []
+    for month in pd.period_range("2029-01", "2030-12", freq="M"):
+        start = month.start_time
+        ls_rows.append((start + pd.Timedelta(days=1), "ACME RENT 123", None, -1900.0))
+        ls_rows.append((start + pd.Timedelta(days=5), "KROGER", "Groceries", -300.0))
+        ls_rows.append((start + pd.Timedelta(days=9), "PAYMENT THANK YOU", None, 500))
+        if month.month == 7:
+            ls_rows.append((start, "CAR INSURANCE CO", None, -1100.0 - month.year))
+    return ls_rows
+
+
+def test_statements_added_one_at_a_time_match_all_at_once(tmp_path):
+    ls_rows = get_example_history()
+    df_all = get_example_transactions("all.csv", ls_rows)
+
+    spending_history = SpendingHistory(str(tmp_path / "history"))
+    df_first = get_example_transactions("a.csv", ls_rows[:40])
+    spending_history.add_transactions(df_first)
+    # a statement already in the history is not summed twice
+    assert spending_history.add_transactions(df_first) == 0
+    spending_history.add_transactions(get_example_transactions("b.csv", ls_rows[40:]))
+
+    # read back from disk like the next run would
+    df_monthly = SpendingHistory(str(tmp_path / "history")).get_monthly_spend()
+    pd.testing.assert_frame_equal(df_monthly, get_monthly_spend(df_all))
+
+
+def test_statement_downloaded_again_replaces_its_totals(tmp_path):
+    ls_rows = get_example_history()
+    spending_history = SpendingHistory(str(tmp_path / "history"))
+    ls_refreshed = []
+    spending_history.add_refresh_listener(ls_refreshed.append)
+
+    statement_path = tmp_path / "chase.csv"
+    ls_lines = ["Transaction Date,Post Date,Description,Category,Type,Amount"]
+    for post_date, description, category, amount in ls_rows[:30]:
+        post_date = f"{post_date:%m/%d/%Y}"
+        ls_lines.append(
+            f"{post_date},{post_date},{description},{category or ''},Sale,{amount}"
+        )
+    statement_path.write_text("\n".join(ls_lines) + "\n")
+    assert spending_history.add_statement_files([str(statement_path)]) == 30
+    assert spending_history.add_statement_files([str(statement_path)]) == 0
+    assert ls_refreshed == ["spending_history"]
+
+    # the same statement name, downloaded again after more rows posted
+    for post_date, description, category, amount in ls_rows[30:40]:
+        post_date = f"{post_date:%m/%d/%Y}"
+        ls_lines.append(
+            f"{post_date},{post_date},{description},{category or ''},Sale,{amount}"
+        )
+    statement_path.write_text("\n".join(ls_lines) + "\n")
+    assert spending_history.add_statement_files([str(statement_path)]) == 40
+    assert ls_refreshed == ["spending_history"] * 2
+
+    df_expected = get_monthly_spend(get_example_transactions("chase.csv", ls_rows[:40]))
+    pd.testing.assert_frame_equal(
+        SpendingHistory(str(tmp_path / "history")).get_monthly_spend(), df_expected
+    )
+
+
+def test_suggestions_follow_trailing_and_seasonal_spend():
+    df_monthly = get_monthly_spend(
+        get_example_transactions("all.csv", get_example_history())
+    )
+    df_income_expense = pd.DataFrame(
+        {
+            "Account_Name": ["Rent", "Groceries", "Car Insurance", "Paycheck"],
+            "Type": ["monthly", "everyXDays", "yearly", "biweekly"],
+            "When": ["1", "1/3/2030", "13-Jul", "1/2/2030"],
+            "AfterDays": [0, 14, 0, 0],
+            "Amount": [-180000, -15000, -90000, 250000],
+            "AverageMonthlyCost": [180000, 30000, 7500, 0],
+        }
+    )
+
+    df_suggestions = suggest_income_expense_amounts(
+        df_income_expense, df_monthly, as_of="2031-01-15"
+    ).set_index("Account_Name")
+
+    assert df_suggestions.loc["Rent", "Suggested_Amount"] == -190000
+    assert df_suggestions.loc["Groceries", "Suggested_AverageMonthlyCost"] == 30000
+    assert df_suggestions.loc["Groceries", "Suggested_Amount"] == round(
+        -30000 * 12 / (365.25 / 14)
+    )
+    # the two Julys in the history averaged
+    assert df_suggestions.loc["Car Insurance", "Suggested_Amount"] == -312950
+    assert pd.isna(df_suggestions.loc["Paycheck", "Suggested_Amount"])
+
+
+def test_short_history_averages_over_the_months_it_covers():
+    df_monthly = get_monthly_spend(
+        get_example_transactions(
+            "a.csv",
+            [
+                ("2030-11-03", "KROGER", "Groceries", -200.0),
+                ("2030-11-20", "KROGER", "Groceries", 50.0),
+            ],
+        )
+    )
+
+    trailing_spend = get_trailing_monthly_spend(
+        get_key_monthly_spend(df_monthly, []), as_of="2031-01-02"
+    )
+
+    assert trailing_spend.to_dict() == {"Groceries": 7500}
+    assert np.issubdtype(trailing_spend.dtype, np.floating)
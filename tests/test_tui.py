@@ -0,0 +1,95 @@
+# %%
+# Imports #
+
+import curses
+
+import config_tests  # noqa F401
+import numpy as np
+import pandas as pd
+from api import ForecastStore
+from tui import DICT_VIEWS, TableView, handle_key, render_rows
+
+# %%
+# Tests #
+
+
+def get_daily_forecast(num_days):
+    dates = pd.date_range("2030-01-01", periods=num_days, freq="D")
+    return {
+        "forecast": pd.DataFrame(
+            {
+                "Date": dates,
+                "Account_Name": np.where(np.arange(num_days) % 2, "Rent", "Pay"),
+                "Amount": np.full(num_days, -1000),
+                "Amount_Paid": 0,
+                "Running_Balance": 100000 - 1000 * np.arange(1, num_days + 1),
+            }
+        )
+    }
+
+
+def test_table_view_fetches_only_the_visible_window():
+    dict_frames = get_daily_forecast(3650)
+    forecast_store = ForecastStore(lambda: dict_frames)
+    forecast_store.refresh()
+    table_view = TableView(forecast_store, "forecast")
+
+    df_window = table_view.fetch_window(20)
+    assert len(df_window) == 20
+    assert table_view.total == 3650
+
+    table_view.move(3650, 20)
+    df_window = table_view.fetch_window(20)
+    assert table_view.cursor == 3649
+    assert table_view.top == 3630
+    assert df_window["Date"].iloc[-1] == "2039-12-29"
+
+    table_view.set_account("Rent")
+    table_view.fetch_window(20)
+    assert table_view.total == 1825
+
+
+def test_table_view_clamps_after_refresh_shrinks_the_table():
+    dict_frames = get_daily_forecast(100)
+    forecast_store = ForecastStore(lambda: dict_frames)
+    forecast_store.refresh()
+    table_view = TableView(forecast_store, "forecast")
+    table_view.fetch_window(10)
+    table_view.move(99, 10)
+    table_view.fetch_window(10)
+
+    dict_frames.update(get_daily_forecast(30))
+    forecast_store.refresh()
+    df_window = table_view.fetch_window(10)
+
+    assert table_view.top == 20
+    assert table_view.cursor == 29
+    assert len(df_window) == 10
+
+
+def test_render_rows_fits_width():
+    df_window = pd.DataFrame({"Date": ["2030-01-01"], "Amount": [-1234.5]})
+
+    ls_lines = render_rows(df_window, width=14)
+
+    assert ls_lines == ["Date       Amo", "2030-01-01 -1,"]
+
+
+def test_handle_key_scrolls_and_switches_views():
+    forecast_store = ForecastStore(lambda: get_daily_forecast(100))
+    forecast_store.refresh()
+    dict_table_views = {name: TableView(forecast_store, name) for name in DICT_VIEWS}
+    table_view = dict_table_views["forecast"]
+    table_view.fetch_window(10)
+
+    for key in [curses.KEY_NPAGE, curses.KEY_DOWN, curses.KEY_END, curses.KEY_UP]:
+        table_view = handle_key(
+            None, key, table_view, dict_table_views, forecast_store, 10
+        )
+    assert table_view.cursor == 98
+
+    # views the snapshot does not hold are not switched to
+    next_view = handle_key(
+        None, ord("2"), table_view, dict_table_views, forecast_store, 10
+    )
+    assert next_view is table_view